@@ -0,0 +1,133 @@
+# BatchClean
+# Cleans a whole directory (or list) of Ptolemy or DWUCK output files from one python process,
+# using a pool of workers, instead of running ptclean.py/dwclean.py once per file
+# =============================================================================================== #
+# Run the script as
+#	python2 BatchClean.py CODE n_workers PATH [PATH ...] [--resume]
+# where CODE is ptolemy or dwuck, n_workers is the number of files to clean at once (0 = number
+# of cores), and each PATH is either an output file or a directory, in which case every .out file
+# in it is cleaned. The clean files are named exactly as ptclean.py and dwclean.py name them.
+# Asymptopia problems, warnings and DWUCK failures are printed for each file and written together
+# to logfile.log once everything has been cleaned. The cross sections are also written to the
+# binary store PT_Raw.npy/PT_Raw.json (see function_CrossSectionStore.py) in the directory of the
+# first output file, and the time taken is recorded in metrics.log there (see function_Metrics.py).
+# If PTOLEMY_PROFILE is 1, the files are cleaned one at a time in this process so that the profile
+# covers the cleaning. Once everything has been cleaned, the clean stage is recorded in the journal
+# there (see function_Journal.py), and with --resume nothing is cleaned if it was recorded after
+# the last input file finished
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import glob
+import multiprocessing
+import os
+import sys
+
+from function_CleanOutput import *
+from function_CrossSectionStore import *
+from function_Metrics import *
+from function_Journal import *
+
+
+# Worker function - job is [ output file path, code ]. Returns [ output file path, cleaned output
+# (without the blocks), store records ]
+def _CleanJob(job):
+	clean_dct = CleanFile( job[0], job[1], 1 )
+	try:
+		record_list = CleanRecords( job[0], clean_dct, job[1] )
+	except ValueError:
+		record_list = []
+	clean_dct["blocks"] = []
+	return [ job[0], clean_dct, record_list ]
+
+
+# MAIN FUNCTION
+if __name__ == "__main__":
+	# Resume a previous run?
+	resume = 1 if "--resume" in sys.argv else 0
+	sys.argv = [ a for a in sys.argv if a != "--resume" ]
+
+	if len(sys.argv) < 4 or sys.argv[1] not in [ "ptolemy", "dwuck" ]:
+		print("Usage: python2 BatchClean.py ptolemy|dwuck n_workers PATH [PATH ...]")
+		sys.exit(1)
+
+	code = sys.argv[1]
+	n_workers = int(sys.argv[2])
+	if n_workers <= 0:
+		try:
+			n_workers = multiprocessing.cpu_count()
+		except NotImplementedError:
+			n_workers = 1
+
+	# Get the list of output files
+	out_file_list = []
+	for path in sys.argv[3:]:
+		if os.path.isdir(path):
+			out_file_list += sorted( glob.glob( os.path.join( path, "*.out" ) ) )
+		else:
+			out_file_list.append(path)
+
+	if len(out_file_list) == 0:
+		print("No output files to clean")
+		sys.exit(0)
+
+	out_file_dir = os.path.dirname( out_file_list[0] )
+	journal_path = JournalPath(out_file_dir)
+	if resume == 1 and StageDone( ReadJournal(journal_path), "clean" ):
+		print("Output files already cleaned in the previous run")
+		sys.exit(0)
+	metrics_path = MetricsPath(out_file_dir)
+	profile = StartProfile()
+	stage = StartStage("clean")
+
+	# Clean everything - parsing is the expensive part, so use processes rather than threads
+	job_list = [ [ f, code ] for f in out_file_list ]
+	pool = None
+	if profile is None:
+		pool = multiprocessing.Pool( min( n_workers, len(out_file_list) ) )
+	result_list = []
+	record_list = []
+	try:
+		for out_file_path, clean_dct, records in ( pool.imap( _CleanJob, job_list, 4 ) if pool is not None else map( _CleanJob, job_list ) ):
+			result_list.append( [ out_file_path, clean_dct ] )
+			record_list += records
+			ReportCleanFlags( out_file_path, clean_dct )
+	finally:
+		if pool is not None:
+			pool.close()
+			pool.join()
+
+	n_files, n_bytes = FileStats( [ f for r in result_list for f in r[1]["files"] ] )
+	EndStage( metrics_path, stage, n_files, n_bytes, { "out_files": len(result_list), "out_bytes": FileStats(out_file_list)[1] } )
+
+	# Write the binary store
+	stage = StartStage("store")
+	store_path = os.path.join( out_file_dir, store_name )
+	n_files, n_bytes = FileStats( WriteStore( store_path, record_list ) )
+	EndStage( metrics_path, stage, n_files, n_bytes, { "records": len(record_list) } )
+	StopProfile( profile, out_file_dir )
+
+	# Write one log for the whole batch
+	log_line_list = []
+	for out_file_path, clean_dct in result_list:
+		log_line_list += CleanLogLines( out_file_path, clean_dct, 1 )
+	if len(log_line_list) > 0:
+		logfile = open("logfile.log", 'a')
+		logfile.writelines(log_line_list)
+		logfile.close()
+
+	# Print a summary
+	n_clean = sum( [ len( r[1]["files"] ) for r in result_list ] )
+	print( "Wrote " + str(n_clean) + " clean files from " + str( len(result_list) ) + " output files" )
+	print( "Stored " + str( len(record_list) ) + " cross sections in " + StorePaths(store_path)[0] )
+	for flag, label in [ [ "asymptopia", "asymptopia problems" ], [ "warning", "warnings" ], [ "fail", "failures" ], [ "error", "files that could not be cleaned" ] ]:
+		n = len( [ r for r in result_list if r[1][flag] == 1 ] )
+		if n > 0:
+			print( str(n) + " " + label + " (see logfile.log)" )
+
+	if len( [ r for r in result_list if r[1]["error"] == 1 ] ) > 0:
+		sys.exit(1)
+	AppendJournal( journal_path, StageEntry("clean") )
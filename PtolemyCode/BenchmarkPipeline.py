@@ -0,0 +1,86 @@
+# BenchmarkPipeline
+# Times each stage of the pipeline (input file generation, cleaning, CSV assembly and the XMGrace
+# split) on synthetic workloads of different sizes, and records the throughput and peak memory so
+# that runs can be compared over time
+# =============================================================================================== #
+# Run the script as
+#	python2 BenchmarkPipeline.py RESULT_FILE [n_decks] [n_angles] [stages]
+# where n_decks and n_angles are comma separated lists of workload sizes (default 10,100,1000 and
+# 100,1000) and stages is a comma separated list of stages (default all - see function_Benchmark.py).
+# Every combination is run once, and a JSON line is appended to RESULT_FILE for each
+#	{ "time", "host", "python", "commit", "stage", "n_decks", "n_angles", "items", "bytes",
+#	  "seconds", "cpu_seconds", "decks_per_second", "mb_per_second", "peak_rss_kb", "base_rss_kb" }
+# where base_rss_kb is the memory used before the stage started (by Python and the modules it
+# imports, or 0 for the XMGrace split, which runs as a script of its own). The time taken is
+# compared with the last run of the same workload on the same host. The files for each workload
+# are written to a temporary directory in BENCHMARK_DIR (default the system temporary directory),
+# which is deleted afterwards
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from function_Benchmark import *
+
+
+def usage():
+	print("Usage: python2 BenchmarkPipeline.py RESULT_FILE [n_decks,...] [n_angles,...] [stage,...]")
+
+
+def SizeList(s):
+	return [ int(x) for x in s.split(",") if x != "" ]
+
+
+# MAIN FUNCTION
+# Each stage is prepared and timed in a process of its own (see MeasureStage)
+if len(sys.argv) == 6 and sys.argv[1] in [ "--prepare", "--time" ]:
+	stage, n_decks, n_angles, work_dir = [ sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5] ]
+	if sys.argv[1] == "--prepare":
+		PrepareStage( stage, n_decks, n_angles, work_dir )
+	else:
+		print( json.dumps( TimeStage( stage, n_decks, n_angles, work_dir ), sort_keys = True ) )
+	sys.exit(0)
+
+if len(sys.argv) < 2:
+	usage()
+	sys.exit(1)
+
+result_path = sys.argv[1]
+n_deck_list = SizeList( sys.argv[2] ) if len(sys.argv) > 2 and sys.argv[2] != "" else [ 10, 100, 1000 ]
+n_angle_list = SizeList( sys.argv[3] ) if len(sys.argv) > 3 and sys.argv[3] != "" else [ 100, 1000 ]
+run_stage_list = sys.argv[4].split(",") if len(sys.argv) > 4 and sys.argv[4] != "" else stage_list
+for stage in run_stage_list:
+	if stage not in stage_list:
+		sys.exit( "Not a benchmark stage: " + stage + " (choose from " + ",".join(stage_list) + ")" )
+
+history = ReadBenchmarks(result_path)
+script = os.path.abspath(__file__)
+base_dir = os.environ.get( "BENCHMARK_DIR", tempfile.gettempdir() )
+
+print( "%-8s %8s %8s %10s %12s %10s %12s" % ( "stage", "decks", "angles", "seconds", "decks/s", "MB/s", "peak MB" ) )
+for stage in run_stage_list:
+	for n_decks in n_deck_list:
+		for n_angles in n_angle_list:
+			work_dir = tempfile.mkdtemp( prefix = "ptolemy-benchmark-", dir = base_dir )
+			try:
+				record = BenchmarkRecord( stage, n_decks, n_angles, MeasureStage( script, stage, n_decks, n_angles, work_dir ) )
+			finally:
+				shutil.rmtree(work_dir)
+
+			result_file = open(result_path, "a")
+			result_file.write( json.dumps( record, sort_keys = True ) + "\n" )
+			result_file.close()
+
+			line = "%-8s %8d %8d %10.3f %12.1f %10.2f %12.1f" % ( stage, n_decks, n_angles, record["seconds"], record["decks_per_second"], record["mb_per_second"], record["peak_rss_kb"]/1024.0 )
+			previous = PreviousRecord( history, record )
+			if previous is not None and previous["seconds"] > 0:
+				line += "   (%+.0f%% time since %s)" % ( 100.0*( record["seconds"]/previous["seconds"] - 1 ), previous["time"] )
+			print(line)
+			sys.stdout.flush()
@@ -0,0 +1,68 @@
+# PotentialGrid
+# Builds grids of optical model parameters for large sweeps (see function_PotentialGrid.py), and
+# describes the grids that have been built
+# =============================================================================================== #
+# Run the script as
+#	python2 PotentialGrid.py build GRID_DIR PARTICLE MODEL A_MIN,A_MAX,A_STEP Z_MIN,Z_MAX,Z_STEP E_MIN,E_MAX,E_STEP
+#	                                    -> Tabulates MODEL (e.g. KD, or ALL-D for every potential
+#	                                       of the particle that can be tabulated) of PARTICLE (p, d,
+#	                                       h or a) and writes it to GRID_DIR
+#	python2 PotentialGrid.py info GRID_DIR
+#	                                    -> Prints the axes and largest error bound of each grid
+# where E is the energy in the channel in MeV. Set PTOLEMY_GRID_DIR to GRID_DIR to generate input
+# files with the grids. The grids do not make generating the input files any faster (it takes
+# about 2-3 times as long as with the exact formulas) - they are for models that are expensive to
+# work out. The grid holds (A, Z, E) points of 16 parameters each, so e.g. A from 20 to 60, Z from
+# 10 to 30 and E from 0 to 100 MeV in 0.5 MeV steps takes 41 x 21 x 201 x 128 bytes, about 22 MB
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import glob
+import json
+import os
+import sys
+
+from function_PotentialGrid import *
+
+
+def usage():
+	print("Usage: python2 PotentialGrid.py build GRID_DIR PARTICLE MODEL A_MIN,A_MAX,A_STEP Z_MIN,Z_MAX,Z_STEP E_MIN,E_MAX,E_STEP | info GRID_DIR")
+
+
+# MAIN FUNCTION
+if len(sys.argv) < 3:
+	usage()
+	sys.exit(1)
+
+option = sys.argv[1]
+grid_dir = sys.argv[2]
+
+if option == "build" and len(sys.argv) == 8:
+	particle = sys.argv[3]
+	A_axis = GridAxis( sys.argv[5], 1 )
+	Z_axis = GridAxis( sys.argv[6], 1 )
+	E_axis = GridAxis( sys.argv[7] )
+
+	for model in ModelEntries( particle, sys.argv[4] ):
+		if DependsOnBeam( model["array"] ):
+			print( "Skipping " + model["name"] + " - it uses the beam energy as well as E, so cannot be tabulated" )
+			continue
+		grid = BuildPotentialGrid( particle, model["abbreviation"], A_axis, Z_axis, E_axis )
+		SavePotentialGrid( grid_dir, grid )
+		n_exact = np.count_nonzero( grid["bound"] > GridTolerance() )
+		print( "%-20s %d points, largest error bound %.2e, %d of %d cells use the exact formula" % ( model["name"], grid["values"].size/n_grid_par, np.max( grid["bound"] ), n_exact, grid["bound"].size ) )
+
+elif option == "info":
+	for json_path in sorted( glob.glob( os.path.join( grid_dir, "*.json" ) ) ):
+		json_file = open(json_path, "r")
+		index = json.load(json_file)
+		json_file.close()
+		axis_list = [ "%s %g-%g (%d)" % ( x, index[x][0], index[x][-1], len( index[x] ) ) for x in [ "A", "Z", "E" ] ]
+		print( "%-20s %-4s %s, largest error bound %.2e" % ( index["name"], index["particle"], ", ".join(axis_list), index["max_bound"] ) )
+
+else:
+	usage()
+	sys.exit(1)
@@ -0,0 +1,230 @@
+# PtolemySweep
+# Writes the input files for every pair of incoming and outgoing potentials and runs them all
+# through a single pool of solvers, all from one python process
+# =============================================================================================== #
+# Run the script as
+#	python2 PtolemySweep.py OPTION_FILE bPT bDW [n_workers] [bCache] [pack_size] [bKeepInput] [bClean] [bKeepRaw] [bIncremental] [asymptopia_rounds] [monitor_policy] [timeout] [--resume]
+# with POTENTIAL_IN and POTENTIAL_OUT set to lists of potentials, e.g.
+#	POTENTIAL_IN="AC B DNR DR HSS LH PP" POTENTIAL_OUT="BG KD M P V"
+# INPUT_FILE_DIR, OUTPUT_FILE_DIR and PARAMETER_DIR are taken from the environment as in
+# WritePtolemyInputFile.py, and the remaining arguments are as in RunPtolemy.py. The input files
+# are piped straight into the solvers and are only written to INPUT_FILE_DIR if bKeepInput is 1.
+# If bIncremental is 1, the manifest in OUTPUT_FILE_DIR (see function_Manifest.py) is used to
+# only run the input files that have changed since the last sweep, and to remove the outputs of
+# input files that are no longer part of it. Finished input files are recorded in the journal, and
+# --resume skips the ones that finished in the previous run (as in RunPtolemy.py). Input files for
+# which Ptolemy asks for a larger asymptopia are generated again with a larger asymptopia and run
+# again, up to asymptopia_rounds times (default 0 = never, see function_Asymptopia.py), in which
+# case logfile.log only lists the input files whose asymptopia problems were not fixed, and
+# monitor_policy and timeout are as in RunPtolemy.py. Input files that ran out of time can be run
+# again with different options (e.g. a smaller LMAX or Asymptopia) by changing the option file and
+# using --resume. The input files are run longest first, as in RunPtolemy.py, and the time taken
+# by each stage and input file is recorded in OUTPUT_FILE_DIR/metrics.log (see function_Metrics.py)
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import hashlib
+import os
+import sys
+
+from function_ImportEnergies import *
+from function_GetOptions import *
+from function_WriteInputFiles import *
+from function_RunSolver import *
+from function_CrossSectionStore import *
+from function_Manifest import *
+from function_Journal import *
+from function_Asymptopia import *
+from function_Metrics import *
+
+# Resume a previous run?
+resume = 1 if "--resume" in sys.argv else 0
+sys.argv = [ a for a in sys.argv if a != "--resume" ]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ GET THE FILE DIRECTORIES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+INPUTFileDir = os.environ["INPUT_FILE_DIR"]
+OUTPUTFileDir = os.environ["OUTPUT_FILE_DIR"]
+PARAMETERFileDir = os.environ["PARAMETER_DIR"]
+
+# Lists of potentials to sweep over
+potential_in = SplitPotentialList( os.environ["POTENTIAL_IN"] )
+potential_out = SplitPotentialList( os.environ["POTENTIAL_OUT"] )
+
+# Options and codes
+opt_dct = GetOptions( sys.argv[1] )
+
+code_list = []
+if sys.argv[2] == "1":
+	code_list.append("ptolemy")
+if sys.argv[3] == "1":
+	code_list.append("dwuck")
+
+if len(sys.argv) > 4 and sys.argv[4] != "":
+	n_workers = int(sys.argv[4])
+else:
+	n_workers = 0
+
+if len(sys.argv) > 5 and sys.argv[5] == "0":
+	cache_dir = None
+else:
+	cache_dir = CacheDir()
+
+if len(sys.argv) > 6 and sys.argv[6] != "":
+	pack_size = int(sys.argv[6])
+else:
+	pack_size = 1
+
+# Keep a copy of the input files on disk?
+if len(sys.argv) > 7 and sys.argv[7] == "1":
+	keep_input = 1
+else:
+	keep_input = 0
+
+# Clean the output on the fly?
+if len(sys.argv) > 8 and sys.argv[8] == "1":
+	clean = 1
+else:
+	clean = 0
+
+if len(sys.argv) > 9 and sys.argv[9] == "1":
+	keep_raw = 1
+else:
+	keep_raw = 0
+
+# Only run what has changed?
+if len(sys.argv) > 10 and sys.argv[10] == "1":
+	incremental = 1
+else:
+	incremental = 0
+
+# How many times to raise the asymptopia
+if len(sys.argv) > 11 and sys.argv[11] != "":
+	asymptopia_rounds = int(sys.argv[11])
+else:
+	asymptopia_rounds = 0
+
+# What to do about problems in the output while the codes are running
+if len(sys.argv) > 12 and sys.argv[12] != "":
+	policy_dct = ParsePolicy( sys.argv[12] )
+else:
+	policy_dct = None
+
+# Time limit for each input file
+if len(sys.argv) > 13 and sys.argv[13] != "":
+	timeout = float(sys.argv[13])
+else:
+	timeout = 0
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ GENERATE INPUT FILES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+profile = StartProfile()
+metrics_path = MetricsPath(OUTPUTFileDir)
+code = code_list[-1] if len(code_list) > 0 else ""
+
+stage = StartStage("generate")
+energy = ImportEnergy(PARAMETERFileDir + "/energyList.txt")
+info_dct = {}
+deck_list = [ [ INPUTFileDir + "/" + name, deck_text ] for name, deck_text in GenerateSweepDecks( energy, potential_in, potential_out, opt_dct, info_dct ) ]
+
+print( "Generated " + str( len(deck_list) ) + " input files for " + str( len( PotentialPairs( potential_in, potential_out ) ) ) + " pairs of potentials" )
+
+# Only write the input files if a copy is wanted
+def KeepInputFiles( deck_list ):
+	if keep_input == 1:
+		for in_file_path, deck_text in deck_list:
+			in_file = open(in_file_path, "w")
+			in_file.write(deck_text)
+			in_file.close()
+	return deck_list
+
+KeepInputFiles(deck_list)
+EndStage( metrics_path, stage, len(deck_list), sum( [ len( d[1] ) for d in deck_list ] ), { "pairs": len( PotentialPairs( potential_in, potential_out ) ), "energies": len(energy), "potential_cache_hits": PotentialCacheStats()["hits"], "potential_cache_misses": PotentialCacheStats()["misses"] } )
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CHECK THE MANIFEST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+store_path = os.path.join( OUTPUTFileDir, store_name )
+run_list = deck_list
+
+# Skip everything that finished last time
+journal_path = JournalPath(OUTPUTFileDir)
+done_list = []
+if resume == 1:
+	journal = ReadJournal(journal_path)
+	done_list, run_list = ResumeDecks( journal, run_list )
+	print( "Resuming: " + str( len(done_list) ) + " of " + str( len(deck_list) ) + " input files already finished" )
+AppendJournal( journal_path, StartEntry(resume) )
+
+fresh_list = []
+if incremental == 1:
+	options_file = open(sys.argv[1], "r")
+	options_hash = hashlib.sha1( options_file.read().encode("utf-8") ).hexdigest()
+	options_file.close()
+
+	manifest_path = ManifestPath(OUTPUTFileDir)
+	manifest = LoadManifest(manifest_path)
+	fresh_list, run_list = SplitStaleDecks( manifest, run_list, code_list, OUTPUTFileDir, info_dct, options_hash )
+
+	# Keep the stored cross sections of everything that is up to date (or finished last time)
+	fresh_record_list = StoreRecords( store_path, ManifestFiles( manifest, fresh_list ) )
+	n_removed = RemoveStaleOutputs( manifest, fresh_list + done_list, OUTPUTFileDir )
+
+	print( str( len(fresh_list) ) + " of " + str( len(deck_list) ) + " input files are up to date (" + str(n_removed) + " old output files removed)" )
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ RUN THE CODES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# If the asymptopia is raised, the asymptopia problems are only logged once it is known which
+# input files it did not fix
+escalate = 1 if code_list == ["ptolemy"] and asymptopia_rounds > 0 else 0
+logfile = open("logfile.log", 'a') if clean == 1 else None
+def RunSweepDecks( run_list ):
+	return RunDecks( run_list, OUTPUTFileDir, code_list, n_workers, cache_dir = cache_dir, pack_size = pack_size, clean = clean, keep_raw = keep_raw, logfile = logfile if escalate == 0 else None, on_result = lambda res: AppendJournal( journal_path, DeckEntry(res) ), policy_dct = policy_dct, timeout = timeout, timing_path = TimingPath(), metrics_path = metrics_path )
+
+stage = StartStage("run")
+result_list = RunSweepDecks(run_list)
+n_files, n_bytes = ResultStats( result_list, code )
+EndStage( metrics_path, stage, n_files, n_bytes, { "decks": len(result_list), "failed": len( [ res for res in result_list if res[2] != 0 ] ) } )
+
+# Run the input files that need a larger asymptopia again. The manifest keeps the hash of the
+# original input file, since that is what the next sweep will generate
+asymptopia_report = {}
+if escalate == 1:
+	stage = StartStage("asymptopia")
+	result_list, asymptopia_report = EscalateAsymptopia( result_list, info_dct, opt_dct, lambda redo_list: RunSweepDecks( KeepInputFiles(redo_list) ), asymptopia_rounds )
+	EndStage( metrics_path, stage, extra_dct = { "decks": len(asymptopia_report), "reruns": sum( [ len(r) for r in asymptopia_report.values() ] ) } )
+if logfile is not None:
+	if escalate == 1:
+		for res in result_list:
+			if res[2] == 0 and res[5] is not None:
+				logfile.writelines( CleanLogLines( res[1], res[5] ) )
+	logfile.close()
+
+# Results of the input files that finished last time
+done_result_list = []
+if resume == 1 and len(code_list) > 0:
+	done_result_list = JournalResults( journal, done_list, OUTPUTFileDir, code_list[-1] )
+
+# Record what was run
+if incremental == 1:
+	UpdateManifest( manifest, done_result_list + result_list, dict(deck_list), info_dct, options_hash, code_list )
+	SaveManifest( manifest_path, manifest )
+
+# Put the cleaned cross sections in the binary store
+if clean == 1 and len(code_list) > 0:
+	stage = StartStage("store")
+	record_list = ResultRecords( done_result_list + result_list, code_list[-1] )
+	if incremental == 1:
+		record_list += fresh_record_list
+	n_files, n_bytes = FileStats( WriteStore( store_path, record_list ) )
+	EndStage( metrics_path, stage, n_files, n_bytes, { "records": len(record_list) } )
+
+# Keep a list of the input files that ran out of time
+WriteTimedOut( OUTPUTFileDir, result_list )
+
+StopProfile( profile, OUTPUTFileDir )
+
+# Report the cache hits and failures (if any)
+PrintAsymptopiaReport(asymptopia_report)
+if ReportResults(result_list) > 0:
+	print("Run again with --resume to retry the failed input files")
+	sys.exit(1)
+AppendJournal( journal_path, StageEntry("run") )
@@ -0,0 +1,150 @@
+# QueueWorker
+# Runs Ptolemy and/or DWUCK on the input files in a work queue on a shared filesystem (see
+# function_WorkQueue.py), so that one set of input files can be shared out between as many worker
+# processes as wanted, on as many machines as can see the queue
+# =============================================================================================== #
+# Run the script as
+#	python2 QueueWorker.py submit bPT bDW [bCache] [bClean] [bKeepRaw] [timeout] [monitor_policy]
+#	                                           -> Puts every input file in INPUT_FILE_DIR in the queue
+#	python2 QueueWorker.py work [n_slots]      -> Runs input files from the queue, n_slots at a time
+#	                                              (default 1), until there are none left
+#	python2 QueueWorker.py status              -> Prints the number of input files in each part of
+#	                                              the queue
+#	python2 QueueWorker.py retry               -> Puts the input files that failed back in the queue
+#	python2 QueueWorker.py collect             -> Writes the binary store for everything that ran
+# The arguments to submit are as in RunPtolemy.py, and are used by every worker. INPUT_FILE_DIR and
+# OUTPUT_FILE_DIR are taken from the environment (the input files can be written with
+# WritePtolemyInputFile.py, or ptolemyBash.sh with SWITCH_RUN_CODE=0), the queue is in QUEUE_DIR
+# (default OUTPUT_FILE_DIR/queue) and every worker writes its output to the OUTPUT_FILE_DIR given
+# to submit. A worker that crashes leaves its input files claimed until PTOLEMY_QUEUE_LEASE seconds
+# (default 120) have passed, after which another worker runs them again
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import glob
+import os
+import sys
+import threading
+from time import sleep
+
+from function_RunSolver import *
+from function_CrossSectionStore import *
+from function_Journal import *
+from function_WorkQueue import *
+
+# Seconds to wait before looking again when everything left is claimed by other workers
+poll_interval = 5
+
+
+def usage():
+	print("Usage: python2 QueueWorker.py submit bPT bDW [bCache] [bClean] [bKeepRaw] [timeout] [monitor_policy] | work [n_slots] | status | retry | collect")
+
+
+# Claim and run input files until the queue is empty. Results are added to result_list
+def WorkLoop( queue_dir, settings_dct, result_list ):
+	cache_dir = CacheDir() if settings_dct["cache"] == 1 else None
+	policy_dct = ParsePolicy( settings_dct["policy"] )
+	while True:
+		claim = ClaimDeck(queue_dir)
+		if claim is None:
+			# Take over from any workers that have stopped, or wait for the others to finish
+			if ReclaimStale(queue_dir) > 0:
+				continue
+			if QueueStatus(queue_dir)["claimed"] == 0:
+				return
+			sleep(poll_interval)
+			continue
+
+		claim_path, deck = claim
+		beat = StartHeartbeat(claim_path)
+		start = datetime.now()
+		try:
+			res = RunDeck( deck, OutputFileName( deck[0], settings_dct["out_dir"] ), settings_dct["codes"], cache_dir, settings_dct["clean"], settings_dct["keep_raw"], policy_dct, settings_dct["timeout"] )
+		finally:
+			StopHeartbeat(beat)
+
+		if FinishDeck( queue_dir, claim_path, res, ( datetime.now() - start ).total_seconds() ):
+			PrintResult(res)
+			result_list.append(res)
+		else:
+			print( deck[0] + " was taken over by another worker" )
+
+
+# MAIN FUNCTION
+if len(sys.argv) < 2:
+	usage()
+	sys.exit(1)
+
+OUTPUTFileDir = os.environ["OUTPUT_FILE_DIR"]
+queue_dir = QueueDir(OUTPUTFileDir)
+option = sys.argv[1]
+
+if option == "submit" and len(sys.argv) > 3:
+	code_list = []
+	if sys.argv[2] == "1":
+		code_list.append("ptolemy")
+	if sys.argv[3] == "1":
+		code_list.append("dwuck")
+
+	settings_dct = {
+		"codes": code_list,
+		"out_dir": os.path.abspath(OUTPUTFileDir),
+		"cache": 0 if len(sys.argv) > 4 and sys.argv[4] == "0" else 1,
+		"clean": 1 if len(sys.argv) > 5 and sys.argv[5] == "1" else 0,
+		"keep_raw": 1 if len(sys.argv) > 6 and sys.argv[6] == "1" else 0,
+		"timeout": float(sys.argv[7]) if len(sys.argv) > 7 and sys.argv[7] != "" else 0,
+		"policy": sys.argv[8] if len(sys.argv) > 8 else ""
+	}
+	ParsePolicy( settings_dct["policy"] )
+
+	deck_list = ReadDecks( sorted( glob.glob( os.environ["INPUT_FILE_DIR"] + "/*.in" ) ) )
+	n = SubmitDecks( queue_dir, deck_list, settings_dct )
+	print( "Added " + str(n) + " of " + str( len(deck_list) ) + " input files to " + queue_dir )
+
+elif option == "work":
+	n_slots = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+	settings_dct = LoadQueueSettings(queue_dir)
+
+	# Each slot runs one input file at a time
+	result_list = []
+	thread_list = [ threading.Thread( target = WorkLoop, args = ( queue_dir, settings_dct, result_list ) ) for i in range( 0, n_slots ) ]
+	for t in thread_list:
+		t.start()
+	for t in thread_list:
+		t.join()
+
+	n_fail = len( [ res for res in result_list if res[2] != 0 ] )
+	print( "Ran " + str( len(result_list) ) + " input files (" + str(n_fail) + " failed)" )
+
+elif option == "status":
+	status_dct = QueueStatus(queue_dir)
+	for name in queue_dir_list:
+		print( name + "\t" + str( status_dct[name] ) )
+
+elif option == "retry":
+	print( "Put " + str( RetryFailed(queue_dir) ) + " input files back in the queue" )
+
+elif option == "collect":
+	settings_dct = LoadQueueSettings(queue_dir)
+	if settings_dct["clean"] == 1 and len( settings_dct["codes"] ) > 0:
+		entry_list, deck_list, missing_list = QueueEntries(queue_dir)
+		for name in missing_list:
+			print( name + " is in done/ but its result is missing - move it back to pending/ and run it again" )
+		result_list = JournalResults( entry_list, deck_list, settings_dct["out_dir"], settings_dct["codes"][-1] )
+		record_list = ResultRecords( result_list, settings_dct["codes"][-1] )
+		npy_path = WriteStore( os.path.join( settings_dct["out_dir"], store_name ), record_list )[0]
+		print( "Stored " + str( len(record_list) ) + " cross sections in " + npy_path )
+	else:
+		print("Nothing to collect - the output was not cleaned as it was run (use BatchClean.py)")
+
+	status_dct = QueueStatus(queue_dir)
+	if status_dct["pending"] + status_dct["claimed"] + status_dct["failed"] > 0:
+		print( "Not finished: " + str( status_dct["pending"] ) + " pending, " + str( status_dct["claimed"] ) + " claimed, " + str( status_dct["failed"] ) + " failed" )
+		sys.exit(1)
+
+else:
+	usage()
+	sys.exit(1)
@@ -0,0 +1,139 @@
+# RunPtolemy
+# Runs Ptolemy and/or DWUCK on every input file in INPUT_FILE_DIR, several at once, and stores
+# the output files in OUTPUT_FILE_DIR
+# =============================================================================================== #
+# Run the script as
+#	python2 RunPtolemy.py bPT bDW [n_workers] [bCache] [pack_size] [bClean] [bKeepRaw] [monitor_policy] [timeout] [--resume]
+# where bPT/bDW are 1 to run Ptolemy/DWUCK, n_workers is the maximum number of solvers to run
+# at once (0 or missing = number of cores) and bCache is 1 to use the result cache (default) or 0
+# to run everything from scratch. The cache can be inspected and pruned with ptcache.py.
+# pack_size is the number of Ptolemy input files to run with each Ptolemy process (default 1).
+# If bClean is 1 the output is cleaned as it is produced, so the .out-clean files are written
+# straight away and there is no need to run ptclean.py. The .out files are then only kept for
+# inputs that failed, unless bKeepRaw is 1. monitor_policy says what to do about warnings and
+# failures as soon as a solver prints them, e.g. "abort" or "warning=flag,fail=abort" (default
+# "continue" = nothing, see function_MonitorOutput.py). timeout is the longest (in seconds) any
+# solver may run for on one input file (default 0 = no limit); input files that run out of time
+# are listed in OUTPUT_FILE_DIR/timed_out.txt and are run again by --resume.
+# The time taken by each input file is kept (see function_DeckTimings.py), and is used to start
+# the input files that are expected to take longest first and to estimate the time left.
+# Each finished input file is recorded in OUTPUT_FILE_DIR/journal.log (see function_Journal.py).
+# With --resume, the input files that finished in the previous run are not run again.
+# The time taken by each stage and input file is recorded in OUTPUT_FILE_DIR/metrics.log, and the
+# script is profiled if PTOLEMY_PROFILE is 1 (see function_Metrics.py)
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import glob
+import os
+import sys
+
+from function_RunSolver import *
+from function_CrossSectionStore import *
+from function_Journal import *
+from function_Metrics import *
+
+# Resume a previous run?
+resume = 1 if "--resume" in sys.argv else 0
+sys.argv = [ a for a in sys.argv if a != "--resume" ]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ GET THE FILE DIRECTORIES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+INPUTFileDir = os.environ["INPUT_FILE_DIR"]
+OUTPUTFileDir = os.environ["OUTPUT_FILE_DIR"]
+
+# Work out which codes to run
+code_list = []
+if sys.argv[1] == "1":
+	code_list.append("ptolemy")
+if sys.argv[2] == "1":
+	code_list.append("dwuck")
+
+# Get the number of workers
+if len(sys.argv) > 3 and sys.argv[3] != "":
+	n_workers = int(sys.argv[3])
+else:
+	n_workers = 0
+
+# Use the result cache?
+if len(sys.argv) > 4 and sys.argv[4] == "0":
+	cache_dir = None
+else:
+	cache_dir = CacheDir()
+
+# Number of input files per Ptolemy process
+if len(sys.argv) > 5 and sys.argv[5] != "":
+	pack_size = int(sys.argv[5])
+else:
+	pack_size = 1
+
+# Clean the output on the fly?
+if len(sys.argv) > 6 and sys.argv[6] == "1":
+	clean = 1
+else:
+	clean = 0
+
+if len(sys.argv) > 7 and sys.argv[7] == "1":
+	keep_raw = 1
+else:
+	keep_raw = 0
+
+# What to do about problems in the output while the codes are running
+if len(sys.argv) > 8 and sys.argv[8] != "":
+	policy_dct = ParsePolicy( sys.argv[8] )
+else:
+	policy_dct = None
+
+# Time limit for each input file
+if len(sys.argv) > 9 and sys.argv[9] != "":
+	timeout = float(sys.argv[9])
+else:
+	timeout = 0
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ RUN THE CODES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+profile = StartProfile()
+metrics_path = MetricsPath(OUTPUTFileDir)
+code = code_list[-1] if len(code_list) > 0 else ""
+
+in_file_list = sorted( glob.glob( INPUTFileDir + "/*.in" ) )
+deck_list = ReadDecks(in_file_list)
+
+# Skip everything that finished last time
+journal_path = JournalPath(OUTPUTFileDir)
+done_list = []
+if resume == 1:
+	journal = ReadJournal(journal_path)
+	done_list, deck_list = ResumeDecks( journal, deck_list )
+	print( "Resuming: " + str( len(done_list) ) + " of " + str( len(done_list) + len(deck_list) ) + " input files already finished" )
+AppendJournal( journal_path, StartEntry(resume) )
+
+# Open a logfile for storing issues with asymptopia (as in ptclean.py)
+logfile = open("logfile.log", 'a') if clean == 1 else None
+stage = StartStage("run")
+result_list = RunDecks( deck_list, OUTPUTFileDir, code_list, n_workers, cache_dir = cache_dir, pack_size = pack_size, clean = clean, keep_raw = keep_raw, logfile = logfile, on_result = lambda res: AppendJournal( journal_path, DeckEntry(res) ), policy_dct = policy_dct, timeout = timeout, timing_path = TimingPath(), metrics_path = metrics_path )
+n_files, n_bytes = ResultStats( result_list, code )
+EndStage( metrics_path, stage, n_files, n_bytes, { "decks": len(result_list), "failed": len( [ res for res in result_list if res[2] != 0 ] ) } )
+if logfile is not None:
+	logfile.close()
+
+# Put the cleaned cross sections in the binary store (including those from the previous run)
+if clean == 1 and len(code_list) > 0:
+	stage = StartStage("store")
+	store_result_list = result_list
+	if resume == 1:
+		store_result_list = JournalResults( journal, done_list, OUTPUTFileDir, code_list[-1] ) + result_list
+	n_files, n_bytes = FileStats( WriteStore( os.path.join( OUTPUTFileDir, store_name ), ResultRecords( store_result_list, code_list[-1] ) ) )
+	EndStage( metrics_path, stage, n_files, n_bytes )
+
+# Keep a list of the input files that ran out of time
+WriteTimedOut( OUTPUTFileDir, result_list )
+
+StopProfile( profile, OUTPUTFileDir )
+
+# Report the cache hits and failures (if any)
+if ReportResults(result_list) > 0:
+	print("Run again with --resume to retry the failed input files")
+	sys.exit(1)
+AppendJournal( journal_path, StageEntry("run") )
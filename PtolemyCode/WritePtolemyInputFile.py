@@ -2,6 +2,7 @@
 # Generates the input files for Ptolemy using a range of custom functions
 # to generate various things.
 # N.B. First argument passed to this script is the options
+# The time taken is recorded in OUTPUT_FILE_DIR/metrics.log (see function_Metrics.py)
 # =============================================================================================== #
 # Patrick MacGregor
 # Nuclear Physics Research Group
@@ -17,12 +18,10 @@ import os
 import importlib
 
 #from functionImportINOUTdata import *
-from function_WritePtolemyBlock import *
-from function_GenerateLValues import *
-from function_PtolemyParameters import *
 from function_ImportEnergies import *
 from function_GetOptions import *
-from opticalmodel_globals import CalcQ
+from function_WriteInputFiles import *
+from function_Metrics import *
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ GET THE FILE DIRECTORIES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # Get the file directories
@@ -30,9 +29,9 @@ INPUTFileDir = os.environ["INPUT_FILE_DIR"]
 OUTPUTFileDir = os.environ["OUTPUT_FILE_DIR"]
 PARAMETERFileDir = os.environ["PARAMETER_DIR"]
 
-# Get the deuteron potential information
-potential_in = os.environ["POTENTIAL_IN"]
-potential_out = os.environ["POTENTIAL_OUT"]
+# Get the deuteron potential information (may be lists of potentials, e.g. "AC B DNR")
+potential_in = SplitPotentialList( os.environ["POTENTIAL_IN"] )
+potential_out = SplitPotentialList( os.environ["POTENTIAL_OUT"] )
 
 # Load the option
 optionFileDir = sys.argv[1]
@@ -46,47 +45,19 @@ bDW = sys.argv[3]
 # Get the values
 opt_dct = GetOptions(optionFileDir)
 
+profile = StartProfile()
+stage = StartStage("generate")
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CALCULATE RELEVANT QUANTITIES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # Import Energies
 energy = ImportEnergy(PARAMETERFileDir + "/energyList.txt")
 
-# Generate L Values for RESIDUAL NUCLEUS
-if opt_dct["L"] == -2:
-	L, J, JP, node = GenerateSpinParity( opt_dct )
-else:
-	L, J, JP, node = GetNodes( opt_dct["A"] - opt_dct["Z"], opt_dct["Z"], opt_dct["D"], opt_dct["L"] )
-
-# Calculate Q value and separation energy for reaction
-Q = CalcQ( opt_dct["M_Target"], opt_dct["M_Projectile"], opt_dct["M_Ejectile"], opt_dct["M_Product"] )
-sep_en = CalcSepEn( opt_dct["M_Target"], opt_dct["M_Product"], opt_dct["reaction_type"] )
-
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ MAKE THE PTOLEMY FILE ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-# Need to do the same inputs for a given excitation energy
-for i in range(0,len(energy)):
-	# Generate the correct Ptolemy input parameter string
-	s, name_list, omn_list = ObtainPTList(energy[i], potential_in, potential_out, opt_dct, sep_en )
-	
-	# Now need to loop over possible models
-	for a in range(0, len(s) ):
-		# Open the file
-		inFile = open(INPUTFileDir + "/" + FileNameIN( opt_dct["reaction_name"], energy[i], name_list[omn_list[a]] ), "w" )
-
-		# Loop over all states if J
-		for j in range(0,len(J)):
-			if j == len(J) - 1:
-				# Last block, so need to write end of the file as well
-				WritePtolemyBlock( inFile, JP[j], L[j], node[j], energy[i], s[a], opt_dct, Q, sep_en, 1 )
-			else:
-				# Write a normal block if not the last block
-				WritePtolemyBlock( inFile, JP[j], L[j], node[j], energy[i], s[a], opt_dct, Q, sep_en, 0 )
-
-		# Close the file
-		inFile.close()
-
-
-
-
-
+# Write the input files for every pair of potentials
+in_file_list = WriteSweepInputFiles( INPUTFileDir, energy, potential_in, potential_out, opt_dct )
 
+n_files, n_bytes = FileStats(in_file_list)
+EndStage( MetricsPath(OUTPUTFileDir), stage, n_files, n_bytes, { "pairs": len( PotentialPairs( potential_in, potential_out ) ), "energies": len(energy), "potential_cache_hits": PotentialCacheStats()["hits"], "potential_cache_misses": PotentialCacheStats()["misses"] } )
+StopProfile( profile, OUTPUTFileDir )
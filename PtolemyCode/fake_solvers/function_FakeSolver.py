@@ -0,0 +1,183 @@
+# FakeSolver [FUNCTION]
+# Stand-ins for Ptolemy and DWUCK that read an input file on stdin and print output laid out the
+# way ptclean.py and dwclean.py expect, so that everything else can be run and timed without the
+# real codes. The cross sections are made up, but the same input always gives the same output
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# FakeSetting - Reads a setting from the environment
+# Matches - Tests whether a piece of input matches a setting
+# FakeCrossSection - Generates a made-up cross section
+# SplitBlocks - Splits a Ptolemy input file into its blocks
+# FakePtolemy - Prints Ptolemy-like output for an input file
+# FakeDWUCK - Prints DWUCK-like output for an input file
+# Main - Runs one of the fake codes on stdin
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# Point PTOLEMY_DIR and DWUCK_DIR at this directory to use them. They are set up with
+#	FAKE_SOLVER_TIME       -> Seconds to take for each block (default 0)
+#	FAKE_SOLVER_TIME_L     -> Extra seconds to take for each unit of L in a block (default 0)
+#	FAKE_SOLVER_PAD        -> Extra lines of output to print for each block (default 0)
+#	FAKE_SOLVER_WARNING    -> Print a WARNING for blocks containing this text
+#	FAKE_SOLVER_ASYMPTOPIA -> Ask for a larger asymptopia in (transfer) blocks whose ASYMPTOPIA is
+#	                          less than this
+#	FAKE_SOLVER_FAIL       -> Fail for input files containing this text (Ptolemy stops with exit
+#	                          status 1, DWUCK prints FAILS)
+#	FAKE_SOLVER_HANG       -> Never finish for input files containing this text
+#	FAKE_SOLVER_EXIT       -> Exit status to finish with (default 0)
+# where "text" settings match any input file if they are "*". Ptolemy blocks use the ANGLEMIN,
+# ANGLEMAX and ANGLESTEP in the input file; DWUCK always gives 0 to 180 degrees in steps of 1
+# =============================================================================================== #
+import hashlib
+import math
+import os
+import sys
+import time
+
+
+def FakeSetting( name, default ):
+	value = os.environ.get( "FAKE_SOLVER_" + name, "" )
+	if value == "":
+		return default
+	if isinstance( default, float ):
+		return float(value)
+	if isinstance( default, int ):
+		return int(value)
+	return value
+
+
+def Matches( text, setting ):
+	return setting != "" and ( setting == "*" or setting in text )
+
+
+# A smooth, falling angular distribution whose size and shape depend on the block (through seed)
+# and on L
+def FakeCrossSection( seed, L, angle ):
+	size = 1.0 + ( seed % 1000 )/100.0
+	width = 10.0 + ( seed // 1000 ) % 20
+	return size*math.exp( -angle/( 3.0*width ) )*( 1.5 + math.cos( math.radians(angle)*( L + 1 )*3.0 ) )
+
+
+def _Seed( text ):
+	return int( hashlib.md5( text.encode("utf-8") ).hexdigest()[0:8], 16 )
+
+
+def _Settings( block, name_list, default_list ):
+	value_list = list(default_list)
+	for w in block.replace(";", " ").split():
+		for i in range( 0, len(name_list) ):
+			if w.upper().startswith( name_list[i] + "=" ):
+				try:
+					value_list[i] = float( w.split("=", 1)[1] )
+				except ValueError:
+					pass
+	return value_list
+
+
+def _Angles( angle_min, angle_max, angle_step ):
+	angle_list = []
+	n = int( round( ( angle_max - angle_min )/angle_step ) )
+	for i in range( 0, n + 1 ):
+		angle_list.append( angle_min + i*angle_step )
+	return angle_list
+
+
+def _Pause( L ):
+	seconds = FakeSetting( "TIME", 0.0 ) + FakeSetting( "TIME_L", 0.0 )*max( L, 0 )
+	if seconds > 0:
+		sys.stdout.flush()
+		time.sleep(seconds)
+
+
+def _Pad( out ):
+	for i in range( 0, FakeSetting( "PAD", 0 ) ):
+		out.write( " " + "%6d" % i + " ...............................................................\n" )
+
+
+# Ptolemy input files are a series of blocks, each starting with "reset"
+def SplitBlocks( deck_text ):
+	block_list = []
+	for line in deck_text.splitlines():
+		if line.strip() == "reset" or len(block_list) == 0:
+			block_list.append([])
+		block_list[-1].append(line)
+	return [ "\n".join(b) for b in block_list if len( "".join(b).strip() ) > 0 ]
+
+
+def FakePtolemy( deck_text, out ):
+	for block in SplitBlocks(deck_text):
+		# Echo the input, as Ptolemy does
+		L = -1
+		line_list = [ line for line in block.splitlines() if line.strip() != "end" ]
+		for line in line_list:
+			out.write( "0INPUT... " + line.strip() + "\n" )
+			for w in line.split():
+				if w.startswith("l=") and L == -1:
+					L = int( float( w[2:] ) )
+
+		if "writens" not in block:
+			continue
+		_Pause(L)
+		_Pad(out)
+
+		if Matches( block, FakeSetting( "WARNING", "" ) ):
+			out.write(" **** WARNING: FAKE SOLVER WARNING\n")
+
+		# Leave out the "end" so that a block gives the same output wherever it is in an input file
+		seed = _Seed( "\n".join(line_list) )
+		angle_min, angle_max, angle_step, asymptopia = _Settings( block, [ "ANGLEMIN", "ANGLEMAX", "ANGLESTEP", "ASYMPTOPIA" ], [ 0.0, 60.0, 1.0, -1.0 ] )
+		angle_list = _Angles( angle_min, angle_max, angle_step )
+
+		if "ELASTIC SCATTERING" in block:
+			out.write("0 ANGLE    REACTION    RUTHERFORD    SIGMA/RUTH    SIGMA      PHASE    NUCLEAR    COULOMB\n")
+			for angle in angle_list:
+				cs = FakeCrossSection( seed, 0, angle )
+				out.write( "%7.2f %12.4E %12.4E %12.4E %12.4E %8.2f %10.4f %10.4f\n" % ( angle, cs, 1.0, cs, cs, 0.0, 0.0, 0.0 ) )
+			out.write("0TOTAL REACTION CROSS SECTION = 1.000E+03\n")
+		else:
+			need = FakeSetting( "ASYMPTOPIA", -1.0 )
+			if need > 0 and asymptopia < need:
+				out.write( " **** INCREASE ASYMPTOPIA TO MORE THAN %.1f\n" % need )
+			out.write(" ANGLE    SIGMA      ANALYZING    IT11    T20    T21    T22    REACTION    RATIO\n")
+			for angle in angle_list:
+				cs = FakeCrossSection( seed, L, angle )
+				out.write( "%7.2f %12.4E %9.4f %9.4f %9.4f %9.4f %9.4f %9.4f %9.4f\n" % ( angle, cs, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0 ) )
+			out.write("0TOTAL:  1.0000E+00\n")
+	out.flush()
+
+
+# Gives n_angles angles from 0 to 180 degrees (the executable always uses 181)
+def FakeDWUCK( deck_text, out, n_angles = 181 ):
+	_Pause(0)
+	_Pad(out)
+	out.write("1 DWUCK4 - FAKE SOLVER\n")
+	if Matches( deck_text, FakeSetting( "FAIL", "" ) ):
+		out.write(" BOUND STATE SEARCH FAILS\n")
+		return
+
+	seed = _Seed(deck_text)
+	out.write("   Theta      Inelsig        Pol         Asy        Ayy     \n")
+	for angle in _Angles( 0.0, 180.0, 180.0/max( n_angles - 1, 1 ) ):
+		out.write( "%8.2f %12.4E %10.4f %10.4f %10.4f\n" % ( angle, FakeCrossSection( seed, 0, angle ), 0.0, 0.0, 0.0 ) )
+	out.write("0Tot-sig   1.0000E+00\n")
+	out.flush()
+
+
+# Run one of the fake codes on stdin and exit as the real one would
+def Main( code ):
+	deck_text = sys.stdin.read()
+	if Matches( deck_text, FakeSetting( "HANG", "" ) ):
+		while True:
+			time.sleep(60)
+
+	if code == "ptolemy":
+		if Matches( deck_text, FakeSetting( "FAIL", "" ) ):
+			sys.stdout.write("0INPUT... FAKE SOLVER FAILURE\n")
+			sys.exit(1)
+		FakePtolemy( deck_text, sys.stdout )
+	else:
+		FakeDWUCK( deck_text, sys.stdout )
+	sys.exit( FakeSetting( "EXIT", 0 ) )
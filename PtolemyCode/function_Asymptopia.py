@@ -0,0 +1,137 @@
+# Asymptopia [FUNCTION]
+# Runs again the input files for which Ptolemy asked for a larger asymptopia, with the asymptopia
+# raised to what it asked for, until it stops asking (or a maximum number of rounds is reached)
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# SuggestedAsymptopia - Returns the asymptopia Ptolemy asked for in a result from RunDecks
+# NextAsymptopia - Returns the asymptopia to try next
+# EscalateAsymptopia - Re-generates and re-runs the input files that need a larger asymptopia
+# PrintAsymptopiaReport - Prints what happened to each input file that needed a larger asymptopia
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# Ptolemy prints "INCREASE ASYMPTOPIA TO MORE THAN xx" when the asymptopia (set with the Asymptopia
+# option, see function_GetOptions.py) is too small. Each round, the input files that got this
+# message are generated again (with GenerateDecks, so that WritePtolemyBlockTransfer writes the
+# new ASYMPTOPIA= line) with the asymptopia raised above the largest value asked for, and are run
+# again in parallel. Only the affected input files are run again, and their results replace the
+# old ones. Elastic scattering input files have no asymptopia, so they are never run again.
+# Input files that the output monitor stopped (see function_MonitorOutput.py) are run again in
+# the same way if Ptolemy had asked for a larger asymptopia before they were stopped, so an
+# "asymptopia=abort" policy stops each run as soon as it asks, and the asymptopia is raised
+# =============================================================================================== #
+import copy
+import math
+import os
+
+from function_WriteInputFiles import *
+from function_RunSolver import *
+from function_CleanOutput import *
+
+# The new asymptopia is this much larger than the one Ptolemy asked for
+asymptopia_margin = 1.1
+
+
+# Asymptopia asked for in a result from RunDecks (-1.0 if none). Uncleaned results are read back
+# from the output file (which is kept for input files stopped by the output monitor)
+def SuggestedAsymptopia( res ):
+	if res[2] not in [ 0, abort_status ]:
+		return -1.0
+	if res[5] is not None:
+		return res[5].get( "asymptopia_value", -1.0 )
+	if not os.path.isfile( res[1] ):
+		return -1.0
+	out_file = open( res[1], "r" )
+	try:
+		clean_dct = CleanPtolemyLines(out_file)
+	except SystemExit:
+		clean_dct = { "asymptopia_value": -1.0 }
+	out_file.close()
+	return clean_dct["asymptopia_value"]
+
+
+# Round up to a whole number of fm above what was asked for, and always go up
+def NextAsymptopia( current, suggested ):
+	new = float( int( math.ceil( suggested*asymptopia_margin ) ) )
+	if new <= current:
+		new = float( int( math.ceil( current*asymptopia_margin ) ) )
+	return new
+
+
+# result_list is from the first run (see RunDecks), info_dct describes where each
+# input file came from (see GenerateSweepDecks), and run_decks is a function that runs a list of
+# decks and returns their results. Returns [ result list, report ], where the results of the input
+# files that were run again have been replaced, and the report is
+#	{ input file name: [ [ asymptopia, asymptopia asked for, exit status ], ... ] }
+# with one entry per run (an asymptopia of -1.0 is the default one, and an asymptopia asked for of
+# -1.0 means Ptolemy was happy)
+def EscalateAsymptopia( result_list, info_dct, opt_dct, run_decks, max_rounds ):
+	result_dct = dict( [ [ res[0], res ] for res in result_list ] )
+	asymptopia_dct = {}
+	report = {}
+
+	if opt_dct["reaction_type"] == "dd":
+		return [ result_list, report ]
+
+	for i in range( 0, max_rounds ):
+		# Work out which input files need a larger asymptopia
+		redo_dct = {}
+		for in_file_path in result_dct:
+			suggested = SuggestedAsymptopia( result_dct[in_file_path] )
+			if suggested <= 0:
+				continue
+			name = os.path.basename(in_file_path)
+			if name not in info_dct:
+				continue
+			current = asymptopia_dct.get( name, opt_dct["Asymptopia"] )
+			report.setdefault( name, [ [ current, suggested, result_dct[in_file_path][2] ] ] )
+			asymptopia_dct[name] = NextAsymptopia( current, suggested )
+			redo_dct[name] = in_file_path
+
+		if len(redo_dct) == 0:
+			break
+		print( "Asymptopia round " + str(i + 1) + ": running " + str( len(redo_dct) ) + " input files again" )
+
+		# Generate the affected input files again with the new asymptopia
+		redo_list = []
+		for name in sorted( redo_dct.keys() ):
+			info = info_dct[name]
+			new_opt_dct = copy.copy(opt_dct)
+			new_opt_dct["Asymptopia"] = asymptopia_dct[name]
+			for deck_name, deck_text in GenerateDecks( [ info["energy"] ], info["potential_in"], info["potential_out"], new_opt_dct ):
+				if deck_name == name:
+					redo_list.append( [ redo_dct[name], deck_text ] )
+
+		# Run them and replace the old results
+		for res in run_decks(redo_list):
+			result_dct[ res[0] ] = res
+			name = os.path.basename( res[0] )
+			report[name].append( [ asymptopia_dct[name], SuggestedAsymptopia(res), res[2] ] )
+
+	return [ [ result_dct[ res[0] ] for res in result_list ], report ]
+
+
+# Print the asymptopia tried for each input file and whether Ptolemy was happy in the end.
+# Returns the number of input files that still need a larger asymptopia (or failed)
+def PrintAsymptopiaReport( report ):
+	if len(report) == 0:
+		return 0
+
+	n_bad = 0
+	print("Asymptopia report:")
+	for name in sorted( report.keys() ):
+		run_list = report[name]
+		tried = " -> ".join( [ ( "default" if r[0] <= 0 else str( r[0] ) ) for r in run_list ] )
+		if run_list[-1][1] > 0:
+			n_bad += 1
+			print( "\t" + name + ": " + tried + " (still asks for more than " + str( run_list[-1][1] ) + ")" )
+		elif run_list[-1][2] != 0:
+			n_bad += 1
+			print( "\t" + name + ": " + tried + " (failed)" )
+		else:
+			print( "\t" + name + ": " + tried + " (ok)" )
+	print( str( len(report) - n_bad ) + " of " + str( len(report) ) + " input files fixed by raising the asymptopia" )
+	return n_bad
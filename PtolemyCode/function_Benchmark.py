@@ -0,0 +1,281 @@
+# Benchmark [FUNCTION]
+# Synthetic workloads for timing each stage of the pipeline on its own, without Ptolemy or DWUCK
+# (their output is made by the fake solvers in fake_solvers/)
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# BenchmarkOptions - Generates the options dictionary for the synthetic reaction
+# BenchmarkEnergies - Generates a list of excitation energies
+# PrepareStage - Writes the files that a stage works on
+# RunStage - Runs a stage on the files written by PrepareStage
+# PeakMemory - Returns the peak resident memory of this process (or its children)
+# TimeStage - Runs a stage and measures its time and memory
+# MeasureStage - Prepares and runs a stage in separate processes and measures it
+# BenchmarkRecord - Generates the record of a measurement written to the results file
+# ReadBenchmarks - Reads a results file
+# PreviousRecord - Finds the last comparable measurement in a results file
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# Every workload is n_decks input files, each with n_angles angles. The stages are
+#	"decks"   -> Generate the input files (ObtainPTLists and WritePtolemyBlock) and write them
+#	"ptclean" -> Clean Ptolemy output files (as ptclean.py) and write the clean files
+#	"dwclean" -> Clean DWUCK output files (as dwclean.py) and write the clean files
+#	"csv"     -> Load the clean files into one array and write the CSV file (as CSVFileCreator.py)
+#	"xmg"     -> Split a CSV file into XMGrace data files (XMGraceMg/XMGFileCreator.py)
+# Each stage is measured in a fresh process that only runs the stage, so that the peak memory is
+# that of the stage alone. The files it works on are written beforehand by another process, and
+# are not part of the measurement
+# =============================================================================================== #
+import glob
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+from datetime import *
+
+try:
+	from StringIO import StringIO
+except ImportError:
+	from io import StringIO
+
+sys.path.append( os.path.join( os.path.dirname( os.path.abspath(__file__) ), "fake_solvers" ) )
+from function_FakeSolver import FakePtolemy, FakeDWUCK
+from function_WriteInputFiles import *
+from function_CleanOutput import *
+from function_CrossSections import *
+
+stage_list = [ "decks", "ptclean", "dwclean", "csv", "xmg" ]
+
+# Potentials and file names used for the synthetic reaction
+bench_potential = [ "P", "BP" ]
+bench_out_name = "28MgHA-Pang_BassaniPicard-"
+xmg_script = os.path.join( os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ), "XMGraceMg", "XMGFileCreator.py" )
+
+# Number of experimental angles in the CSV file given to XMGFileCreator.py
+xmg_ex_angles = 10
+
+
+# 28Mg(3He,a)27Mg at 25 MeV, as it would be read by GetOptions, with n_angles angles from 0 to 180
+def BenchmarkOptions( n_angles ):
+	return {
+		"reaction_name": "28MgHA",
+		"reaction_full_name": "28Mg(3He,a)27Mg",
+		"ELAB": 25.0,
+		"Z": 12,
+		"A": 27,
+		"reaction_type": "ha",
+		"M_Target": 27.9838768,
+		"M_Projectile": 3.0160293,
+		"M_Ejectile": 4.00260325,
+		"M_Product": 26.9843401,
+		"D": 0,
+		"LMAX": 3,
+		"Asymptopia": -2.0,
+		"L": -2,
+		"ANGLEMIN": 0.0,
+		"ANGLEMAX": 180.0,
+		"LABANGLES": -2,
+		"ANGLESTEP": 180.0/max( n_angles - 1, 1 )
+	}
+
+
+# n_decks energies from 0 MeV, across the neutron separation energy, each of which gives one input
+# file for a single pair of potentials. They are spread over 8 MeV unless there are too many to
+# have different names (which have energies to 1 keV)
+def BenchmarkEnergies( n_decks ):
+	step = max( 0.001, round( 8.0/max( n_decks, 1 ), 3 ) )
+	return [ round( step*i, 3 ) for i in range( 0, n_decks ) ]
+
+
+def _OutFileNames( work_dir, n_decks, ext = ".out" ):
+	return [ os.path.join( work_dir, bench_out_name + "%.3f" % e + ext ) for e in BenchmarkEnergies(n_decks) ]
+
+
+def _WriteText( path, text ):
+	out_file = open(path, "w")
+	out_file.write(text)
+	out_file.close()
+
+
+def _FileBytes( file_list ):
+	return sum( [ os.path.getsize(f) for f in file_list ] )
+
+
+# A single input file for the synthetic reaction
+def _SampleDeck( n_angles ):
+	return GenerateDecks( [2.0], bench_potential[0], bench_potential[1], BenchmarkOptions(n_angles) )[0][1]
+
+
+# Ptolemy output for one input file (every output file in a workload is the same, apart from its
+# name)
+def _PtolemyOutput( n_angles ):
+	out = StringIO()
+	FakePtolemy( _SampleDeck(n_angles), out )
+	return out.getvalue()
+
+
+# A CSV file laid out as XMGFileCreator.py expects, with a column for each of n_states states
+def _XMGLines( n_states, n_angles ):
+	column = [ "", "" ]
+	line_list = [
+		",".join( column + [ "M" + str(i) for i in range( 0, n_states ) ] ),
+		",".join( column + [ str( i % 4 ) for i in range( 0, n_states ) ] ),
+		",".join( column + [ "%.3f" % ( 0.001*i ) for i in range( 0, n_states ) ] ),
+		",".join( [ "Angle", "" ] + [ "" ]*n_states )
+	]
+	for k in range( 0, 3 ):
+		for j in range( 0, xmg_ex_angles ):
+			value = [ 10.0 + 5.0*j, 1.0/( j + 1 ), 0.1/( j + 1 ) ][k]
+			line_list.append( ",".join( column + [ str(value) ]*n_states ) )
+	line_list.append( "," * ( n_states + 1 ) )
+	for j in range( 0, n_angles ):
+		angle = 180.0*j/max( n_angles - 1, 1 )
+		line_list.append( ",".join( [ "", str(angle) ] + [ "%.4E" % ( ( i + 1 )/( angle + 1.0 ) ) for i in range( 0, n_states ) ] ) )
+	return line_list
+
+
+# Write everything that stage needs into work_dir
+def PrepareStage( stage, n_decks, n_angles, work_dir ):
+	if stage == "ptclean":
+		text = _PtolemyOutput(n_angles)
+		for path in _OutFileNames( work_dir, n_decks ):
+			_WriteText( path, text )
+
+	elif stage == "dwclean":
+		out = StringIO()
+		FakeDWUCK( "benchmark", out, n_angles )
+		for path in _OutFileNames( work_dir, n_decks ):
+			_WriteText( path, out.getvalue() )
+
+	elif stage == "csv":
+		clean_dct = CleanPtolemyLines( StringIO( _PtolemyOutput(n_angles) ) )
+		for path in _OutFileNames( work_dir, n_decks ):
+			WriteCleanFiles( path, clean_dct, "ptolemy" )
+
+	elif stage == "xmg":
+		_WriteText( os.path.join( work_dir, "28Mg-benchmark.csv" ), "\n".join( _XMGLines( n_decks, n_angles ) ) + "\n" )
+
+	elif stage != "decks":
+		raise ValueError("Not a benchmark stage: " + str(stage))
+
+
+# Run stage on the files in work_dir. Returns { "items": input files dealt with, "bytes": bytes
+# read or written }
+def RunStage( stage, n_decks, n_angles, work_dir ):
+	if stage == "decks":
+		opt_dct = BenchmarkOptions(n_angles)
+		deck_list = GenerateDecks( BenchmarkEnergies(n_decks), bench_potential[0], bench_potential[1], opt_dct )
+		file_list = WriteDecks( work_dir, deck_list )
+		return { "items": len(file_list), "bytes": _FileBytes(file_list) }
+
+	elif stage in [ "ptclean", "dwclean" ]:
+		code = "ptolemy" if stage == "ptclean" else "dwuck"
+		file_list = _OutFileNames( work_dir, n_decks )
+		for path in file_list:
+			CleanFile( path, code )
+		return { "items": len(file_list), "bytes": _FileBytes(file_list) }
+
+	elif stage == "csv":
+		clean_list = sorted( glob.glob( os.path.join( work_dir, "*.out-clean" ) ) )
+		WriteCSV( os.path.join( work_dir, "benchmark.csv" ), LoadCrossSections(clean_list) )
+		return { "items": n_decks, "bytes": _FileBytes( clean_list + [ os.path.join( work_dir, "benchmark.csv" ) ] ) }
+
+	elif stage == "xmg":
+		subprocess.check_call( [ sys.executable, xmg_script, work_dir + "/" ], cwd = work_dir )
+		return { "items": n_decks, "bytes": _FileBytes( glob.glob( os.path.join( work_dir, "*" ) ) ) }
+
+	raise ValueError("Not a benchmark stage: " + str(stage))
+
+
+# Peak resident memory in kB (ru_maxrss is in bytes on macOS)
+def PeakMemory( who = resource.RUSAGE_SELF ):
+	peak = resource.getrusage(who).ru_maxrss
+	if sys.platform == "darwin":
+		peak = peak/1024
+	return int(peak)
+
+
+def _CPUTime( who ):
+	usage = resource.getrusage(who)
+	return usage.ru_utime + usage.ru_stime
+
+
+# Run a stage in this process and return its measurement. Called by MeasureStage through
+# BenchmarkPipeline.py in a fresh process. The XMGrace stage runs as a script of its own, so its
+# time and memory are those of the child process
+def TimeStage( stage, n_decks, n_angles, work_dir ):
+	who = resource.RUSAGE_CHILDREN if stage == "xmg" else resource.RUSAGE_SELF
+	base_rss = PeakMemory(who)
+	cpu = _CPUTime(who)
+	start = datetime.now()
+	size_dct = RunStage( stage, n_decks, n_angles, work_dir )
+	size_dct["seconds"] = ( datetime.now() - start ).total_seconds()
+	size_dct["cpu_seconds"] = _CPUTime(who) - cpu
+	size_dct["peak_rss_kb"] = PeakMemory(who)
+	size_dct["base_rss_kb"] = base_rss
+	return size_dct
+
+
+# Prepare stage in work_dir in one process and time it in another, by running script (which
+# should call PrepareStage or TimeStage and print the result as JSON)
+def MeasureStage( script, stage, n_decks, n_angles, work_dir ):
+	arg_list = [ stage, str(n_decks), str(n_angles), work_dir ]
+	subprocess.check_call( [ sys.executable, script, "--prepare" ] + arg_list )
+	out = subprocess.check_output( [ sys.executable, script, "--time" ] + arg_list )
+	return json.loads( out.decode("utf-8").strip().splitlines()[-1] )
+
+
+def _Commit():
+	try:
+		out = subprocess.check_output( [ "git", "rev-parse", "--short", "HEAD" ], cwd = os.path.dirname( os.path.abspath(__file__) ), stderr = open(os.devnull, "w") )
+		return out.decode("utf-8").strip()
+	except ( OSError, subprocess.CalledProcessError ):
+		return ""
+
+
+# One line of the results file
+def BenchmarkRecord( stage, n_decks, n_angles, size_dct ):
+	record = {
+		"time": datetime.now().strftime("%F %X"),
+		"host": socket.gethostname(),
+		"python": sys.version.split()[0],
+		"commit": _Commit(),
+		"stage": stage,
+		"n_decks": n_decks,
+		"n_angles": n_angles
+	}
+	record.update(size_dct)
+	seconds = max( size_dct["seconds"], 1e-6 )
+	record["decks_per_second"] = round( size_dct["items"]/seconds, 3 )
+	record["mb_per_second"] = round( size_dct["bytes"]/seconds/1e6, 3 )
+	record["seconds"] = round( size_dct["seconds"], 4 )
+	record["cpu_seconds"] = round( size_dct["cpu_seconds"], 4 )
+	return record
+
+
+def ReadBenchmarks( result_path ):
+	if not os.path.isfile(result_path):
+		return []
+	record_list = []
+	result_file = open(result_path, "r")
+	for line in result_file:
+		try:
+			record_list.append( json.loads(line) )
+		except ValueError:
+			continue
+	result_file.close()
+	return record_list
+
+
+# The last record for the same stage and workload on the same host and Python, or None
+def PreviousRecord( record_list, record ):
+	key_list = [ "host", "python", "stage", "n_decks", "n_angles" ]
+	match_list = [ r for r in record_list if len( [ k for k in key_list if r.get(k) != record[k] ] ) == 0 ]
+	if len(match_list) == 0:
+		return None
+	return match_list[-1]
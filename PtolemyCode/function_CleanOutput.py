@@ -0,0 +1,340 @@
+# CleanOutput [FUNCTION]
+# Extracts the angles and cross sections from Ptolemy and DWUCK output. The output is read one
+# line at a time, so it can be cleaned straight from a file or from the solver as it runs
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# isfloat - Tests if a string is a float
+# JPiNumber - Converts a jpi string into a number used for ordering the states
+# GetSpinParity - Gets the spin parity tag (e.g. 02-3_2p) from a REACTION string
+# CleanFileName - Generates the clean file name from the output file name and spin parity tag
+# AsymptopiaValue - Gets the asymptopia asked for in a Ptolemy message
+# CleanPtolemyLines - Cleans Ptolemy output
+# CleanDWUCKLines - Cleans DWUCK output
+# CleanLines - Cleans output from either code
+# CleanFileNames - Lists the clean files that WriteCleanFiles writes for an output file
+# WriteCleanFiles - Writes the clean files for an output file
+# CleanFile - Cleans an output file on disk and writes its clean files
+# CleanLogLines - Generates log file lines for any problems found while cleaning
+# ReportCleanFlags - Prints (and logs) any problems found while cleaning
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# The cleaners return a dictionary
+#	"blocks"     -> [ [ spin parity tag, [ [angle, cross section], ... ], complete, nodes, L ], ... ]
+#	"asymptopia" -> 1 if Ptolemy asked for a larger asymptopia
+#	"asymptopia_value" -> the largest asymptopia Ptolemy asked for (-1.0 if none)
+#	"warning"    -> 1 if Ptolemy printed a warning
+#	"fail"       -> 1 if DWUCK failed
+# where "complete" is 1 if the end of the table was reached, and nodes and L are those of the
+# bound state as echoed by Ptolemy (-1 if they could not be found)
+# =============================================================================================== #
+from datetime import *
+
+# Define a function to test if something is a float or not
+# Return 1 if successful, and 0 if it fails
+def isfloat(str):
+	ret = 1
+	try:
+		float(str)
+	except ValueError:
+		ret = 0
+	return ret
+
+def JPiNumber(jpi):
+	# jpi of form "x/2+" or "x/2-" where x is an integer
+	if  jpi[-1] == "+":
+		pi = 1
+	elif jpi[-1] == "-":
+		pi = -1
+	else:
+		print( jpi + " is not a valid JPI string" )
+		exit(1)
+
+	j = int( jpi.split("/")[0] ) # This gives 1 for 1/2+
+
+	# Carry out complicated operation to assign ordering
+	fac = int( -0.5*( ( ( j % 4 ) + pi ) % 4 ) )
+	ret = "%02d" % ( j + fac )
+	#print( "\t".join([ jpi, str(j%4 + pi), str(pi), str(fac),ret] ) )
+	return ret
+
+
+def GetSpinParity(s):
+	# String resembles something like "028Mg(d,p)29Mg(3/2+ 0.0) "
+	# Split at bracket
+	t = s.split("(")
+
+	for i in range( 0, len(t) ):
+		if "/2+" in t[i]:
+			return str( JPiNumber(t[i]) ) + "-" + t[i].replace("+","p").replace("/","")
+		if "/2-" in t[i]:
+			return str( JPiNumber(t[i]) ) + "-" + t[i].replace("-","n").replace("/","")
+	print("Could not find spin parity in " + s + ".")
+	exit(1)
+
+
+def CleanFileName(s, sp):
+	# Split at .
+	t = s.split(".")
+
+	# Should be [ PRE + Estart, Eend, suffix ]
+	u = ""
+
+	for i in range(0,len(t)):
+		u += t[i]
+
+		if i == len(t) - 2:
+			u += "-" + sp + "."
+		elif i < len(t) - 2:
+			u += "."
+
+	u += "-clean"
+	return str(u)
+
+
+def _IntOrDefault( s, default ):
+	try:
+		return int(s)
+	except ValueError:
+		return default
+
+
+# Get the value from "INCREASE ASYMPTOPIA TO MORE THAN xx" (-1.0 if there isn't one)
+def AsymptopiaValue( line ):
+	words = line.split()
+	for i in range( 0, len(words) - 1 ):
+		if words[i] == "THAN":
+			value = words[i+1].rstrip(".,;:")
+			if isfloat(value):
+				return float(value)
+	return -1.0
+
+
+# Clean Ptolemy output, given as anything that produces lines (an open file, a pipe, a list...)
+def CleanPtolemyLines(line_iter):
+	it = iter(line_iter)
+	clean_dct = { "blocks": [], "asymptopia": 0, "asymptopia_value": -1.0, "warning": 0, "fail": 0 }
+	elastic_flag = 0
+	block = None
+
+	# Loop over the lines in the file
+	while True:
+		# Store the line
+		line = next( it, "" )
+
+		# If the line is empty - end of file, so break the while loop
+		if (line==''):
+			break
+
+		# Split the line at the spaces into different components
+		words = line.split()
+
+		# Get the spin-parity and start a new clean file
+		if ( len(words) > 1 and words[0] == "0INPUT..." and words[1] == "REACTION:" ):
+			block = [ GetSpinParity( words[2] ), [], 0, -1, -1 ]
+			clean_dct["blocks"].append(block)
+
+		# Get the nodes and L of the bound state from the echo of the input (TARGET line)
+		elif block is not None and block[3] == -1:
+			for w in words:
+				if w.startswith("nodes="):
+					block[3] = _IntOrDefault( w[6:], -1 )
+				elif w.startswith("l=") and block[4] == -1:
+					block[4] = _IntOrDefault( w[2:], -1 )
+
+		# STORE THE DATA
+		# Inelastic
+		if ( len(words) > 1 and words[0] == "ANGLE" and elastic_flag == 0 ):	#look for lines starting with 'ANGLE'
+
+			# Check there is a clean file to write to
+			if block is None:
+				print("ERROR. FILE NOT OPEN!")
+				exit(1)
+
+			# Entered a region where there are useful numbers - deal with them in a new loop
+			while True:
+				# Get the next line and split it
+				temp_line = next( it, "" )
+				if temp_line == "":
+					break
+				temp = temp_line.split()
+
+				# Test if it is at the end of the table
+				if ( len(temp) > 1 and temp[0] == "0TOTAL:" ):
+					block[2] = 1
+					break
+
+				# Test if the line has length > 8 and the first two fields are numbers
+				elif ( len(temp) > 8 and isfloat( temp[0] ) and isfloat( temp[1] ) ):
+					block[1].append( [ temp[0], temp[1] ] )
+
+		# Elastic
+		elif ( len(words) > 1 and words[0] == "0" and words[1] == "ANGLE" and elastic_flag == 1 ):
+			block = [ "00-02p", [], 0, -1, -1 ]
+			clean_dct["blocks"].append(block)
+
+			# Entered a region where there are useful numbers - deal with them in a new loop
+			while True:
+				# Get the next line and split it
+				temp_line = next( it, "" )
+				if temp_line == "":
+					break
+				temp = temp_line.split()
+
+				# Test if it is at the end of the table
+				if ( len(temp) > 1 and temp[0] == "0TOTAL" ):
+					block[2] = 1
+					break
+
+				# Test if the line has length > 7 and the first two fields are numbers
+				elif ( len(temp) > 7 and isfloat( temp[0] ) and isfloat( temp[3] ) ):
+					block[1].append( [ temp[0], temp[3] ] )
+
+		# TEST FLAGS
+		# Now look to see if there are any asymptopia issues
+		if "INCREASE ASYMPTOPIA TO MORE THAN" in line:
+			clean_dct["asymptopia"] = 1
+			clean_dct["asymptopia_value"] = max( clean_dct["asymptopia_value"], AsymptopiaValue(line) )
+
+		# Now look to see if there are any warnings
+		if "WARNING" in line:
+			clean_dct["warning"] = 1
+
+		# Check to see if it is an elastic scattering state
+		if line.rstrip("\r\n") == "0INPUT... ELASTIC SCATTERING":
+			elastic_flag = 1
+
+	return clean_dct
+
+
+# Clean DWUCK output, given as anything that produces lines
+def CleanDWUCKLines(line_iter):
+	clean_dct = { "blocks": [], "asymptopia": 0, "asymptopia_value": -1.0, "warning": 0, "fail": 0 }
+	block = [ "", [], 0, -1, -1 ]
+	flag_record = 0
+
+	# Scrape the data out
+	for line in line_iter:
+		if clean_dct["fail"] == 0:
+			# Check to see whether I need to turn off the recording flag
+			if "0Tot-sig" in line and flag_record == 1:
+				flag_record = 0
+				block[2] = 1
+
+			# Record the data
+			if flag_record == 1:
+				# Only want the first two values from the line
+				temp_line = line.split()
+				block[1].append( [ str( float(temp_line[0]) ), str( float(temp_line[1]) ) ] )
+
+			# Check to see whether to record the following line or not
+			if "Inelsig" in line and flag_record == 0:
+				flag_record = 1
+
+			# Check to see if there are any fails
+			if "FAILS" in line:
+				clean_dct["fail"] = 1
+
+	if clean_dct["fail"] == 0:
+		clean_dct["blocks"].append(block)
+	return clean_dct
+
+
+def CleanLines( line_iter, code ):
+	if code == "ptolemy":
+		return CleanPtolemyLines(line_iter)
+	elif code == "dwuck":
+		return CleanDWUCKLines(line_iter)
+	else:
+		raise ValueError("Not an allowed code: " + str(code))
+
+
+def CleanFileNames( out_file_path, clean_dct, code ):
+	if code == "ptolemy":
+		return [ CleanFileName( out_file_path, block[0] ) for block in clean_dct["blocks"] ]
+	return [ out_file_path + "-clean" for block in clean_dct["blocks"] ]
+
+
+# Write the clean files for the output file out_file_path (which need not exist) and return their
+# names. Ptolemy gives one clean file per state, DWUCK gives one per output file
+def WriteCleanFiles( out_file_path, clean_dct, code ):
+	file_list = []
+	for block in clean_dct["blocks"]:
+		sp, row_list, complete = block[0:3]
+		if code == "ptolemy":
+			file_name = CleanFileName( out_file_path, sp )
+			out_file = open(file_name, "w")
+			for row in row_list:
+				out_file.write(row[0] + ' ' + row[1] + '\n')
+			if complete == 1:
+				out_file.write('\n')
+		else:
+			file_name = out_file_path + "-clean"
+			out_file = open(file_name, "w")
+			for row in row_list:
+				out_file.write(row[0] + "\t" + row[1] + "\n")
+		out_file.close()
+		file_list.append(file_name)
+
+	return file_list
+
+
+# Clean an output file on disk and write its clean files. Returns the cleaned output plus the list
+# of clean files in "files". The blocks are removed unless keep_blocks is 1 (so that the result is
+# cheap to send back from a worker process). If the output cannot be cleaned, "error" is set to 1
+# and nothing is written
+def CleanFile( out_file_path, code, keep_blocks = 0 ):
+	in_file = open(out_file_path, "r")
+	try:
+		clean_dct = CleanLines( in_file, code )
+	except SystemExit:
+		# The cleaner gave up (e.g. no spin parity in a REACTION line)
+		return { "blocks": [], "asymptopia": 0, "asymptopia_value": -1.0, "warning": 0, "fail": 0, "error": 1, "files": [] }
+	finally:
+		in_file.close()
+
+	clean_dct["error"] = 0
+	clean_dct["files"] = WriteCleanFiles( out_file_path, clean_dct, code )
+	if keep_blocks == 0:
+		clean_dct["blocks"] = []
+	return clean_dct
+
+
+# Lines for the log file, one per problem found. Only asymptopia problems are logged unless
+# log_all is 1
+def CleanLogLines( out_file_path, clean_dct, log_all = 0 ):
+	fileName = out_file_path.split("/")
+	flag_list = [ [ "asymptopia", "Asymptopia" ] ]
+	if log_all == 1:
+		flag_list += [ [ "warning", "Warning" ], [ "fail", "Fail" ], [ "error", "Error" ] ]
+
+	line_list = []
+	for flag, label in flag_list:
+		if clean_dct.get( flag, 0 ) == 1:
+			line_list.append( datetime.now().strftime("%F %X") + "....." + label.ljust( 24, "." ) + fileName[len(fileName)-1] + "\n" )
+	return line_list
+
+
+# Print warnings (and record asymptopia problems in the log file, if one is open)
+def ReportCleanFlags( out_file_path, clean_dct, logfile = None ):
+	fileName = out_file_path.split("/")
+
+	# Print warnings if detected
+	if clean_dct["asymptopia"] == 1:
+		print("\033[1;36mAsymptopia probably incorrect in " + fileName[len(fileName)-1] + "\033[0m")
+
+		# Record in log file
+		if logfile is not None:
+			logfile.writelines( CleanLogLines( out_file_path, clean_dct ) )
+
+	if clean_dct["warning"] == 1:
+		print("\033[1;33mWarning detected in " + fileName[len(fileName)-1] + "\033[0m")
+
+	if clean_dct["fail"] == 1:
+		print(out_file_path + " -> FAIL!")
+
+	if clean_dct.get( "error", 0 ) == 1:
+		print("\033[1;31mCould not clean " + fileName[len(fileName)-1] + "\033[0m")
@@ -0,0 +1,214 @@
+# CrossSectionStore [FUNCTION]
+# Binary store of cleaned cross sections: one .npy array with a row of cross sections per state
+# (which can be memory mapped), and a .json index describing each row
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# StorePaths - Returns the [.npy, .json] paths for a store
+# ParseOutFileName - Splits an output file name into [reaction, model, energy]
+# CleanRecords - Converts the cleaned output of one output file into store records
+# ResultRecords - Converts the cleaned output in a list of results from RunDecks into store records
+# WriteStore - Writes a list of records to a store
+# LoadStore - Loads (or memory maps) a store
+# StoreRecords - Reads records back out of a store
+# StoreCrossSections - Arranges the rows of a store as in LoadCrossSections (for the CSV file)
+# StoreMatches - Tests whether a store holds exactly the cross sections of a list of clean files
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# A store called [DIR]/PT_Raw is made of
+#	PT_Raw.npy  -> float64 array of cross sections, indexed by [record, angle]
+#	PT_Raw.json -> { "angle": [angles], "records": [ { "reaction", "model", "energy", "jnumber",
+#	               "jpi", "L", "node", "file", "n_angle" }, ... ] }
+# where model is the [in]_[out] model pair, file is the name of the matching clean file and
+# n_angle is the number of angles in that record. All records share the angles of the first one;
+# shorter records are padded with NaN. Records are sorted by file, which is the order the clean
+# files are listed in by ptolemyBash.sh
+# =============================================================================================== #
+import json
+import os
+
+import numpy as np
+
+from function_CleanOutput import *
+from function_CrossSections import *
+
+# Default name of the store in OUTPUT_FILE_DIR
+store_name = "PT_Raw"
+
+
+def StorePaths( store_path ):
+	return [ store_path + ".npy", store_path + ".json" ]
+
+
+# [DIR]/[reaction]-[model]-[energy].out -> [reaction, model, energy]
+def ParseOutFileName( out_file_path ):
+	name = os.path.basename(out_file_path)
+	if name.endswith(".out"):
+		name = name[0:len(name) - 4]
+	t = name.split("-")
+	if len(t) < 3:
+		raise ValueError("Not an output file name: " + out_file_path)
+	return [ "-".join( t[0:len(t) - 2] ), t[-2], t[-1] ]
+
+
+# Returns a list of records [ index entry, angles, cross sections ] for the cleaned output of
+# out_file_path (see function_CleanOutput.py). DWUCK gives one record with no jnumber or jpi
+def CleanRecords( out_file_path, clean_dct, code ):
+	reaction, model, energy = ParseOutFileName(out_file_path)
+
+	record_list = []
+	for block in clean_dct["blocks"]:
+		sp, row_list, complete, node, L = block
+
+		if code == "ptolemy":
+			jnumber, jpi = sp.split("-")
+			file_name = os.path.basename( CleanFileName( out_file_path, sp ) )
+			if L == -1:
+				L = JPi2L(jpi)
+		else:
+			jnumber, jpi = [ "", "" ]
+			file_name = os.path.basename(out_file_path) + "-clean"
+
+		entry = {
+			"reaction": reaction,
+			"model": model,
+			"energy": float(energy),
+			"jnumber": jnumber,
+			"jpi": jpi,
+			"L": L,
+			"node": node,
+			"file": file_name
+		}
+		record_list.append( [ entry, [ float( r[0] ) for r in row_list ], [ float( r[1] ) for r in row_list ] ] )
+
+	return record_list
+
+
+# Records for every successful result from RunDecks (see function_RunSolver.py) that was cleaned.
+# Output files whose names cannot be parsed are skipped
+def ResultRecords( result_list, code ):
+	record_list = []
+	for res in result_list:
+		if res[2] != 0 or res[5] is None:
+			continue
+		try:
+			record_list += CleanRecords( res[1], res[5], code )
+		except ValueError:
+			print("Could not store " + os.path.basename( res[1] ) )
+	return record_list
+
+
+# Write the records to [store_path].npy and [store_path].json
+def WriteStore( store_path, record_list ):
+	record_list = sorted( record_list, key = lambda r: r[0]["file"] )
+	if len(record_list) > 0:
+		angle = record_list[0][1]
+	else:
+		angle = []
+
+	cs = np.empty( [ len(record_list), len(angle) ] )
+	cs.fill( np.nan )
+	entry_list = []
+	for i in range( 0, len(record_list) ):
+		entry, a, c = record_list[i]
+		n = min( len(c), len(angle) )
+		cs[ i, 0:n ] = c[0:n]
+		entry["n_angle"] = n
+		entry_list.append(entry)
+
+	npy_path, json_path = StorePaths(store_path)
+	np.save( npy_path, cs )
+	json_file = open(json_path, "w")
+	json.dump( { "angle": angle, "records": entry_list }, json_file, indent = 1 )
+	json_file.close()
+	return [ npy_path, json_path ]
+
+
+# Returns [index, cross sections]. With mmap = 1 the cross sections are only read from disk when
+# they are used
+def LoadStore( store_path, mmap = 1 ):
+	npy_path, json_path = StorePaths(store_path)
+	json_file = open(json_path, "r")
+	index = json.load(json_file)
+	json_file.close()
+
+	if mmap == 1:
+		cs = np.load( npy_path, mmap_mode = "r" )
+	else:
+		cs = np.load(npy_path)
+	return [ index, cs ]
+
+
+# Records (as from CleanRecords) for every row of a store whose clean file is in file_list (or
+# every row if file_list is None). Returns an empty list if there is no store
+def StoreRecords( store_path, file_list = None ):
+	if not os.path.isfile( StorePaths(store_path)[1] ):
+		return []
+	index, cs = LoadStore( store_path, 1 )
+	if file_list is not None:
+		file_set = set(file_list)
+
+	record_list = []
+	for i in range( 0, len( index["records"] ) ):
+		entry = dict( index["records"][i] )
+		if file_list is not None and entry["file"] not in file_set:
+			continue
+		n = entry.pop("n_angle")
+		record_list.append( [ entry, index["angle"][0:n], cs[ i, 0:n ].tolist() ] )
+	return record_list
+
+
+# Arrange the records of a store into the dictionary returned by LoadCrossSections, so that it can
+# be written with WriteCSV. Only Ptolemy records (those with a jnumber) are used
+def StoreCrossSections( index, cs ):
+	column_list = []
+	column_dct = {}
+	jpi_dct = {}
+	for entry in index["records"]:
+		if entry["jnumber"] == "":
+			continue
+		key = ( entry["reaction"], entry["model"], entry["energy"] )
+		if key not in column_dct:
+			column_dct[key] = len(column_list)
+			column_list.append(key)
+		if int( entry["jnumber"] ) not in jpi_dct:
+			jpi_dct[ int( entry["jnumber"] ) ] = [ entry["jnumber"], entry["jpi"] ]
+
+	state_list = [ jpi_dct[j] for j in sorted( jpi_dct.keys() ) ]
+	state_dct = dict( [ [ int( state_list[i][0] ), i ] for i in range( 0, len(state_list) ) ] )
+
+	xs = np.zeros( [ len(state_list), len(column_list), len( index["angle"] ) ] )
+	for i in range( 0, len( index["records"] ) ):
+		entry = index["records"][i]
+		if entry["jnumber"] == "":
+			continue
+		n = entry["n_angle"]
+		xs[ state_dct[ int( entry["jnumber"] ) ], column_dct[ ( entry["reaction"], entry["model"], entry["energy"] ) ], 0:n ] = cs[ i, 0:n ]
+
+	return {
+		"reaction": [ c[0] for c in column_list ],
+		"model":    [ c[1] for c in column_list ],
+		"energy":   [ c[2] for c in column_list ],
+		"jnumber":  [ s[0] for s in state_list ],
+		"jpi":      [ s[1] for s in state_list ],
+		"angle":    np.array( index["angle"] ),
+		"cs":       xs
+	}
+
+
+# True if the store exists and has one record for each clean file in clean_file_list and no
+# others. A store only holds what was cleaned by the run that wrote it, so it can be missing clean
+# files left from an earlier run (or have records for clean files that have since been deleted)
+def StoreMatches( store_path, clean_file_list ):
+	npy_path, json_path = StorePaths(store_path)
+	if not os.path.isfile(npy_path) or not os.path.isfile(json_path):
+		return False
+	json_file = open(json_path, "r")
+	index = json.load(json_file)
+	json_file.close()
+
+	file_list = sorted( [ entry["file"] for entry in index["records"] ] )
+	return file_list == sorted( [ os.path.basename(path) for path in clean_file_list ] )
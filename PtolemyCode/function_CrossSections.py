@@ -0,0 +1,177 @@
+# CrossSections [FUNCTION]
+# Loads the .out-clean files into one array of cross sections and writes it out as a CSV file
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# JPiString - Converts a jpi tag (e.g. 32p) into a jpi string (e.g. 3/2+)
+# JPi2L - Calculates the L value from a jpi tag
+# ParseCleanFileName - Splits a clean file name into [reaction, model, energy, jnumber, jpi]
+# ReadCleanFile - Reads the angles and cross sections from a clean file
+# LoadCrossSections - Loads a list of clean files into one array
+# CSVLines - Generates the lines of the CSV file for the array
+# WriteCSV - Writes the array to a CSV file
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# File name is of the form [reaction]-[model]-[energy]-[jnumber]-[jpi].out-clean
+# LoadCrossSections returns a dictionary
+#	"reaction", "model", "energy" -> one entry per column (model/energy), in order of appearance
+#	"jnumber", "jpi"              -> one entry per state, in order of jnumber
+#	"angle"                       -> angles from the first file
+#	"cs"                          -> cross sections, indexed by [state, column, angle]
+# Each file goes in the place given by its name, so the order of the file list does not matter
+# (except for the order of the columns). Missing files are left as 0.0
+# =============================================================================================== #
+import numpy as np
+import os
+
+
+# Convert jpi string to something better
+# Of the form [x]2[pn], where x is an odd number
+def JPiString( string ):
+	a = string.replace("2","/2")
+	b = a.replace("p","+")
+	c = b.replace("n","-")
+	return c
+
+# Of the form [x]2[pn], where x is an odd number
+def JPi2L( jpi ):
+	# split the string
+	j,pi = jpi.split("2")
+
+	# get the parity and calculate whether even or odd
+	if pi == "p":
+		mod = 0
+	elif pi == "n":
+		mod = 1
+	else:
+		print("ERROR. ASSUMING EVEN.")
+		mod = 0
+
+	# calculate the L value
+	if int( 0.5*( int(j) + 1 ) ) % 2 == mod:
+		return int( 0.5*( int(j) + 1 ) )
+	elif int( 0.5*( int(j) - 1 ) ) % 2 == mod:
+		return int( 0.5*( int(j) - 1 ) )
+	else:
+		print("ERROR. j = " + j + " not working")
+		return -1
+
+
+# [DIR]/[reaction]-[model]-[energy]-[jnumber]-[jpi].out-clean -> [reaction, model, energy, jnumber, jpi]
+def ParseCleanFileName( path ):
+	split_file_name = os.path.basename(path).split("-")
+	if len(split_file_name) < 5:
+		raise ValueError("Not a clean file name: " + path)
+	split_file_name[4] = split_file_name[4].split(".")[0]
+	return split_file_name[0:5]
+
+
+# Returns [angles, cross sections]. Angles are taken from lines starting with a number, and cross
+# sections from every line with two or more fields
+def ReadCleanFile( path ):
+	angle = []
+	cs = []
+	in_file = open(path, "r")
+	for line in in_file:
+		words = line.split()
+		if len(words) > 0:
+			try:
+				angle.append( float( words[0] ) )
+			except ValueError:
+				pass
+		if len(words) > 1:
+			cs.append( float( words[1] ) )
+	in_file.close()
+	return [ angle, cs ]
+
+
+def LoadCrossSections( clean_file_list ):
+	# Work out the shape from the file names
+	name_list = [ ParseCleanFileName(f) for f in clean_file_list ]
+
+	column_list = []
+	column_dct = {}
+	jpi_dct = {}
+	for reaction, model, energy, jnumber, jpi in name_list:
+		key = ( reaction, model, energy )
+		if key not in column_dct:
+			column_dct[key] = len(column_list)
+			column_list.append(key)
+		if int(jnumber) not in jpi_dct:
+			jpi_dct[ int(jnumber) ] = [ jnumber, jpi ]
+
+	state_list = [ jpi_dct[j] for j in sorted( jpi_dct.keys() ) ]
+	state_dct = dict( [ [ int( state_list[i][0] ), i ] for i in range( 0, len(state_list) ) ] )
+
+	# Grab the angles from the first file
+	if len(clean_file_list) > 0:
+		angle = np.array( ReadCleanFile( clean_file_list[0] )[0] )
+	else:
+		angle = np.zeros(0)
+
+	# Grab the theoretical cross-sections
+	cs = np.zeros( [ len(state_list), len(column_list), len(angle) ] )
+	for i in range( 0, len(clean_file_list) ):
+		reaction, model, energy, jnumber, jpi = name_list[i]
+		row = ReadCleanFile( clean_file_list[i] )[1][ 0:len(angle) ]
+		cs[ state_dct[ int(jnumber) ], column_dct[ ( reaction, model, energy ) ], 0:len(row) ] = row
+
+	return {
+		"reaction": [ c[0] for c in column_list ],
+		"model":    [ c[1] for c in column_list ],
+		"energy":   [ float( c[2] ) for c in column_list ],
+		"jnumber":  [ s[0] for s in state_list ],
+		"jpi":      [ s[1] for s in state_list ],
+		"angle":    angle,
+		"cs":       cs
+	}
+
+
+# Lines of the CSV file (without "\n"). The first two rows are the model names and energies, then
+# for each state there is a block of [jpi, L, angle, cross sections...] rows followed by a blank row
+def CSVLines( xs_dct ):
+	model_name = xs_dct["model"]
+	num_col = len(model_name)
+	angle = xs_dct["angle"].tolist()
+
+	# Append the first two rows (model name and energies)
+	head_model = "Jpi,,,"
+	head_energy = ",,,"
+	for i in range( 0, num_col ):
+		if i == 0 or model_name[i-1] != model_name[i]:
+			head_model += model_name[i]
+		head_model += ","
+		head_energy += str( xs_dct["energy"][i] ) + ","
+	line_list = [ head_model, head_energy ]
+
+	# Now insert the cross sections - one block per state
+	blank = "," * ( num_col + 3 )
+	for i in range( 0, len( xs_dct["jpi"] ) ):
+		jpi = xs_dct["jpi"][i]
+		state_head = JPiString(jpi) + "," + str( JPi2L(jpi) ) + ","
+
+		# Rows are angles, so transpose to [angle, column]
+		cs_text = [ ",".join( [ str(x) for x in row ] ) for row in xs_dct["cs"][i].T.tolist() ]
+		for j in range( 0, len(angle) ):
+			if j == 0:
+				line = state_head
+			else:
+				line = ",,"
+			line_list.append( line + str( angle[j] ) + "," + cs_text[j] + ( "," if num_col > 0 else "" ) )
+
+		# Blank line underneath (the state goes here if there are no angles)
+		if len(angle) == 0:
+			line_list.append( state_head + blank[2:] )
+		else:
+			line_list.append(blank)
+
+	return line_list
+
+
+def WriteCSV( csv_file_path, xs_dct ):
+	out_file = open(csv_file_path, "w")
+	out_file.write( "\n".join( CSVLines(xs_dct) ) + "\n" )
+	out_file.close()
@@ -0,0 +1,49 @@
+# DeckDuplicates [FUNCTION]
+# Finds input files that describe exactly the same calculation. This happens for every unbound
+# state, since the excitation energy is clamped to just below the separation energy in both
+# PotentialSelect and WritePtolemyBlockTransfer, so only the file name differs
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# CanonicalDeck - Reduces the text of an input file to a canonical form
+# DeckHash - Returns a hash of the canonical form of an input file
+# GroupDuplicateDecks - Groups a list of decks by their canonical form
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import hashlib
+
+
+# Remove everything that does not change the calculation: leading/trailing spaces, repeated
+# spaces and blank lines
+def CanonicalDeck(deck_text):
+	line_list = []
+	for line in deck_text.splitlines():
+		words = line.split()
+		if len(words) > 0:
+			line_list.append( " ".join(words) )
+	return "\n".join(line_list) + "\n"
+
+
+def DeckHash(deck_text):
+	return hashlib.sha1( CanonicalDeck(deck_text).encode("utf-8") ).hexdigest()
+
+
+# Return a list of groups of decks ([ input file path, input file text ]), where all of the decks
+# in a group are the same calculation. The first deck of each group is the one to run. Groups are
+# in order of their first deck in deck_list
+def GroupDuplicateDecks(deck_list):
+	group_dct = {}
+	group_list = []
+	for deck in deck_list:
+		h = DeckHash( deck[1] )
+
+		if h in group_dct:
+			group_dct[h].append(deck)
+		else:
+			group_dct[h] = [deck]
+			group_list.append( group_dct[h] )
+
+	return group_list
@@ -0,0 +1,223 @@
+# DeckTimings [FUNCTION]
+# Keeps a history of how long the solvers took on each input file, and uses it to predict how long
+# new input files will take, so that the longest ones can be started first and the time left in a
+# run can be estimated
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# TimingPath - Returns the location of the timing history
+# DeckFeatures - Describes an input file by the things that decide how long it takes to run
+# TimingEntry - Generates a timing history entry for an input file
+# ReadTimings - Reads the timing history
+# AppendTimings - Adds entries to the timing history, trimming it if it has grown too long
+# TimingIndex - Indexes the timing history by the features used in the predictions
+# PredictDuration - Predicts how long an input file will take from the indexed timing history
+# PredictDurations - Predicts how long each of a list of input files will take
+# EstimateRemaining - Estimates how long is left in a run
+# FormatDuration - Formats a number of seconds as e.g. 1h02m03s
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# The history is [cache directory]/timings.log (or PTOLEMY_TIMINGS if set), with one JSON entry per
+# line for every input file that a solver ran successfully
+#	{ "codes", "reaction", "model", "energy", "L", "node", "seconds" }
+# where codes are the codes that were run (e.g. "ptolemy"), reaction, model and energy come from
+# the file name (e.g. 28MgDP, AnCai_KoningDelaroche and 2.270), and L and node are lists of the L
+# and nodes of each bound state in the input file (Ptolemy only). Input files that were packed
+# together (see function_PackDecks.py) share the time of the pack equally.
+# A prediction is the average time of the (up to n_nearest) entries with the closest excitation
+# energy among those with the same codes, reaction, model, L and node. If there are none, the
+# model is ignored, then L and node as well, and then the reaction. Only the most recent
+# max_timing_entries entries are used, and the history is cut back to them when it grows more than
+# a tenth longer
+# =============================================================================================== #
+import bisect
+import json
+import os
+
+from function_ResultCache import *
+from function_CrossSectionStore import *
+
+timing_name = "timings.log"
+
+# Number of entries averaged over for each prediction, and the number of entries kept when reading
+n_nearest = 3
+max_timing_entries = 20000
+
+# Features that must match, from the closest match to the loosest
+match_list = [
+	[ "codes", "reaction", "model", "L", "node" ],
+	[ "codes", "reaction", "L", "node" ],
+	[ "codes", "reaction" ],
+	[ "codes" ]
+]
+
+# Number of lines in each timing history this process has read or written -> { path: lines }
+_timing_count_dct = {}
+
+
+def TimingPath():
+	return os.path.expanduser( os.environ.get( "PTOLEMY_TIMINGS", os.path.join( CacheDir(), timing_name ) ) )
+
+
+# deck is [ input file path, input file text ]
+def DeckFeatures( deck, code_list ):
+	name = os.path.basename( deck[0] )
+	if name.endswith(".in"):
+		name = name[0:len(name) - 3]
+	try:
+		reaction, model, energy = ParseOutFileName(name)
+		energy = float(energy)
+	except ValueError:
+		reaction, model, energy = [ name, "", 0.0 ]
+
+	# Bound state of each block, e.g. "nodes=1 l=0 jp=1/2 ..."
+	L = []
+	node = []
+	for line in deck[1].splitlines():
+		word_dct = dict( [ w.split("=", 1) for w in line.split() if "=" in w ] )
+		if "nodes" in word_dct and "l" in word_dct:
+			try:
+				node.append( int( word_dct["nodes"] ) )
+				L.append( int( word_dct["l"] ) )
+			except ValueError:
+				pass
+
+	return { "codes": "+".join(code_list), "reaction": reaction, "model": model, "energy": energy, "L": L, "node": node }
+
+
+def TimingEntry( features, seconds ):
+	entry = dict(features)
+	entry["seconds"] = round( seconds, 3 )
+	return entry
+
+
+# The most recent max_timing_entries entries. Lines that cannot be read are skipped
+def ReadTimings( timing_path ):
+	if not os.path.isfile(timing_path):
+		return []
+	entry_list = []
+	timing_file = open(timing_path, "r")
+	for line in timing_file:
+		try:
+			entry_list.append( json.loads(line) )
+		except ValueError:
+			continue
+	timing_file.close()
+	_timing_count_dct[timing_path] = len(entry_list)
+	return entry_list[ max( 0, len(entry_list) - max_timing_entries ): ]
+
+
+def AppendTimings( timing_path, entry_list ):
+	if len(entry_list) == 0:
+		return
+	timing_file = open(timing_path, "a")
+	for entry in entry_list:
+		timing_file.write( json.dumps( entry, sort_keys = True ) + "\n" )
+	timing_file.close()
+
+	# Cut the history back to the entries that are used once it has grown a tenth too long
+	if timing_path not in _timing_count_dct:
+		ReadTimings(timing_path)
+	else:
+		_timing_count_dct[timing_path] += len(entry_list)
+	if _timing_count_dct[timing_path] > max_timing_entries*1.1:
+		_TrimTimings(timing_path)
+
+
+# Keep only the last max_timing_entries lines. Written to a temporary name first, so an
+# interrupted trim leaves the old history intact
+def _TrimTimings( timing_path ):
+	timing_file = open(timing_path, "r")
+	line_list = timing_file.readlines()
+	timing_file.close()
+	line_list = line_list[ max( 0, len(line_list) - max_timing_entries ): ]
+
+	temp_path = timing_path + ".tmp"
+	timing_file = open(temp_path, "w")
+	timing_file.writelines(line_list)
+	timing_file.close()
+	os.rename( temp_path, timing_path )
+	_timing_count_dct[timing_path] = len(line_list)
+
+
+def _MatchKey( features, key_list ):
+	return tuple( [ tuple( features.get(k) ) if isinstance( features.get(k), list ) else features.get(k) for k in key_list ] )
+
+
+# For each set of features in match_list -> { key: [ energies (sorted), seconds ] }, so that each
+# prediction only looks at the entries that match it
+def TimingIndex( history ):
+	index = []
+	for key_list in match_list:
+		key_dct = {}
+		for e in sorted( history, key = lambda e: e["energy"] ):
+			item = key_dct.setdefault( _MatchKey( e, key_list ), [ [], [] ] )
+			item[0].append( e["energy"] )
+			item[1].append( e["seconds"] )
+		index.append(key_dct)
+	return index
+
+
+# Predicted time (seconds) for an input file with the given features from the indexed history (see
+# TimingIndex), or None if nothing like it has been run before
+def PredictDuration( index, features ):
+	for key_list, key_dct in zip( match_list, index ):
+		item = key_dct.get( _MatchKey( features, key_list ) )
+		if item is None:
+			continue
+
+		# Take the n_nearest closest energies, working out from where this one would go
+		energy_list, seconds_list = item
+		lo = bisect.bisect_left( energy_list, features["energy"] ) - 1
+		hi = lo + 1
+		total = 0.0
+		n = 0
+		while n < n_nearest and ( lo >= 0 or hi < len(energy_list) ):
+			if hi >= len(energy_list) or ( lo >= 0 and features["energy"] - energy_list[lo] <= energy_list[hi] - features["energy"] ):
+				total += seconds_list[lo]
+				lo -= 1
+			else:
+				total += seconds_list[hi]
+				hi += 1
+			n += 1
+		return total/n
+	return None
+
+
+# { input file path: predicted time } for a list of decks. Input files with no prediction get the
+# average of the others (or 0 if there are none), so that they keep their place in the order
+def PredictDurations( history, deck_list, code_list ):
+	index = TimingIndex(history)
+	predict_dct = {}
+	for deck in deck_list:
+		predict_dct[ deck[0] ] = PredictDuration( index, DeckFeatures( deck, code_list ) )
+
+	known_list = [ t for t in predict_dct.values() if t is not None ]
+	default = sum(known_list)/len(known_list) if len(known_list) > 0 else 0.0
+	for in_file_path in predict_dct:
+		if predict_dct[in_file_path] is None:
+			predict_dct[in_file_path] = default
+	return predict_dct
+
+
+# Time (seconds) left in a run with n_workers workers. The predictions for what is left are scaled
+# by how long the finished jobs took compared to their predictions. Without predictions, every job
+# left is assumed to take as long as the average finished one
+def EstimateRemaining( done_seconds, done_predicted, remaining_predicted, n_done, n_remaining, n_workers ):
+	if n_done == 0:
+		return remaining_predicted/n_workers
+	if done_predicted > 0:
+		return remaining_predicted*( done_seconds/done_predicted )/n_workers
+	return ( done_seconds/n_done )*n_remaining/n_workers
+
+
+def FormatDuration( seconds ):
+	seconds = int( round(seconds) )
+	if seconds >= 3600:
+		return "%dh%02dm%02ds" % ( seconds // 3600, ( seconds % 3600 ) // 60, seconds % 60 )
+	if seconds >= 60:
+		return "%dm%02ds" % ( seconds // 60, seconds % 60 )
+	return "%ds" % seconds
@@ -0,0 +1,149 @@
+# Journal [FUNCTION]
+# Append-only journal of the input files and stages that have finished, so that a sweep that was
+# interrupted can be resumed (with --resume) instead of being started again
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# JournalPath - Returns the location of the journal for an output directory
+# AppendJournal - Adds an entry to the journal
+# ReadJournal - Reads the entries since the journal was last started afresh
+# StartEntry/DeckEntry/StageEntry - Generate journal entries
+# CompletedDecks - Returns the names of the input files that finished successfully
+# StageDone - Tests whether a stage finished after everything it depends on
+# ResumeDecks - Splits a list of decks into those that have finished and those still to run
+# JournalResults - Rebuilds the RunDecks results of finished input files from their clean files
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# The journal is OUTPUT_FILE_DIR/journal.log, with one JSON entry per line
+#	{ "event": "start", "resume": 0 or 1 }                     -> a run started
+#	{ "event": "deck", "deck": input file name, "status": exit status, "cached": 0 or 1,
+#	  "blocks": [ [ spin parity tag, nodes, L ], ... ] or null } -> an input file finished
+#	{ "event": "stage", "stage": name }                        -> a stage finished
+# Every entry also has a "time". A run without --resume starts the journal afresh (entries before
+# it are ignored), and the latest entry for an input file wins, so failures are run again.
+# The stages are "run" (RunPtolemy.py or PtolemySweep.py), "clean" (BatchClean.py) and "csv"
+# (CSVFileCreator.py). With --resume, the clean and CSV stages are skipped if they finished after
+# the last input file (and after the stages they use, see stage_input_dct) did
+# =============================================================================================== #
+import json
+import os
+from datetime import *
+
+from function_RunSolver import *
+from function_CleanOutput import *
+from function_CrossSections import *
+
+journal_name = "journal.log"
+
+# The stages whose results each stage uses. A stage has to be done again if any of them (or any
+# input file) finished after it did
+stage_input_dct = { "run": [], "clean": [], "csv": [ "clean" ] }
+
+
+def JournalPath( out_file_dir ):
+	return os.path.join( out_file_dir, journal_name )
+
+
+# Each entry is flushed to disk straight away so that it survives the process being killed
+def AppendJournal( journal_path, entry ):
+	entry["time"] = datetime.now().strftime("%F %X")
+	journal_file = open(journal_path, "a")
+	journal_file.write( json.dumps( entry, sort_keys = True ) + "\n" )
+	journal_file.flush()
+	os.fsync( journal_file.fileno() )
+	journal_file.close()
+
+
+# Entries since the last fresh start. A half-written last line (from a crash) is ignored
+def ReadJournal( journal_path ):
+	if not os.path.isfile(journal_path):
+		return []
+	entry_list = []
+	journal_file = open(journal_path, "r")
+	for line in journal_file:
+		try:
+			entry = json.loads(line)
+		except ValueError:
+			continue
+		if entry.get("event") == "start" and entry.get("resume") == 0:
+			entry_list = []
+		entry_list.append(entry)
+	journal_file.close()
+	return entry_list
+
+
+def StartEntry( resume ):
+	return { "event": "start", "resume": resume }
+
+
+# Entry for a result from RunDecks
+def DeckEntry( res ):
+	if res[5] is not None:
+		block_list = [ [ b[0], b[3], b[4] ] for b in res[5]["blocks"] ]
+	else:
+		block_list = None
+	return { "event": "deck", "deck": os.path.basename( res[0] ), "status": res[2], "cached": res[3], "blocks": block_list }
+
+
+def StageEntry( stage ):
+	return { "event": "stage", "stage": stage }
+
+
+# { input file name: latest deck entry } for the input files that finished successfully
+def CompletedDecks( entry_list ):
+	deck_dct = {}
+	for entry in entry_list:
+		if entry.get("event") == "deck":
+			deck_dct[ entry["deck"] ] = entry
+	return dict( [ [ name, deck_dct[name] ] for name in deck_dct if deck_dct[name]["status"] == 0 ] )
+
+
+def StageDone( entry_list, stage ):
+	done = False
+	for entry in entry_list:
+		if entry.get("event") == "stage" and entry["stage"] == stage:
+			done = True
+		elif entry.get("event") == "deck" or ( entry.get("event") == "stage" and entry["stage"] in stage_input_dct.get( stage, [] ) ):
+			done = False
+	return done
+
+
+# Returns [finished decks, decks still to run]
+def ResumeDecks( entry_list, deck_list ):
+	done_dct = CompletedDecks(entry_list)
+	done_list = []
+	todo_list = []
+	for deck in deck_list:
+		if os.path.basename( deck[0] ) in done_dct:
+			done_list.append(deck)
+		else:
+			todo_list.append(deck)
+	return [ done_list, todo_list ]
+
+
+# Results (as from RunDecks) for the finished decks in deck_list. If they were cleaned, the
+# cleaned output is read back in from the clean files, so that they can be stored again
+def JournalResults( entry_list, deck_list, out_file_dir, code ):
+	done_dct = CompletedDecks(entry_list)
+	result_list = []
+	for deck in deck_list:
+		entry = done_dct.get( os.path.basename( deck[0] ) )
+		if entry is None:
+			continue
+		out_file_path = OutputFileName( deck[0], out_file_dir )
+
+		clean_dct = None
+		if entry["blocks"] is not None:
+			clean_dct = { "blocks": [], "asymptopia": 0, "asymptopia_value": -1.0, "warning": 0, "fail": 0 }
+			for sp, node, L in entry["blocks"]:
+				clean_dct["blocks"].append( [ sp, [], 1, node, L ] )
+			for block, path in zip( clean_dct["blocks"], CleanFileNames( out_file_path, clean_dct, code ) ):
+				if os.path.isfile(path):
+					angle, cs = ReadCleanFile(path)
+					block[1] = [ [ angle[i], cs[i] ] for i in range( 0, min( len(angle), len(cs) ) ) ]
+
+		result_list.append( [ deck[0], out_file_path, 0, entry["cached"], deck[0], clean_dct ] )
+	return result_list
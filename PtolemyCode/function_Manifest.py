@@ -0,0 +1,190 @@
+# Manifest [FUNCTION]
+# Records what went into and came out of each input file of a sweep, so that a re-run only has to
+# redo the input files that have changed (like make)
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# ManifestPath - Returns the location of the manifest for an output directory
+# FileHash - Returns a hash of the contents of a file
+# LoadManifest - Loads a manifest (or returns an empty one)
+# SaveManifest - Saves a manifest
+# SolverIdentities - Returns the identity of each solver in a code list
+# IsFresh - Tests whether the outputs recorded for an input file are up to date
+# SplitStaleDecks - Splits a list of decks into those that are up to date and those that are not
+# RemoveStaleOutputs - Deletes the outputs of everything in the manifest that is not up to date
+# UpdateManifest - Records the outputs of a list of results from RunDecks
+# ManifestFiles - Returns the output files recorded for a list of input files
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# The manifest is OUTPUT_FILE_DIR/manifest.json
+#	{ "decks": { input file name: {
+#		"options"       -> hash of the option file
+#		"energy"        -> excitation energy from the energy list
+#		"potential_in"  -> incoming potential
+#		"potential_out" -> outgoing potential
+#		"model"         -> model name used in the file names
+#		"deck"          -> hash of the input file (see function_DeckDuplicates.py)
+#		"codes"         -> codes that were run
+#		"solvers"       -> identity of each solver (see function_ResultCache.py)
+#		"output"        -> { output file name: hash } for the raw output (if it was kept)
+#		"clean"         -> { clean file name: hash }
+#	} } }
+# An input file is up to date if it was generated from the same option file, energy and
+# potentials, its hash, the codes and the solvers are unchanged, and all of its outputs are still
+# there and unchanged. Everything that goes into a calculation ends up in the input file, so the
+# option file is checked as a whole: any change to it makes every input file stale (those that
+# come out the same are then restored from the result cache, if it is on, rather than run)
+# =============================================================================================== #
+import hashlib
+import json
+import os
+
+from function_DeckDuplicates import *
+from function_ResultCache import *
+from function_RunSolver import *
+from function_CleanOutput import *
+
+manifest_name = "manifest.json"
+
+
+def ManifestPath( out_file_dir ):
+	return os.path.join( out_file_dir, manifest_name )
+
+
+def FileHash( path ):
+	h = hashlib.sha1()
+	in_file = open(path, "rb")
+	while True:
+		block = in_file.read(1024*1024)
+		if len(block) == 0:
+			break
+		h.update(block)
+	in_file.close()
+	return h.hexdigest()
+
+
+def LoadManifest( manifest_path ):
+	if not os.path.isfile(manifest_path):
+		return { "decks": {} }
+	manifest_file = open(manifest_path, "r")
+	manifest = json.load(manifest_file)
+	manifest_file.close()
+	return manifest
+
+
+# Written to a temporary name first so that an interrupted save leaves the old manifest intact
+def SaveManifest( manifest_path, manifest ):
+	temp_path = manifest_path + ".tmp"
+	manifest_file = open(temp_path, "w")
+	json.dump( manifest, manifest_file, indent = 1, sort_keys = True )
+	manifest_file.close()
+	os.rename( temp_path, manifest_path )
+
+
+def SolverIdentities( code_list ):
+	return [ SolverIdentity( SolverPath(code) ) for code in code_list ]
+
+
+# info describes where the input file came from (see GenerateSweepDecks) and options_hash is the
+# hash of the option file. Either can be None if it is not known, in which case it is not checked
+def IsFresh( entry, deck_text, code_list, out_file_dir, info = None, options_hash = None ):
+	if entry is None:
+		return False
+	if entry["deck"] != DeckHash(deck_text) or entry["codes"] != code_list or entry["solvers"] != SolverIdentities(code_list):
+		return False
+	if options_hash is not None and entry.get("options") != options_hash:
+		return False
+	if info is not None:
+		for key in [ "energy", "potential_in", "potential_out", "model" ]:
+			if entry.get(key) != info.get(key):
+				return False
+
+	file_dct = dict( entry["output"] )
+	file_dct.update( entry["clean"] )
+	if len(file_dct) == 0:
+		return False
+	for name in file_dct:
+		path = os.path.join( out_file_dir, name )
+		if not os.path.isfile(path) or FileHash(path) != file_dct[name]:
+			return False
+	return True
+
+
+# Returns [up to date decks, decks to run]. info_dct and options_hash are as in UpdateManifest
+def SplitStaleDecks( manifest, deck_list, code_list, out_file_dir, info_dct = None, options_hash = None ):
+	fresh_list = []
+	stale_list = []
+	for deck in deck_list:
+		name = os.path.basename( deck[0] )
+		entry = manifest["decks"].get(name)
+		info = info_dct.get( name, {} ) if info_dct is not None else None
+		if IsFresh( entry, deck[1], code_list, out_file_dir, info, options_hash ):
+			fresh_list.append(deck)
+		else:
+			stale_list.append(deck)
+	return [ fresh_list, stale_list ]
+
+
+# Delete the recorded outputs of every input file that is not in fresh_list (either because it
+# has to be run again or because it is no longer part of the sweep) and forget about it
+def RemoveStaleOutputs( manifest, fresh_list, out_file_dir ):
+	fresh_name_set = set( [ os.path.basename( d[0] ) for d in fresh_list ] )
+	n_removed = 0
+	for name in list( manifest["decks"].keys() ):
+		if name in fresh_name_set:
+			continue
+		entry = manifest["decks"].pop(name)
+		for file_name in list( entry["output"].keys() ) + list( entry["clean"].keys() ):
+			path = os.path.join( out_file_dir, file_name )
+			if os.path.isfile(path):
+				os.remove(path)
+				n_removed += 1
+	return n_removed
+
+
+# Record every successful result (see RunDecks in function_RunSolver.py). info_dct describes where
+# each input file came from (see GenerateSweepDecks) and options_hash is the hash of the option file
+def UpdateManifest( manifest, result_list, deck_dct, info_dct, options_hash, code_list ):
+	solver_list = SolverIdentities(code_list)
+	for res in result_list:
+		if res[2] != 0:
+			continue
+		name = os.path.basename( res[0] )
+		info = info_dct.get( name, {} )
+
+		output_dct = {}
+		if os.path.isfile( res[1] ):
+			output_dct[ os.path.basename( res[1] ) ] = FileHash( res[1] )
+
+		clean_dct = {}
+		if res[5] is not None:
+			for path in CleanFileNames( res[1], res[5], code_list[-1] ):
+				if os.path.isfile(path):
+					clean_dct[ os.path.basename(path) ] = FileHash(path)
+
+		manifest["decks"][name] = {
+			"options": options_hash,
+			"energy": info.get("energy"),
+			"potential_in": info.get("potential_in"),
+			"potential_out": info.get("potential_out"),
+			"model": info.get("model"),
+			"deck": DeckHash( deck_dct[ res[0] ] ),
+			"codes": code_list,
+			"solvers": solver_list,
+			"output": output_dct,
+			"clean": clean_dct
+		}
+	return manifest
+
+
+# Names of the clean files recorded for a list of decks
+def ManifestFiles( manifest, deck_list, kind = "clean" ):
+	file_list = []
+	for deck in deck_list:
+		entry = manifest["decks"].get( os.path.basename( deck[0] ) )
+		if entry is not None:
+			file_list += sorted( entry[kind].keys() )
+	return file_list
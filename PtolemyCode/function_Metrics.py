@@ -0,0 +1,207 @@
+# Metrics [FUNCTION]
+# Records how long each stage of a run took (and how long each input file took to run) in a
+# metrics log, and profiles the python stages when asked
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# MetricsPath - Returns the location of the metrics log
+# AppendMetrics - Adds entries to the metrics log
+# FileStats - Counts a list of files and the bytes in them
+# StartStage - Notes the time at the start of a stage
+# EndStage - Records the time taken by a stage
+# DeckMetrics - Generates the metrics entries for the results of a solver job
+# ResultStats - Counts the output and clean files for a list of results, and the bytes in them
+# ProfileOn - Tests whether the python stages should be profiled
+# StartProfile - Starts profiling the main thread
+# ProfileCall - Calls a function, profiling it if profiling is on (for worker threads)
+# StopProfile - Stops profiling and saves the profile
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# The log is OUTPUT_FILE_DIR/metrics.log (or PTOLEMY_METRICS if set, where "0" turns it off), with
+# one JSON entry per line. Every entry has "type", "run" (the same for everything written by one
+# process), "script" and "time", plus
+#	type "stage" -> "stage", "wall_seconds", "cpu_seconds" (this process), "child_cpu_seconds"
+#	                (the solvers and other processes it ran), "files", "bytes" and anything else
+#	                the stage counts
+#	type "deck"  -> "deck", "status", "cached", "same_as", "wall_seconds", "user_seconds",
+#	                "system_seconds", "in_bytes", "out_bytes", "clean_files", "clean_bytes"
+# where a deck's wall_seconds is its share of the time of the solver that ran it, and user_seconds
+# and system_seconds its share of the CPU time of that solver (all 0 for input files that were
+# copied from an identical one, and the CPU time is 0 for outputs restored from the cache).
+# If PTOLEMY_PROFILE is 1, each script is run under cProfile and the profile is saved in the output
+# directory as [script]-[run].prof, along with a summary ([script]-[run].prof.txt) of the
+# functions that took longest. The solver threads are profiled as well as the main thread
+# =============================================================================================== #
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+from datetime import *
+
+from function_CleanOutput import *
+
+metrics_name = "metrics.log"
+
+# Identifies everything written by this process
+run_id = datetime.now().strftime("%Y%m%d-%H%M%S") + "-" + str( os.getpid() )
+
+# Profiles of the worker threads (see ProfileCall)
+_thread_profile_list = []
+_thread_profile_lock = threading.Lock()
+
+# Number of functions in the profile summary
+n_profile_lines = 40
+
+
+# None if the metrics log is turned off
+def MetricsPath( out_file_dir ):
+	path = os.environ.get( "PTOLEMY_METRICS", os.path.join( out_file_dir, metrics_name ) )
+	if path in [ "", "0" ]:
+		return None
+	return os.path.expanduser(path)
+
+
+def _Entry( entry_type ):
+	return { "type": entry_type, "run": run_id, "script": os.path.basename( sys.argv[0] ), "time": datetime.now().strftime("%F %X") }
+
+
+def AppendMetrics( metrics_path, entry_list ):
+	if metrics_path is None or len(entry_list) == 0:
+		return
+	metrics_file = open(metrics_path, "a")
+	for entry in entry_list:
+		metrics_file.write( json.dumps( entry, sort_keys = True ) + "\n" )
+	metrics_file.close()
+
+
+# [ number of files, bytes ] for the files in file_list that exist
+def FileStats( file_list ):
+	n = 0
+	n_bytes = 0
+	for path in file_list:
+		if os.path.isfile(path):
+			n += 1
+			n_bytes += os.path.getsize(path)
+	return [ n, n_bytes ]
+
+
+def _CPUTimes():
+	t = os.times()
+	return [ t[0] + t[1], t[2] + t[3] ]
+
+
+def StartStage( stage ):
+	return { "stage": stage, "start": datetime.now(), "cpu": _CPUTimes() }
+
+
+# Record the stage started by StartStage, which dealt with n_files files holding n_bytes bytes.
+# Anything in extra_dct (e.g. { "failed": 2 }) is added to the entry
+def EndStage( metrics_path, stage_dct, n_files = 0, n_bytes = 0, extra_dct = None ):
+	cpu = _CPUTimes()
+	entry = _Entry("stage")
+	entry["stage"] = stage_dct["stage"]
+	entry["wall_seconds"] = round( ( datetime.now() - stage_dct["start"] ).total_seconds(), 3 )
+	entry["cpu_seconds"] = round( cpu[0] - stage_dct["cpu"][0], 3 )
+	entry["child_cpu_seconds"] = round( cpu[1] - stage_dct["cpu"][1], 3 )
+	entry["files"] = n_files
+	entry["bytes"] = n_bytes
+	if extra_dct is not None:
+		entry.update(extra_dct)
+	AppendMetrics( metrics_path, [entry] )
+	return entry
+
+
+# Entries for res_list, the results (see RunDeck) of one solver job that took seconds along with
+# any input files copied from them, where deck_size_dct is { input file path: size of the input
+# file } and cpu is the [ user, system ] CPU time of the solvers (if known)
+def DeckMetrics( res_list, seconds, deck_size_dct, code, cpu = None ):
+	if cpu is None:
+		cpu = [ 0.0, 0.0 ]
+	n_run = max( len( [ res for res in res_list if res[4] == res[0] ] ), 1 )
+	n_solved = max( len( [ res for res in res_list if res[4] == res[0] and res[3] == 0 ] ), 1 )
+	entry_list = []
+	for res in res_list:
+		entry = _Entry("deck")
+		entry["deck"] = os.path.basename( res[0] )
+		entry["status"] = res[2]
+		entry["cached"] = res[3]
+		entry["same_as"] = os.path.basename( res[4] ) if res[4] != res[0] else None
+		entry["wall_seconds"] = round( seconds/n_run, 3 ) if res[4] == res[0] else 0.0
+		entry["user_seconds"] = round( cpu[0]/n_solved, 3 ) if res[4] == res[0] and res[3] == 0 else 0.0
+		entry["system_seconds"] = round( cpu[1]/n_solved, 3 ) if res[4] == res[0] and res[3] == 0 else 0.0
+		entry["in_bytes"] = deck_size_dct.get( res[0], deck_size_dct.get( res[4], 0 ) )
+		entry["out_bytes"] = FileStats( [ res[1] ] )[1]
+		clean_list = CleanFileNames( res[1], res[5], code ) if res[5] is not None else []
+		entry["clean_files"], entry["clean_bytes"] = FileStats(clean_list)
+		entry_list.append(entry)
+	return entry_list
+
+
+# [ number of files, bytes ] for the output and clean files of the results (see RunDeck) in
+# result_list
+def ResultStats( result_list, code ):
+	file_list = []
+	for res in result_list:
+		file_list.append( res[1] )
+		if res[5] is not None:
+			file_list += CleanFileNames( res[1], res[5], code )
+	return FileStats(file_list)
+
+
+def ProfileOn():
+	return os.environ.get( "PTOLEMY_PROFILE", "0" ) == "1"
+
+
+# Returns the profile to give to StopProfile, or None if profiling is off
+def StartProfile():
+	if not ProfileOn():
+		return None
+	profile = cProfile.Profile()
+	profile.enable()
+	return profile
+
+
+# f(*args), profiled separately if profiling is on (cProfile only follows the thread it is started
+# in). The profiles are added to the main one by StopProfile
+def ProfileCall( f, *args ):
+	if not ProfileOn():
+		return f(*args)
+	profile = cProfile.Profile()
+	try:
+		profile.enable()
+	except ValueError:
+		# Newer pythons only allow one profiler at a time
+		return f(*args)
+	try:
+		return f(*args)
+	finally:
+		profile.disable()
+		with _thread_profile_lock:
+			_thread_profile_list.append(profile)
+
+
+# Save the profile (and any from worker threads) in out_file_dir. Returns the path of the profile
+def StopProfile( profile, out_file_dir ):
+	if profile is None:
+		return None
+	profile.disable()
+	stats = pstats.Stats(profile)
+	with _thread_profile_lock:
+		for thread_profile in _thread_profile_list:
+			stats.add(thread_profile)
+		del _thread_profile_list[:]
+
+	script = os.path.splitext( os.path.basename( sys.argv[0] ) )[0]
+	profile_path = os.path.join( out_file_dir, script + "-" + run_id + ".prof" )
+	stats.dump_stats(profile_path)
+
+	summary_file = open(profile_path + ".txt", "w")
+	pstats.Stats( profile_path, stream = summary_file ).sort_stats("cumulative").print_stats(n_profile_lines)
+	summary_file.close()
+	print( "Profile written to " + profile_path )
+	return profile_path
@@ -0,0 +1,85 @@
+# MonitorOutput [FUNCTION]
+# Watches the output of a solver as it is produced for the problems the cleaners look for (see
+# function_CleanOutput.py), so that a run that has gone wrong can be reported or stopped straight
+# away instead of being found when it is cleaned
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# ParsePolicy - Converts a policy string into a { problem: policy } dictionary
+# MonitorLines - Passes output lines through, applying the policy to any problems found in them
+# MonitorAborted - Tests whether MonitorLines stopped a solver
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# The problems are named as in the cleaners ("asymptopia", "warning" and "fail"), and each one has
+# a policy
+#	"abort"    -> stop the solver as soon as the problem appears. The input file counts as failed
+#	              (with exit status abort_status), and its worker moves straight on to the next one
+#	"flag"     -> print the problem as soon as it appears and let the solver carry on
+#	"continue" -> do nothing (the problem is still reported when the output is cleaned)
+# A policy string is either a single policy for every problem (e.g. "abort") or a comma separated
+# list of problem=policy (e.g. "warning=abort,fail=abort,asymptopia=flag"). Problems that are not
+# listed are left to carry on, and ParsePolicy returns None if there is nothing to watch for
+# =============================================================================================== #
+# Markers the cleaners look for in the output of each code -> [ [ problem, marker ], ... ]
+marker_dct = {
+	"ptolemy": [ [ "asymptopia", "INCREASE ASYMPTOPIA TO MORE THAN" ], [ "warning", "WARNING" ] ],
+	"dwuck":   [ [ "fail", "FAILS" ] ]
+}
+
+policy_list = [ "abort", "flag", "continue" ]
+
+# Exit status given to input files that were stopped
+abort_status = 250
+
+
+def ParsePolicy( policy_string ):
+	policy_dct = {}
+	problem_list = [ m[0] for code in marker_dct for m in marker_dct[code] ]
+	for item in policy_string.replace(" ", "").split(","):
+		if item == "":
+			continue
+		if "=" in item:
+			problem, policy = item.split("=", 1)
+			problem_set = [problem]
+		else:
+			policy = item
+			problem_set = problem_list
+		if policy not in policy_list or len( [ p for p in problem_set if p not in problem_list ] ) > 0:
+			raise ValueError("Not a monitor policy: " + item)
+		for problem in problem_set:
+			policy_dct[problem] = policy
+
+	# Nothing to watch for
+	if len( [ p for p in policy_dct if policy_dct[p] != "continue" ] ) == 0:
+		return None
+	return policy_dct
+
+
+# Yields the lines of line_iter. When a problem with an "abort" policy appears, proc is killed and
+# no more lines are yielded. Each problem found is added to hit_list as [ problem, policy ] (once)
+def MonitorLines( line_iter, code, policy_dct, name, proc, hit_list ):
+	watch_list = [ m for m in marker_dct.get( code, [] ) if policy_dct.get( m[0], "continue" ) != "continue" ]
+	for line in line_iter:
+		yield line
+		for problem, marker in watch_list:
+			if marker not in line or problem in [ h[0] for h in hit_list ]:
+				continue
+			policy = policy_dct[problem]
+			hit_list.append( [ problem, policy ] )
+			if policy == "flag":
+				print( "\033[1;33m" + name + ": " + problem + " (" + line.strip() + ")\033[0m" )
+			else:
+				print( "\033[1;31m" + name + ": " + problem + " (" + line.strip() + ") -> stopping\033[0m" )
+				try:
+					proc.kill()
+				except OSError:
+					# Already finished
+					pass
+				return
+
+
+def MonitorAborted( hit_list ):
+	return "abort" in [ h[1] for h in hit_list ]
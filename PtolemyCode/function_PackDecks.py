@@ -0,0 +1,79 @@
+# PackDecks [FUNCTION]
+# Packs several Ptolemy input files into a single input file so that they can be run by one
+# Ptolemy process, and splits the combined output back into one output per input file
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# CountReactions - Counts the REACTION blocks in an input file
+# IsReactionHeader - Tests whether a line of Ptolemy output is the echo of a REACTION line
+# IsResetEcho - Tests whether a line of Ptolemy output is the echo of a reset line
+# PackDecks - Joins a list of input files into one
+# SplitPackedOutput - Splits the output of a packed run into one output per input file
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# Each block written by WritePtolemyBlock starts with "reset", so input files can be chained as
+# long as only the final "end" is kept. Ptolemy echoes each REACTION line as
+#	0INPUT... REACTION: 28Mg(d,p)29Mg(3/2+ 0.0) ELAB=...
+# which is the same header that ptclean.py uses to find each state. The lines before it in the
+# block (reset, r0target, ...) are echoed the same way, so each input file's output starts at the
+# echoed reset that opens its first REACTION block
+# =============================================================================================== #
+
+
+def CountReactions(deck_text):
+	n = 0
+	for line in deck_text.splitlines():
+		words = line.split()
+		if len(words) > 0 and words[0] == "REACTION:":
+			n += 1
+	return n
+
+
+def IsReactionHeader(line):
+	words = line.split()
+	return len(words) > 1 and words[0] == "0INPUT..." and words[1] == "REACTION:"
+
+
+def IsResetEcho(line):
+	words = line.split()
+	return len(words) == 2 and words[0] == "0INPUT..." and words[1] == "reset"
+
+
+# Remove the "end" from each input file and put a single one at the end
+def PackDecks(deck_text_list):
+	block_list = []
+	for deck_text in deck_text_list:
+		line_list = deck_text.rstrip().splitlines()
+		while len(line_list) > 0 and line_list[-1].strip() == "end":
+			line_list.pop()
+		block_list.append( "\n".join(line_list) )
+	return "\n".join(block_list) + "\nend"
+
+
+# Split the lines of a packed output into one list of lines per input file, where n_reaction_list
+# is the number of REACTION blocks in each input file. Each input file after the first starts at
+# the echoed reset before its first header, and everything before that goes to the input file
+# before it. Returns None if the number of headers does not match (e.g. Ptolemy stopped part way
+# through) or an input file's first block has no echoed reset
+def SplitPackedOutput( out_line_list, n_reaction_list ):
+	header_list = [ i for i in range( 0, len(out_line_list) ) if IsReactionHeader( out_line_list[i] ) ]
+	if len(header_list) != sum(n_reaction_list):
+		return None
+
+	# Find the line on which each input file starts
+	start_list = [0]
+	n = 0
+	for i in range( 0, len(n_reaction_list) - 1 ):
+		n += n_reaction_list[i]
+		start = header_list[n]
+		while start > header_list[n-1] and not IsResetEcho( out_line_list[start] ):
+			start -= 1
+		if start == header_list[n-1]:
+			return None
+		start_list.append(start)
+	start_list.append( len(out_line_list) )
+
+	return [ out_line_list[ start_list[i]:start_list[i+1] ] for i in range( 0, len(n_reaction_list) ) ]
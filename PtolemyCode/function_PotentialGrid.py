@@ -0,0 +1,369 @@
+# PotentialGrid [FUNCTION]
+# Tabulates the parameters of an optical model on a grid of (A, Z, E) and answers queries by
+# trilinear interpolation, with an error bound for each lookup and the exact formula as a fallback
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# GridDir - Returns the directory of the grids used when generating input files (or None)
+# GridTolerance - Returns the largest error bound for which the grids are used
+# GridAxis - Generates the points on one axis of a grid from "min,max,step"
+# DependsOnBeam - Tests whether an optical model uses the beam energy as well as E
+# BuildPotentialGrid - Tabulates an optical model on a grid
+# GridPaths - Returns the [.npy, -bound.npy, .json] paths for a grid
+# SavePotentialGrid - Writes a grid to disk
+# LoadPotentialGrid - Loads (and memory maps) a grid
+# GridLookup - Interpolates a grid, with error bounds, falling back to the exact formula
+# PotentialGrid - Returns the grid for a potential from GridDir, if there is one
+# GridMode - Identifies the grid (and tolerance) used for a potential, for the potential cache
+# TabulatedPotentialArray - OpticalModelArray, using the grid for the potential if there is one
+# PotentialGridStats - Returns the number of lookups and of those that fell back
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# A grid for the potential X of particle p, called [DIR]/[p]-[X], is made of
+#	[p]-[X].npy       -> float64 array of the parameters, indexed by [A, Z, E, parameter], where
+#	                     the 16 parameters are v, r and a (5 each) and rc0, as in om_dtype
+#	[p]-[X]-bound.npy -> float64 array of the error bound of each cell, indexed by [A, Z, E]
+#	[p]-[X].json      -> { "particle", "abbreviation", "name", "fingerprint", "A", "Z", "E",
+#	                     "max_bound" }
+# where E is the energy in the channel (E from CalcTrivials) and fingerprint identifies the source
+# of the XArray function, OpticalModelArray and every function of this code they call (AsFloat,
+# ClassicDivide, CalcTrivialsArray, ...), so that a grid is not used once the formula has changed.
+# The error bound of a cell is twice the largest difference (over all 16 parameters) between the
+# interpolated and exact values at check points in it (every whole number of A and Z from one
+# corner of the cell to the other, and every eighth of the way across it in E). It is an estimate,
+# not a strict bound, but each cell holds a smooth piece of the formula unless a parameter is
+# clamped at zero inside it, which the check points will usually see. Lookups outside the grid, or
+# in cells whose bound is more than the tolerance (PTOLEMY_GRID_TOLERANCE, default 0.0005), use the
+# exact formula and have a bound of 0. A bound below the tolerance can still change a written digit
+# (e.g. 1.2346 +/- 0.0002 could be written as 1.234 or 1.235), so when the input strings are made
+# any lookup that could be written differently anywhere within its bound uses the exact formula
+# too, and the input files are the same as with the exact formulas as long as the bound holds.
+# Potentials that use the beam energy as well as E (Perey for protons, Pang) cannot be tabulated
+# this way, and always use the exact formula.
+# If PTOLEMY_GRID_DIR is set, the input files are generated with any grids in it. This is not a
+# speed-up: the formulas are cheap and already worked out a whole list of energies at a time, and
+# generating a large sweep with the grids (checking how each lookup is written included) takes
+# about 2-3 times as long as with the exact formulas, so only use them for models that are
+# expensive to work out
+# =============================================================================================== #
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+
+from opticalmodel_protons import *
+from opticalmodel_deuterons import *
+from opticalmodel_helium3 import *
+from opticalmodel_alpha import *
+from opticalmodel_globals import *
+
+default_grid_tolerance = 0.0005
+
+# Number of parameters in om_dtype
+n_grid_par = 16
+
+# Where the check points are across each cell in E, and the factor that the largest difference at
+# them is multiplied by to give the error bound
+check_fraction_list = [ 0.125, 0.25, 0.375, 0.5, 0.625, 0.75, 0.875 ]
+bound_safety = 2.0
+
+# Directory of this code, whose functions are included in the fingerprint of a grid
+_code_dir = os.path.dirname( os.path.abspath(__file__) )
+
+# Grids loaded by PotentialGrid
+_grid_dct = {}
+grid_stats = { "lookups": 0, "fallbacks": 0 }
+
+
+def GridDir():
+	grid_dir = os.environ.get( "PTOLEMY_GRID_DIR", "" )
+	if grid_dir == "":
+		return None
+	return os.path.expanduser(grid_dir)
+
+
+def GridTolerance():
+	return float( os.environ.get( "PTOLEMY_GRID_TOLERANCE", default_grid_tolerance ) )
+
+
+# The points from "min,max,step" (whole numbers if integer is 1, as for A and Z)
+def GridAxis( s, integer = 0 ):
+	x_min, x_max, step = [ float(x) for x in s.split(",") ]
+	n = int( round( ( x_max - x_min )/step ) ) + 1 if step > 0 else 1
+	axis = np.linspace( x_min, x_min + step*( n - 1 ), n )
+	if integer == 1:
+		return np.round(axis).astype(int)
+	return axis
+
+
+def _Flat( par ):
+	return np.ascontiguousarray(par).view(np.float64).reshape( par.shape + (n_grid_par,) )
+
+
+def _Par( flat ):
+	return np.ascontiguousarray( flat, dtype = np.float64 ).view(om_dtype)[...,0]
+
+
+# The parameters of model_array at channel energy E (the beam energy is made the same as E)
+def _Exact( model_array, A, Z, E ):
+	return OpticalModelArray( model_array, A, Z, E, 0.0, 0.0, 0.0, 0.0, 0.0, 0 )
+
+
+# Changing the beam energy with E kept the same changes the parameters
+def DependsOnBeam( model_array ):
+	A = np.array( [ 12, 40, 120, 208 ] )
+	Z = np.array( [ 6, 20, 50, 82 ] )
+	E = np.array( [ 5.0, 15.0, 30.0, 60.0 ] )
+	par_1 = _Flat( OpticalModelArray( model_array, A, Z, E, 0.0, 0.0, 0.0, 0.0, 0.0, 1 ) )
+	par_2 = _Flat( OpticalModelArray( model_array, A, Z, E + 17.0, 17.0, 0.0, 0.0, 0.0, 0.0, 1 ) )
+	return not np.array_equal( par_1, par_2 )
+
+
+# The functions of this code that f calls (by name, in its body or any function nested in it)
+def _Called( f ):
+	code_list = [ f.__code__ ]
+	name_list = []
+	while len(code_list) > 0:
+		code = code_list.pop()
+		name_list += list( code.co_names )
+		code_list += [ c for c in code.co_consts if inspect.iscode(c) ]
+	called_list = []
+	for name in name_list:
+		g = f.__globals__.get(name)
+		if inspect.isfunction(g) and os.path.dirname( os.path.abspath( g.__code__.co_filename ) ) == _code_dir and g not in called_list:
+			called_list.append(g)
+	return called_list
+
+
+# Hash of the source of model_array, OpticalModelArray (which works out E and N for it) and every
+# function of this code that they call, directly or not (AsFloat, ClassicDivide, CalcTrivialsArray,
+# ...), so that a change to any of them stops the grid being used
+def _Fingerprint( model_array ):
+	f_list = []
+	new_list = [ model_array, OpticalModelArray ]
+	while len(new_list) > 0:
+		f = new_list.pop(0)
+		if f not in f_list:
+			f_list.append(f)
+			new_list += _Called(f)
+	source = "".join( [ f.__module__ + "." + f.__name__ + "\n" + inspect.getsource(f) for f in f_list ] )
+	return hashlib.md5( source.encode("utf-8") ).hexdigest()
+
+
+# [ first point, second point, fraction of the way from the first to the second, inside the axis ]
+# of the cell of each x on an axis
+def _Cell( axis, x ):
+	inside = ( x >= axis[0] ) & ( x <= axis[-1] )
+	if len(axis) == 1:
+		i = np.zeros( x.shape, dtype = int )
+		return [ i, i, np.zeros( x.shape ), inside ]
+	i = np.clip( np.searchsorted( axis, x, side = "right" ) - 1, 0, len(axis) - 2 )
+	t = ( x - axis[i] )/AsFloat( axis[i + 1] - axis[i] )
+	return [ i, i + 1, t, inside ]
+
+
+# Trilinear interpolation of the parameters. Returns [ parameters (as in _Flat), [ cell index in A,
+# Z and E ], inside the grid, whether each parameter differs between the corners of the cell ]
+def _Interpolate( grid, A, Z, E ):
+	A, Z, E = np.broadcast_arrays( AsFloat(A), AsFloat(Z), AsFloat(E) )
+	cell_list = [ _Cell( grid["A"], A ), _Cell( grid["Z"], Z ), _Cell( grid["E"], E ) ]
+
+	# The rows of the 8 corners are gathered from the grid flattened to [point, parameter], and
+	# corners with no weight are left out (e.g. the upper A and Z corners when A and Z are points of
+	# the grid, as they are for a grid in steps of 1)
+	n_A, n_Z, n_E = grid["values"].shape[0:3]
+	row = ( cell_list[0][0]*n_Z + cell_list[1][0] )*n_E + cell_list[2][0]
+	values = grid["values"].reshape( n_A*n_Z*n_E, n_grid_par )
+	axis_list = []
+	for cell, step in zip( cell_list, [ n_Z*n_E, n_E, 1 ] ):
+		corner_list = [ [ 0, 1.0 - cell[2] ] ]
+		if np.any( cell[2] != 0.0 ):
+			corner_list.append( [ ( cell[1] - cell[0] )*step, cell[2] ] )
+		axis_list.append(corner_list)
+
+	flat = np.zeros( A.shape + (n_grid_par,) )
+	varies = np.zeros( A.shape + (n_grid_par,), dtype = bool )
+	first = None
+	for da, wa in axis_list[0]:
+		for dz, wz in axis_list[1]:
+			for de, we in axis_list[2]:
+				corner = np.take( values, row + da + dz + de, axis = 0 )
+				flat += ( wa*wz*we )[...,np.newaxis]*corner
+				if first is None:
+					first = corner
+				else:
+					varies |= corner != first
+
+	inside = cell_list[0][3] & cell_list[1][3] & cell_list[2][3]
+	return [ flat, [ cell[0] for cell in cell_list ], inside, varies ]
+
+
+# The check points in each cell of an axis, indexed by [cell, point]
+def _CheckPoints( axis, integer ):
+	if len(axis) == 1:
+		return np.array( [ [ axis[0] ] ] )
+	if integer == 1:
+		# Every whole number in the cell (repeating the last one where cells are narrower)
+		width = int( np.max( axis[1:] - axis[:-1] ) ) + 1
+		return np.minimum( axis[:-1,np.newaxis] + np.arange( 0, width )[np.newaxis,:], axis[1:,np.newaxis] )
+	return axis[:-1,np.newaxis] + np.array(check_fraction_list)[np.newaxis,:]*( axis[1:] - axis[:-1] )[:,np.newaxis]
+
+
+# Tabulate the potential abbreviation (a single potential, not ALL-D etc.) of particle on the
+# points A_axis, Z_axis and E_axis. Returns the grid as a dictionary
+def BuildPotentialGrid( particle, abbreviation, A_axis, Z_axis, E_axis ):
+	model_list = ModelEntries( particle, abbreviation )
+	if len(model_list) != 1:
+		raise ValueError("Choose a single potential to tabulate, not " + abbreviation + ".")
+	model = model_list[0]
+	if DependsOnBeam( model["array"] ):
+		raise ValueError("The " + model["name"] + " potential uses the beam energy as well as E, so cannot be tabulated.")
+
+	A_axis = np.unique( np.asarray( A_axis, dtype = int ) )
+	Z_axis = np.unique( np.asarray( Z_axis, dtype = int ) )
+	E_axis = np.unique( AsFloat(E_axis) )
+	grid = { "particle": particle, "abbreviation": abbreviation, "name": model["name"], "fingerprint": _Fingerprint( model["array"] ), "A": A_axis, "Z": Z_axis, "E": E_axis, "model_array": model["array"] }
+	grid["values"] = _Flat( _Exact( model["array"], A_axis[:,np.newaxis,np.newaxis], Z_axis[np.newaxis,:,np.newaxis], E_axis[np.newaxis,np.newaxis,:] ) )
+
+	# Error bound of each cell, a slice in A at a time
+	A_check = _CheckPoints( A_axis, 1 )
+	Z_check = _CheckPoints( Z_axis, 1 )
+	E_check = _CheckPoints( E_axis, 0 )
+	bound = np.zeros( [ len(A_check), len(Z_check), len(E_check) ] )
+	for i in range( 0, len(A_check) ):
+		# Indexed by [A point, Z cell, Z point, E cell, E point]
+		A = A_check[i][:,np.newaxis,np.newaxis,np.newaxis,np.newaxis]
+		Z = Z_check[np.newaxis,:,:,np.newaxis,np.newaxis]
+		E = E_check[np.newaxis,np.newaxis,np.newaxis,:,:]
+		diff = np.abs( _Flat( _Exact( model["array"], A, Z, E ) ) - _Interpolate( grid, A, Z, E )[0] )
+		bound[i] = np.max( diff, axis = (0, 2, 4, 5) )
+	grid["bound"] = np.where( np.isfinite(bound), bound_safety*bound, np.inf )
+	return grid
+
+
+def GridPaths( grid_dir, particle, name ):
+	base = os.path.join( grid_dir, particle + "-" + name )
+	return [ base + ".npy", base + "-bound.npy", base + ".json" ]
+
+
+# Returns the paths written
+def SavePotentialGrid( grid_dir, grid ):
+	if not os.path.isdir(grid_dir):
+		os.makedirs(grid_dir)
+	npy_path, bound_path, json_path = GridPaths( grid_dir, grid["particle"], grid["name"] )
+	np.save( npy_path, grid["values"] )
+	np.save( bound_path, grid["bound"] )
+
+	index = { "particle": grid["particle"], "abbreviation": grid["abbreviation"], "name": grid["name"], "fingerprint": grid["fingerprint"] }
+	index["A"] = [ int(x) for x in grid["A"] ]
+	index["Z"] = [ int(x) for x in grid["Z"] ]
+	index["E"] = [ float(x) for x in grid["E"] ]
+	index["max_bound"] = float( np.max( grid["bound"] ) )
+	json_file = open(json_path, "w")
+	json.dump( index, json_file, sort_keys = True )
+	json_file.close()
+	return [ npy_path, bound_path, json_path ]
+
+
+# Returns None if the grid is not there, or was made from a different version of the formula
+def LoadPotentialGrid( grid_dir, particle, name ):
+	npy_path, bound_path, json_path = GridPaths( grid_dir, particle, name )
+	if not os.path.isfile(json_path):
+		return None
+	json_file = open(json_path, "r")
+	grid = json.load(json_file)
+	json_file.close()
+
+	model = ModelEntries( grid["particle"], grid["abbreviation"] )[0]
+	if model["name"] != grid["name"] or _Fingerprint( model["array"] ) != grid["fingerprint"]:
+		print( "The formula for " + grid["name"] + " has changed since " + json_path + " was made, so it will not be used" )
+		return None
+
+	grid["model_array"] = model["array"]
+	grid["A"] = np.asarray( grid["A"], dtype = int )
+	grid["Z"] = np.asarray( grid["Z"], dtype = int )
+	grid["E"] = AsFloat( grid["E"] )
+	grid["values"] = np.load( npy_path, mmap_mode = "r" )
+	grid["bound"] = np.load( bound_path, mmap_mode = "r" )
+	return grid
+
+
+# The parameters (om_dtype) at each A, Z and E from grid. If written is given, it turns one set of
+# parameters into the strings written to the input files, and any lookup that could be written
+# differently from the exact parameters (see _MayChangeStrings) uses the exact formula as well.
+# Returns [ parameters, error bound of each lookup (0 where the exact formula was used), whether the
+# exact formula was used ]
+def GridLookup( grid, A, Z, E, tolerance = None, written = None ):
+	if tolerance is None:
+		tolerance = GridTolerance()
+	A, Z, E = np.broadcast_arrays( np.asarray(A), np.asarray(Z), AsFloat(E) )
+	flat, cell_index, inside, varies = _Interpolate( grid, A, Z, E )
+	bound = np.where( inside, grid["bound"][ cell_index[0], cell_index[1], cell_index[2] ], np.inf )
+	exact = bound > tolerance
+	if written is not None:
+		exact = exact | _MayChangeStrings( flat, np.where( varies, bound[...,np.newaxis], 0.0 ), exact, written )
+
+	if np.any(exact):
+		flat[exact] = _Flat( _Exact( grid["model_array"], A[exact], Z[exact], E[exact] ) )
+	bound = np.where( exact, 0.0, bound )
+
+	grid_stats["lookups"] += int( exact.size )
+	grid_stats["fallbacks"] += int( np.count_nonzero(exact) )
+	return [ _Par(flat), bound, exact ]
+
+
+# Whether the strings written for each lookup (not already using the exact formula) could differ
+# from those for the exact parameters, which are within shift (the error bound of each parameter,
+# or 0 where a parameter is the same at every corner of the cell) of the interpolated ones. The
+# strings only change at rounding steps, so if the parameters at either end of that range are
+# written the same way as the interpolated ones, so is anything in between
+def _MayChangeStrings( flat, shift, exact, written ):
+	change = np.zeros( exact.shape, dtype = bool )
+	for index in zip( *np.nonzero( ~exact ) ):
+		string_list = written( _Par( flat[index] ) )
+		if written( _Par( flat[index] - shift[index] ) ) != string_list or written( _Par( flat[index] + shift[index] ) ) != string_list:
+			change[index] = True
+	return change
+
+
+# The grid in GridDir for the potential called name, or None
+def PotentialGrid( particle, name ):
+	grid_dir = GridDir()
+	if grid_dir is None:
+		return None
+	key = ( grid_dir, particle, name )
+	if key not in _grid_dct:
+		_grid_dct[key] = LoadPotentialGrid( grid_dir, particle, name )
+	return _grid_dct[key]
+
+
+# None if the potential called name is worked out with its exact formula, otherwise ( grid
+# directory, tolerance ), so that the potential cache keeps the strings from grids apart from the
+# exact ones
+def GridMode( particle, name ):
+	if PotentialGrid( particle, name ) is None:
+		return None
+	return ( GridDir(), GridTolerance() )
+
+
+# OpticalModelArray for the potential called name, from its grid in GridDir if there is one (see
+# GridLookup for written)
+def TabulatedPotentialArray( particle, name, model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, written = None ):
+	grid = PotentialGrid( particle, name )
+	if grid is None:
+		return OpticalModelArray( model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H )
+
+	CheckP(H)
+	shape = np.broadcast( np.asarray(A), np.asarray(Z), np.asarray(Ebeam), np.asarray(Ex) ).shape
+	E = CalcTrivialsArray( A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H )[2]
+	return GridLookup( grid, np.broadcast_to( A, shape ), np.broadcast_to( Z, shape ), np.broadcast_to( E, shape ), None, written )[0]
+
+
+# Returns { "lookups", "fallbacks" } for the grids used by this process
+def PotentialGridStats():
+	return { "lookups": grid_stats["lookups"], "fallbacks": grid_stats["fallbacks"] }
@@ -20,6 +20,9 @@
 # N.B. All masses are to be in a.m.u.
 # =============================================================================================== #
 # ALLOWED POTENTIALS
+# These are registered by opticalmodel_X.py (see the registry in opticalmodel_globals.py), along
+# with ALL-D, ALL-P, ALL_H and ALL_A for every potential of a particle
+#
 # Protons
 #  * Becchetti and Greenlees (BG)
 #  * Koning and Delaroche (KD)
@@ -49,6 +52,7 @@ from opticalmodel_deuterons import *
 from opticalmodel_helium3 import *
 from opticalmodel_alpha import *
 from opticalmodel_globals import *
+from function_PotentialGrid import *
 
 
 # FUNCTIONS ===================================================================================== #
@@ -123,127 +127,178 @@ def PotentialSelect(particle, optical_model, massDiff, reaction_par):
 	else:
 		H = 1
 
-	# DEUTERONS
-	if particle == "d":
-		d_list = []
-	
-		if optical_model == "AC":
-			d_list.append( AnCai(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	# Every potential that optical_model stands for (see the registry in opticalmodel_globals.py)
+	pot_list = []
+	for model in ModelEntries(particle, optical_model):
+		pot_list.append( CachedPotential(particle, model["name"], model["array"], A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	return pot_list
+
+
+# ARRAY VERSIONS ================================================================================ #
+# The particles in each reaction, with the change in target mass for each (as in ObtainPTList)
+reaction_particle_dct = {
+	"dp": [ [ "d", 0 ], [ "p", 1 ] ],
+	"pd": [ [ "p", 0 ], [ "d", -1 ] ],
+	"dd": [ [ "d", 0 ] ],
+	"ha": [ [ "h", 0 ], [ "a", -1 ] ]
+}
+
+
+# ObtainPTList for every excitation energy in Ex_list at once. Returns a list of (s, name_list,
+# omn_list], one for each energy, where the parameters for every energy and model are calculated
+# in one go by PotentialArrays
+def ObtainPTLists( Ex_list, optical_model_in, optical_model_out, opt_dct, sep_en ):
+	reaction_par = [ opt_dct["A"], opt_dct["Z"], opt_dct["ELAB"], AsFloat(Ex_list), opt_dct["M_Target"], opt_dct["M_Projectile"], opt_dct["M_Ejectile"], opt_dct["M_Product"], sep_en ]
+	if opt_dct["reaction_type"] not in reaction_particle_dct:
+		raise ValueError("Not an allowed reaction type.")
+	particle_list = reaction_particle_dct[ opt_dct["reaction_type"] ]
 
-		elif optical_model == "PP":
-			d_list.append( PereyPerey(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	# Input strings for each model and energy
+	a = CachedPotentialStrings( particle_list[0][0], optical_model_in, particle_list[0][1], reaction_par )
+	if len(particle_list) > 1:
+		b = CachedPotentialStrings( particle_list[1][0], optical_model_out, particle_list[1][1], reaction_par )
 
-		elif optical_model == "LH":
-			d_list.append( LohrHaeberli(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	name_list = ModelNames( opt_dct["reaction_type"] )
+	omn_list = GetModelNumberList( opt_dct["reaction_type"], optical_model_in, optical_model_out )
 
-		elif optical_model == "HSS":
-			d_list.append( HanShiShen(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	# Combine the two lists of parameters for each energy
+	pt_list = []
+	for k in range(0, len(reaction_par[3]) ):
+		if len(particle_list) > 1:
+			s = []
+			for i in range(0, len(a)):
+				for j in range(0, len(b)):
+					s.append( a[i][k] + b[j][k] )
+		else:
+			s = [ a[i][k] for i in range(0, len(a)) ]
+		pt_list.append( ( s, name_list, omn_list ) )
 
-		elif optical_model == "B":
-			d_list.append( Bojowald(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	return pt_list
 
-		elif optical_model == "DNR":
-			d_list.append( DaehnickNR(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
 
-		elif optical_model == "DR":
-			d_list.append( DaehnickR(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+# Array version of PotentialSelect, where reaction_par holds an array of excitation energies.
+# Returns the parameters (see om_dtype in opticalmodel_globals.py) for every model in
+# optical_model, indexed by [model, energy]
+def PotentialArrays(particle, optical_model, massDiff, reaction_par):
+	A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, sep_en = reaction_par
 
-		elif optical_model == "ALL-D":
-			d_list.append( AnCai(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			d_list.append( Bojowald(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			d_list.append( DaehnickNR(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			d_list.append( DaehnickR(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			d_list.append( HanShiShen(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			d_list.append( LohrHaeberli(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			d_list.append( PereyPerey(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	# Define which energy to use
+	use_energy = np.minimum( sep_en - 0.01, AsFloat(Ex) )
 
-		else:
-			raise ValueError("Not an allowed deuteron potential.")
+	if massDiff == 0:
+		H = 0
+	else:
+		H = 1
 
-		return d_list
+	par_list = []
+	for name, model_array in ModelArrays( particle, optical_model ):
+		par_list.append( OpticalModelArray( model_array, A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H ) )
+	return np.array( par_list, dtype = om_dtype )
 
 
-	
+# [ name, array version ] of each model that optical_model stands for (e.g. all seven for "ALL-D"),
+# where the name is the one the model was registered under
+def ModelArrays(particle, optical_model):
+	return [ [ model["name"], model["array"] ] for model in ModelEntries(particle, optical_model) ]
 
-	# PROTONS
-	elif particle == "p":
-		p_list = []
-
-		if optical_model == "KD":
-			p_list.append( KoningDelaroche(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-
-		elif optical_model == "P":
-			p_list.append( Perey(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-
-		elif optical_model == "M":
-			p_list.append( Menet(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-
-		elif optical_model == "V":
-			p_list.append( Varner(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-
-		elif optical_model == "BG":
-			p_list.append( BecchettiGreenlees(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-		
-		elif optical_model == "ALL-P":
-			p_list.append( BecchettiGreenlees(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			p_list.append( KoningDelaroche(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			p_list.append( Menet(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			p_list.append( Perey(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			p_list.append( Varner(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-			
-			
-		else:
-			raise ValueError("Not an allowed proton potential.")
 
-		return p_list
+# The input strings for one set of parameters (an element of an array from PotentialArrays), as
+# PotentialSelect writes them (the proton potentials are written for DWUCK, the rest for Ptolemy)
+def PotentialString(particle, par):
+	if particle == "p":
+		return WriteDWUCKOMBlock( *ParameterLists(par) )
+	return MakeStringList( *ParameterLists(par) )
 
-	
-	# HELIUM-3
-	elif particle == "h":
-		h_list = []
-		if optical_model == "P":
-			h_list.append( Pang(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-		
-		else:
-			raise ValueError("Not an allowed 3He potential.")
 
-		return h_list
+# The input strings for each model and energy in par_array (from PotentialArrays)
+def PotentialStrings(particle, par_array):
+	return [ [ PotentialString(particle, par) for par in model_par ] for model_par in par_array ]
 
-	# ALPHA
-	elif particle == "a":
-		a_list = []
-		if optical_model == "BP":
-			a_list.append( BassaniPicard(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
-		
-		else:
-			raise ValueError("Not an allowed alpha potential.")
 
-		return a_list
+# POTENTIAL CACHE =============================================================================== #
+# The input strings for a potential only depend on the particle, the model, A, Z, the beam energy
+# and the energy in the channel (E from CalcTrivials). The incoming channel has the same energy for
+# every excitation energy, and the outgoing channel has the same energy for every unbound state
+# (see use_energy in PotentialSelect), so the strings are kept and reused for the rest of the run.
+# Strings interpolated from a grid are kept under a different key (see GridMode) from the exact ones
+potential_cache = {}
+potential_cache_stats = { "hits": 0, "misses": 0 }
+
+
+def PotentialKey(particle, name, A, Z, Ebeam, E, mode = None):
+	return ( particle, name, int(A), int(Z), float(Ebeam), float(E), mode )
+
 
+# Returns { "hits", "misses", "size" } for the potential cache
+def PotentialCacheStats():
+	return { "hits": potential_cache_stats["hits"], "misses": potential_cache_stats["misses"], "size": len(potential_cache) }
+
+
+def ClearPotentialCache():
+	potential_cache.clear()
+	potential_cache_stats["hits"] = 0
+	potential_cache_stats["misses"] = 0
+
+
+# The input strings for the potential called name (from its XArray function, model_array) for one
+# set of inputs, unless they are in the cache
+def CachedPotential(particle, name, model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H):
+	E = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)[2]
+	key = PotentialKey( particle, name, A, Z, Ebeam, E )
+	if key in potential_cache:
+		potential_cache_stats["hits"] += 1
 	else:
-		raise ValueError("Not an allowed particle.")
+		potential_cache_stats["misses"] += 1
+		potential_cache[key] = PotentialString( particle, OpticalModelArray(model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+	return list( potential_cache[key] )
+
+
+# PotentialStrings( particle, PotentialArrays(...) ), where only the models and energies that are
+# not in the cache are calculated (in one go for each model, using the grids in PTOLEMY_GRID_DIR
+# if there are any - see function_PotentialGrid.py)
+def CachedPotentialStrings(particle, optical_model, massDiff, reaction_par):
+	A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, sep_en = reaction_par
+	use_energy = np.minimum( sep_en - 0.01, AsFloat(Ex) )
+	H = 0 if massDiff == 0 else 1
+	E = CalcTrivialsArray(A + massDiff, Z, Ebeam, use_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H)[2]
+	E = np.broadcast_to( E, use_energy.shape )
+
+	string_list = []
+	for name, model_array in ModelArrays( particle, optical_model ):
+		mode = GridMode( particle, name )
+		key_list = [ PotentialKey( particle, name, A + massDiff, Z, Ebeam, e, mode ) for e in E ]
+
+		# Find the energies to calculate, once for each key
+		miss_dct = {}
+		for k in range(0, len(key_list)):
+			if key_list[k] in potential_cache or key_list[k] in miss_dct:
+				potential_cache_stats["hits"] += 1
+			else:
+				potential_cache_stats["misses"] += 1
+				miss_dct[ key_list[k] ] = k
+
+		if len(miss_dct) > 0:
+			miss_key_list = list(miss_dct)
+			miss_energy = use_energy[ [ miss_dct[key] for key in miss_key_list ] ]
+			par = TabulatedPotentialArray( particle, name, model_array, A + massDiff, Z, Ebeam, miss_energy, M_Target, M_Projectile, M_Ejectile, M_Product, H, lambda p: PotentialString( particle, p ) )
+			for i in range(0, len(miss_key_list)):
+				potential_cache[ miss_key_list[i] ] = PotentialString( particle, par[i] )
+
+		string_list.append( [ list( potential_cache[key] ) for key in key_list ] )
+
+	return string_list
 
 
 # Returns a list of the model names based on which one was used
 def ModelNames( reaction_type ):
 	# Returns the names of the two model potentials combined
-	p = ProtonModelNumber()
-	d = DeuteronModelNumber()
-	h = HelionModelNumber()
-	a = AlphaModelNumber()
 	name_list = []
 
 	# Select the right potentials
 	particle = []
 	for i in range(0, len(reaction_type)):
-		if "p" == reaction_type[i]:
-			particle.append(p)
-		elif "d" == reaction_type[i]:
-			particle.append(d)
-		elif "h" == reaction_type[i]:
-			particle.append(h)
-		elif "a" == reaction_type[i]:
-			particle.append(a)
+		if reaction_type[i] in optical_model_registry:
+			particle.append( ModelNameList( reaction_type[i] ) )
 
 	# Check size of particle is correct
 	if len(particle) != 2:
@@ -266,86 +321,21 @@ def ModelNames( reaction_type ):
 	return name_list
 
 
-
-
+# The numbers (in the list from ModelNames) of the models that the two potentials stand for
 def GetModelNumberList( reaction_type, optical_model_in, optical_model_out ):
-	# Define the dictionaries to use
-	flag_elastic = 0
-	if reaction_type == "dp":
-		dct_1 = deuteron_dct
-		dct_2 = proton_dct	
-
-	elif reaction_type == "pd":
-		dct_1 = proton_dct
-		dct_2 = deuteron_dct
-
-	elif reaction_type == "dd":
-		dct_1 = deuteron_dct
-		dct_2 = deuteron_dct
-		flag_elastic = 1
-		
-	elif reaction_type == "ha":
-		dct_1 = helion_dct
-		dct_2 = alpha_dct
-	
-	else:
+	if reaction_type not in reaction_particle_dct:
 		raise ValueError("Not an allowed reaction type.")
-		exit(1)
+	particle_list = reaction_particle_dct[reaction_type]
 
 	# Now create the list
 	omn_list = []
-	if flag_elastic == 0:
-		for i in range( dct_1[ optical_model_in ][0], dct_1[ optical_model_in ][1] ):
-			for j in range( dct_2[ optical_model_out ][0], dct_2[ optical_model_out ][1] ):
-				omn_list.append( dct_2["len"]*i + j )
+	if len(particle_list) > 1:
+		n_out = len( ParticleEntry( particle_list[1][0] )["models"] )
+		for i in ModelIndices( particle_list[0][0], optical_model_in ):
+			for j in ModelIndices( particle_list[1][0], optical_model_out ):
+				omn_list.append( n_out*i + j )
 	else:
-		for i in range( dct_1[ optical_model_in ][0], dct_1[ optical_model_in ][1] ):
+		for i in ModelIndices( particle_list[0][0], optical_model_in ):
 			omn_list.append(i)
 
-		
-
 	return omn_list
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,123 @@
+# QueryCrossSections [FUNCTION]
+# Selects angular distributions from a binary store (see function_CrossSectionStore.py) without
+# reading the whole store. The cross sections are memory mapped, so only the rows and angles that
+# are asked for are ever read from disk
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# OpenStore - Opens a store (memory mapped), reusing it if it is already open and unchanged
+# JPiTag - Converts a jpi string (e.g. 3/2-) into a jpi tag (e.g. 32n)
+# SelectRecords - Returns the rows of a store that match a selection
+# AngleSlice - Returns the slice of angles inside an angle window
+# RowIndex - Turns a list of rows into a slice if they are contiguous
+# QueryCrossSections - Returns [index entries, angles, cross sections] for a selection
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# EXAMPLE
+#	entry_list, angle, cs = QueryCrossSections( "OUT/PT_Raw", model = "AnCai_KoningDelaroche",
+#	                                            energy = [2.2, 2.3], jpi = "3/2-" )
+# gives the 3/2- state at 2.270 MeV, with cs[i] the angular distribution for entry_list[i].
+# Selections can be a single value or a list of allowed values (energy is a [min, max] range and
+# angle is a [min, max] window instead). model matches the model pair ([in]_[out]), and model_in
+# and model_out match either half of it.
+# cs is a view of the store (nothing is copied) whenever the matching rows are next to each other
+# =============================================================================================== #
+import os
+
+import numpy as np
+
+from function_CrossSectionStore import *
+
+# Stores that are already open -> { store path: [ time modified, index, cross sections ] }
+_store_dct = {}
+
+
+def OpenStore( store_path ):
+	npy_path, json_path = StorePaths(store_path)
+	t = max( os.path.getmtime(npy_path), os.path.getmtime(json_path) )
+	if store_path not in _store_dct or _store_dct[store_path][0] != t:
+		index, cs = LoadStore( store_path, 1 )
+		_store_dct[store_path] = [ t, index, cs ]
+	return _store_dct[store_path][1:3]
+
+
+# 3/2- -> 32n (tags are left alone)
+def JPiTag( jpi ):
+	return jpi.replace("/","").replace("+","p").replace("-","n")
+
+
+def _Matches( value, allowed ):
+	if allowed is None:
+		return True
+	if isinstance( allowed, (list, tuple) ):
+		return value in allowed
+	return value == allowed
+
+
+def _ToList( x, f ):
+	if x is None:
+		return None
+	if isinstance( x, (list, tuple) ):
+		return [ f(y) for y in x ]
+	return f(x)
+
+
+# Indices of the records matching all of the given selections (None = anything)
+def SelectRecords( index, reaction = None, model = None, model_in = None, model_out = None, energy = None, jpi = None, L = None, node = None ):
+	jpi = _ToList( jpi, JPiTag )
+
+	row_list = []
+	for i in range( 0, len( index["records"] ) ):
+		entry = index["records"][i]
+		model_split = entry["model"].split("_")
+		if not _Matches( entry["reaction"], reaction ):
+			continue
+		if not _Matches( entry["model"], model ):
+			continue
+		if not _Matches( model_split[0], model_in ):
+			continue
+		if not _Matches( model_split[-1], model_out ):
+			continue
+		if energy is not None and ( entry["energy"] < energy[0] or entry["energy"] > energy[1] ):
+			continue
+		if not _Matches( entry["jpi"], jpi ):
+			continue
+		if not _Matches( entry["L"], L ):
+			continue
+		if not _Matches( entry["node"], node ):
+			continue
+		row_list.append(i)
+	return row_list
+
+
+# Slice of the (increasing) angles that lie inside [angle_min, angle_max]
+def AngleSlice( angle, window = None ):
+	if window is None:
+		return slice( 0, len(angle) )
+	angle = np.asarray(angle)
+	i0 = int( np.searchsorted( angle, window[0], "left" ) )
+	i1 = int( np.searchsorted( angle, window[1], "right" ) )
+	return slice( i0, max( i0, i1 ) )
+
+
+# A slice if the rows are contiguous (so indexing gives a view), otherwise the list of rows
+def RowIndex( row_list ):
+	if len(row_list) == 0:
+		return slice(0,0)
+	if row_list == list( range( row_list[0], row_list[-1] + 1 ) ):
+		return slice( row_list[0], row_list[-1] + 1 )
+	return row_list
+
+
+# Returns [index entries, angles, cross sections] for everything matching the selection (see
+# SelectRecords), restricted to the angle window
+def QueryCrossSections( store_path, angle = None, **selection ):
+	index, cs = OpenStore(store_path)
+	row_list = SelectRecords( index, **selection )
+	angle_slice = AngleSlice( index["angle"], angle )
+
+	entry_list = [ index["records"][i] for i in row_list ]
+	return [ entry_list, np.asarray( index["angle"] )[angle_slice], cs[ RowIndex(row_list), angle_slice ] ]
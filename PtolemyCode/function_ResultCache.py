@@ -0,0 +1,180 @@
+# ResultCache [FUNCTION]
+# Persistent cache of solver output files. Each output is stored under a hash of the input file
+# text and the identity of the solver executable, so identical input files are only ever run once
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# CacheDir - Returns the cache directory (PTOLEMY_CACHE_DIR or ~/.ptolemy-cache)
+# CacheSizeLimit - Returns the maximum size of the cache in bytes (PTOLEMY_CACHE_SIZE in MB)
+# SolverIdentity - Returns a string identifying a solver executable (path, size, time modified)
+# CacheKey - Generates the cache key for an input file and a solver
+# CacheLookup - Returns the cached output file for a key (or None)
+# CacheStore - Stores an output file in the cache under a key
+# CacheStoreFile - Stores the contents of an open file in the cache under a key
+# CacheEntries - Lists [path, size, last used] for each cached output, oldest first
+# CacheInfo - Returns the number of entries and total size of the cache
+# PruneCache - Removes the least recently used entries until the cache fits in a given size
+# ClearCache - Removes everything from the cache
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Defaults
+default_cache_dir = "~/.ptolemy-cache"
+default_cache_size = 1024	# MB
+cache_suffix = ".out"
+
+# When storing an entry takes the cache over its size limit, it is pruned to this fraction of the
+# limit, so that it is not pruned again every time something is stored
+prune_fraction = 0.9
+
+# Running total of the size of each cache directory this process has stored in -> { cache
+# directory: bytes }. It is only counted from the disk once (and again after pruning), so that
+# storing an entry does not have to look at every other entry
+_cache_size_dct = {}
+_cache_size_lock = threading.Lock()
+
+
+def CacheDir():
+	cache_dir = os.path.expanduser( os.environ.get( "PTOLEMY_CACHE_DIR", default_cache_dir ) )
+	if not os.path.isdir(cache_dir):
+		os.makedirs(cache_dir)
+	return cache_dir
+
+
+def CacheSizeLimit():
+	return int( float( os.environ.get( "PTOLEMY_CACHE_SIZE", default_cache_size ) )*1024*1024 )
+
+
+# The solver is identified by where it is and when it was built, so a recompiled solver
+# invalidates everything it produced
+def SolverIdentity(solver_path):
+	try:
+		st = os.stat(solver_path)
+		return solver_path + "|" + str(st.st_size) + "|" + str( int(st.st_mtime) )
+	except OSError:
+		return solver_path
+
+
+def CacheKey( deck_text, solver_path ):
+	h = hashlib.sha1()
+	h.update( SolverIdentity(solver_path).encode("utf-8") )
+	h.update( b"\n" )
+	h.update( deck_text.encode("utf-8") )
+	return h.hexdigest()
+
+
+# Return the path of the cached output (or None). A hit counts as a use for the LRU ordering
+def CacheLookup( key, cache_dir ):
+	path = os.path.join( cache_dir, key + cache_suffix )
+	if not os.path.isfile(path):
+		return None
+	try:
+		os.utime( path, None )
+	except OSError:
+		pass
+	return path
+
+
+# Copy an output file into the cache
+def CacheStore( key, out_file_path, cache_dir, max_bytes = -1 ):
+	out_file = open(out_file_path, "r")
+	try:
+		return CacheStoreFile( key, out_file, cache_dir, max_bytes )
+	finally:
+		out_file.close()
+
+
+# Copy the contents of an open file (from the start) into the cache. Written to a temporary name
+# first so that other workers never see a half-written entry
+def CacheStoreFile( key, src_file, cache_dir, max_bytes = -1 ):
+	path = os.path.join( cache_dir, key + cache_suffix )
+	fd, temp_path = tempfile.mkstemp( suffix = ".tmp", dir = cache_dir )
+	temp_file = os.fdopen(fd, "w")
+	src_file.seek(0)
+	shutil.copyfileobj( src_file, temp_file )
+	temp_file.close()
+	size = os.path.getsize(temp_path)
+	try:
+		old_size = os.path.getsize(path)
+	except OSError:
+		old_size = 0
+	os.rename( temp_path, path )
+
+	# Keep the cache below its size limit, only looking through it when the running total says it
+	# has gone over (other processes sharing the cache are only seen then)
+	if max_bytes < 0:
+		max_bytes = CacheSizeLimit()
+	with _cache_size_lock:
+		if cache_dir not in _cache_size_dct:
+			_cache_size_dct[cache_dir] = sum( [ e[1] for e in CacheEntries(cache_dir) ] )
+		else:
+			_cache_size_dct[cache_dir] += size - old_size
+		if _cache_size_dct[cache_dir] > max_bytes:
+			PruneCache( cache_dir, int( max_bytes*prune_fraction ) )
+	return path
+
+
+# [path, size, last used] for every cache entry, least recently used first
+def CacheEntries(cache_dir):
+	entry_list = []
+	for name in os.listdir(cache_dir):
+		if not name.endswith(cache_suffix):
+			continue
+		path = os.path.join( cache_dir, name )
+		try:
+			st = os.stat(path)
+		except OSError:
+			continue
+		entry_list.append( [ path, st.st_size, st.st_mtime ] )
+
+	entry_list.sort( key = lambda x: x[2] )
+	return entry_list
+
+
+# [number of entries, total size in bytes, oldest use, newest use]
+def CacheInfo(cache_dir):
+	entry_list = CacheEntries(cache_dir)
+	if len(entry_list) == 0:
+		return [ 0, 0, -1.0, -1.0 ]
+	return [ len(entry_list), sum( [ e[1] for e in entry_list ] ), entry_list[0][2], entry_list[-1][2] ]
+
+
+# Remove least recently used entries until the total size is at most max_bytes. Returns the
+# number of entries removed
+def PruneCache( cache_dir, max_bytes ):
+	entry_list = CacheEntries(cache_dir)
+	total = sum( [ e[1] for e in entry_list ] )
+
+	n_removed = 0
+	for e in entry_list:
+		if total <= max_bytes:
+			break
+		try:
+			os.remove(e[0])
+		except OSError:
+			continue
+		total -= e[1]
+		n_removed += 1
+
+	_cache_size_dct[cache_dir] = total
+	return n_removed
+
+
+def ClearCache(cache_dir):
+	return PruneCache( cache_dir, 0 )
+
+
+# Format a time stamp for printing
+def FormatTime(t):
+	if t < 0:
+		return "-"
+	return time.strftime( "%F %X", time.localtime(t) )
@@ -0,0 +1,604 @@
+# RunSolver [FUNCTION]
+# Runs Ptolemy or DWUCK over a list of input files using a bounded pool of workers, so that
+# several solver processes can run at the same time
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# DefaultWorkers - Returns the number of workers to use if none is specified (number of cores)
+# SolverPath - Returns the location of the executable for a given code
+# OutputFileName - Generates the output file name from the input file name
+# ReadDecks - Reads a list of input files into a list of decks
+# RunDeck - Runs the solver(s) on a single deck
+# StartWatchdog - Stops a solver that runs for too long
+# StopWatchdog - Cancels a watchdog once its solver has finished
+# StreamSolver - Runs a solver on a deck and cleans (or monitors) its output as it is produced
+# WaitSolver - Waits for a solver to finish and records the CPU time it used
+# OutputFailed - Tests whether the output of a solver says that it failed
+# RunPack - Runs several Ptolemy decks with a single Ptolemy process
+# RunDecks - Runs the solver(s) on a list of decks in parallel
+# ReportResults - Prints a summary of the duplicates, cache hits and failures from RunDecks
+# TimedOutDecks - Returns the input files that ran out of time
+# WriteTimedOut - Writes the list of input files that ran out of time
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# deck -> [ input file path, input file text ]. The text is piped straight into the solver, so the
+#         input file itself only has to exist on disk if the deck was read from it
+# code -> "ptolemy" or "dwuck"
+# n_workers -> The maximum number of solver processes running at once (0 = number of cores)
+# cache_dir -> Directory of the result cache (see function_ResultCache.py), or None for no cache
+# dedup -> 1 to run only one of each group of identical input files (see function_DeckDuplicates.py)
+#          and copy its output to the others
+# pack_size -> The number of Ptolemy input files to run with each Ptolemy process (see
+#              function_PackDecks.py)
+# clean -> 1 to clean the output as the solver produces it (see function_CleanOutput.py) and write
+#          the .out-clean files directly. The .out file is then only kept if the solver fails, or
+#          if keep_raw is 1
+# policy_dct -> What to do about problems seen in the output while the solver runs (see
+#               function_MonitorOutput.py), or None to only find them when cleaning. Decks are not
+#               packed when the output is monitored, so that stopping one deck cannot stop others.
+#               Outputs restored from the cache are not monitored
+# timeout -> Maximum time (seconds) each solver may run for (0 = no limit). A solver that runs out
+#            of time is asked to stop, then killed kill_grace seconds later if it has not, and its
+#            input file fails with exit status timeout_status. A pack of decks gets timeout for each
+#            deck in it
+# timing_path -> Timing history (see function_DeckTimings.py), or None. If given, the decks that
+#                are expected to take longest are started first, the time left is printed as the
+#                run goes, and the time taken by each deck is added to the history
+# metrics_path -> Metrics log (see function_Metrics.py), or None. If given, the time taken and the
+#                 sizes of the input, output and clean files and the CPU time of the solver are
+#                 recorded for each deck
+# =============================================================================================== #
+import errno
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from datetime import *
+
+from function_ResultCache import *
+from function_DeckDuplicates import *
+from function_PackDecks import *
+from function_CleanOutput import *
+from function_MonitorOutput import *
+from function_DeckTimings import *
+from function_Metrics import *
+
+# Seconds between estimates of the time left in RunDecks
+eta_interval = 10
+
+# List of the input files that ran out of time in OUTPUT_FILE_DIR
+timeout_list_name = "timed_out.txt"
+
+# Raw output is held in memory up to this size (bytes) while it is being cleaned
+spool_size = 16*1024*1024
+
+# Exit status of an input file that ran out of time (as from the timeout command), and how long
+# (seconds) a solver has to stop once it has been asked before it is killed
+timeout_status = 124
+kill_grace = 10
+
+# Exit status of an input file whose output says that DWUCK failed (DWUCK itself exits with 0)
+fail_status = 251
+
+# CPU time [ user, system ] of the solvers run by the job in each worker thread (see _TimeJob)
+_cpu_local = threading.local()
+
+# Default locations of the executables (overridden by PTOLEMY_DIR and DWUCK_DIR)
+solver_dct = {
+	"ptolemy": [ "PTOLEMY_DIR", "~/Software/Ptolemy", "ptolemy" ],
+	"dwuck":   [ "DWUCK_DIR", "~/Software/dwuck/bin", "dwuck" ]
+}
+
+
+# Number of workers to use by default
+def DefaultWorkers():
+	try:
+		return multiprocessing.cpu_count()
+	except NotImplementedError:
+		return 1
+
+
+# Get the full path to the solver executable
+def SolverPath(code):
+	if code not in solver_dct:
+		raise ValueError("Not an allowed code: " + str(code))
+
+	env_name, default_dir, exe_name = solver_dct[code]
+	return os.path.join( os.path.expanduser( os.environ.get( env_name, default_dir ) ), exe_name )
+
+
+# Convert [DIR]/[name].in into [OUT_DIR]/[name].out
+def OutputFileName( in_file_path, out_file_dir ):
+	name = os.path.basename(in_file_path)
+	if name.endswith(".in"):
+		name = name[0:len(name) - 3]
+	return os.path.join( out_file_dir, name + ".out" )
+
+
+# Read input files from disk into a list of decks
+def ReadDecks(in_file_list):
+	deck_list = []
+	for in_file_path in in_file_list:
+		in_file = open(in_file_path, "r")
+		deck_list.append( [ in_file_path, in_file.read() ] )
+		in_file.close()
+	return deck_list
+
+
+# Run each of the codes on a deck, piping the deck into stdin and streaming stdout into the output
+# file. If more than one code is given, they are run in turn and the last one overwrites the output
+# (as in ptolemyBash.sh). If a cache is given, outputs for previously seen decks are restored
+# instead of being run. If clean is 1, the output of the last code is cleaned instead of being
+# written out (see StreamSolver), and the result of the cleaning is returned with the result. If
+# policy_dct is given, the output is monitored as it is produced (see StreamSolver). Each solver is
+# stopped if it runs for longer than timeout seconds (0 = no limit)
+def RunDeck( deck, out_file_path, code_list, cache_dir = None, clean = 0, keep_raw = 0, policy_dct = None, timeout = 0 ):
+	in_file_path, deck_text = deck
+	ret = 0
+	cached = 1 if len(code_list) > 0 else 0
+	clean_dct = None
+	for code in code_list:
+		solver = SolverPath(code)
+
+		# Check the cache first
+		if cache_dir is not None:
+			key = CacheKey( CanonicalDeck(deck_text), solver )
+			cache_path = CacheLookup( key, cache_dir )
+			if cache_path is not None:
+				cache_file = open(cache_path, "r")
+				if clean == 1:
+					clean_dct = CleanLines( cache_file, code )
+					failed = clean_dct["fail"]
+				else:
+					failed = OutputFailed( cache_file, code )
+				cache_file.close()
+				if clean == 0 or keep_raw == 1 or failed == 1:
+					shutil.copyfile( cache_path, out_file_path )
+
+				# Failures are no longer stored, but may have been by older versions
+				if failed == 1:
+					ret = fail_status
+					break
+				continue
+		else:
+			key = None
+
+		cached = 0
+		if clean == 1 or policy_dct is not None:
+			ret, clean_dct = StreamSolver( solver, code, deck_text, out_file_path, key, cache_dir, keep_raw, clean, policy_dct, timeout )
+		else:
+			out_file = open(out_file_path, "w")
+			try:
+				proc = subprocess.Popen( [ solver ], stdin=subprocess.PIPE, stdout=out_file, universal_newlines=True )
+				watchdog = StartWatchdog( proc, timeout )
+				_WriteDeck( proc.stdin, deck_text )
+				ret = WaitSolver(proc)
+				if StopWatchdog(watchdog):
+					ret = timeout_status
+			except OSError:
+				# Executable is missing or could not be started
+				ret = 127
+			out_file.close()
+			if ret == 0 and code == "dwuck":
+				out_file = open(out_file_path, "r")
+				if OutputFailed( out_file, code ) == 1:
+					ret = fail_status
+				out_file.close()
+
+			# Only successful runs are stored
+			if ret == 0 and cache_dir is not None:
+				CacheStore( key, out_file_path, cache_dir )
+
+		if ret != 0:
+			break
+
+	# Write the clean files
+	if ret == 0 and clean_dct is not None:
+		WriteCleanFiles( out_file_path, clean_dct, code_list[-1] )
+
+	return [ in_file_path, out_file_path, ret, cached, in_file_path, clean_dct ]
+
+
+# Run a solver on a deck and clean its output line by line as it is produced. The raw output is
+# held in a temporary file (in memory unless it is very large) and is only written to
+# out_file_path if the solver fails or keep_raw is 1. A DWUCK run whose output says FAILS has
+# failed (with exit status fail_status). Successful runs are stored in the cache under key. If
+# clean is 0 the raw output is written straight to out_file_path instead. If policy_dct is given,
+# the output is also monitored (see MonitorLines), and a solver stopped by the monitor gets the
+# exit status abort_status. The solver is stopped after timeout seconds (0 = no limit). Returns
+# [ exit status, cleaned output (or None if it was not or could not be cleaned) ]
+def StreamSolver( solver, code, deck_text, out_file_path, key = None, cache_dir = None, keep_raw = 0, clean = 1, policy_dct = None, timeout = 0 ):
+	if clean == 1:
+		raw_file = tempfile.SpooledTemporaryFile( max_size = spool_size, mode = "w+" )
+	else:
+		raw_file = open(out_file_path, "w+")
+	clean_dct = None
+	try:
+		try:
+			proc = subprocess.Popen( [ solver ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True )
+		except OSError:
+			# Executable is missing or could not be started
+			return [ 127, None ]
+		watchdog = StartWatchdog( proc, timeout )
+
+		# Feed the deck in from another thread so that a large deck cannot block the output
+		writer = threading.Thread( target = _WriteDeck, args = ( proc.stdin, deck_text ) )
+		writer.start()
+
+		line_iter = _TeeLines( iter( proc.stdout.readline, "" ), raw_file )
+		hit_list = []
+		if policy_dct is not None:
+			line_iter = MonitorLines( line_iter, code, policy_dct, os.path.basename(out_file_path), proc, hit_list )
+		if clean == 1:
+			try:
+				clean_dct = CleanLines( line_iter, code )
+			except SystemExit:
+				# The cleaner gave up (e.g. no spin parity in a REACTION line) - keep the raw output
+				clean_dct = None
+
+		# Make sure everything has been read before waiting for the solver
+		for line in line_iter:
+			pass
+		ret = WaitSolver(proc)
+		writer.join()
+		if StopWatchdog(watchdog):
+			ret = timeout_status
+		elif MonitorAborted(hit_list):
+			ret = abort_status
+		elif ret == 0 and ( clean_dct["fail"] if clean_dct is not None else OutputFailed( raw_file, code ) ) == 1:
+			ret = fail_status
+
+		if ret == 0 and cache_dir is not None and key is not None:
+			CacheStoreFile( key, raw_file, cache_dir )
+		if clean == 1 and ( ret != 0 or clean_dct is None or keep_raw == 1 ):
+			raw_file.seek(0)
+			out_file = open(out_file_path, "w")
+			shutil.copyfileobj( raw_file, out_file )
+			out_file.close()
+		elif clean == 1 and os.path.isfile(out_file_path):
+			# Left by an earlier run of the input file that failed (or was stopped)
+			os.remove(out_file_path)
+	finally:
+		raw_file.close()
+
+	return [ ret, clean_dct ]
+
+
+# Ask proc to stop after timeout seconds (0 = never), and kill it if it is still going kill_grace
+# seconds later. The watchdog runs in its own thread, so nothing else is held up while it waits
+def StartWatchdog( proc, timeout ):
+	watchdog = [ None, threading.Event(), [] ]
+	if timeout > 0:
+		watchdog[0] = threading.Timer( timeout, _StopSolver, [ proc, watchdog ] )
+		watchdog[0].daemon = True
+		watchdog[0].start()
+	return watchdog
+
+
+# Call once the solver has finished. Returns True if the solver had to be stopped
+def StopWatchdog( watchdog ):
+	watchdog[1].set()
+	if watchdog[0] is not None:
+		watchdog[0].cancel()
+	return len( watchdog[2] ) > 0
+
+
+def _StopSolver( proc, watchdog ):
+	if watchdog[1].is_set():
+		return
+	watchdog[2].append(1)
+	try:
+		proc.terminate()
+		watchdog[1].wait(kill_grace)
+		if not watchdog[1].is_set():
+			proc.kill()
+	except OSError:
+		# Already finished
+		pass
+
+
+# Wait for proc to finish and return its exit status (as Popen.wait). The CPU time it used is
+# added to that of the job running in this thread
+def WaitSolver( proc ):
+	while True:
+		try:
+			status, usage = os.wait4( proc.pid, 0 )[1:3]
+			break
+		except OSError as e:
+			if e.errno != errno.EINTR:
+				raise
+	if os.WIFSIGNALED(status):
+		proc.returncode = -os.WTERMSIG(status)
+	else:
+		proc.returncode = os.WEXITSTATUS(status)
+
+	cpu = getattr( _cpu_local, "cpu", None )
+	if cpu is not None:
+		cpu[0] += usage.ru_utime
+		cpu[1] += usage.ru_stime
+	return proc.returncode
+
+
+# 1 if the output of code in out_file (an open file, read from the start) says the solver failed
+def OutputFailed( out_file, code ):
+	if code != "dwuck":
+		return 0
+	out_file.seek(0)
+	for line in out_file:
+		if "FAILS" in line:
+			return 1
+	return 0
+
+
+def _WriteDeck( stdin, deck_text ):
+	try:
+		stdin.write(deck_text)
+		stdin.close()
+	except (IOError, OSError):
+		# Solver stopped reading
+		pass
+
+
+# Copy each line into raw_file on the way past
+def _TeeLines( line_iter, raw_file ):
+	for line in line_iter:
+		raw_file.write(line)
+		yield line
+
+
+# Run a pack of Ptolemy decks with one Ptolemy process and split the output back into one output
+# file per deck (or clean it, if clean is 1). Decks that are already in the cache are restored
+# first, and if the packed run fails (or runs out of time) the decks are run one at a time instead
+def RunPack( deck_list, out_file_path_list, cache_dir = None, clean = 0, keep_raw = 0, timeout = 0 ):
+	solver = SolverPath("ptolemy")
+
+	result_list = []
+	run_list = []
+	for i in range( 0, len(deck_list) ):
+		in_file_path, deck_text = deck_list[i]
+
+		key = CacheKey( CanonicalDeck(deck_text), solver )
+		if cache_dir is not None:
+			cache_path = CacheLookup( key, cache_dir )
+			if cache_path is not None:
+				result_list.append( RunDeck( deck_list[i], out_file_path_list[i], ["ptolemy"], cache_dir, clean, keep_raw, None, timeout ) )
+				continue
+
+		run_list.append( [ in_file_path, out_file_path_list[i], deck_text, key ] )
+
+	if len(run_list) == 0:
+		return result_list
+
+	# Run everything that is left in one go
+	split_list = None
+	try:
+		proc = subprocess.Popen( [ solver ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True )
+		watchdog = StartWatchdog( proc, timeout*len(run_list) )
+		writer = threading.Thread( target = _WriteDeck, args = ( proc.stdin, PackDecks( [ r[2] for r in run_list ] ) ) )
+		writer.start()
+		out_text = proc.stdout.read()
+		ret = WaitSolver(proc)
+		writer.join()
+		if not StopWatchdog(watchdog) and ret == 0:
+			split_list = SplitPackedOutput( out_text.splitlines(True), [ CountReactions( r[2] ) for r in run_list ] )
+	except OSError:
+		pass
+
+	# Fall back to one process per input file
+	if split_list is None:
+		for r in run_list:
+			result_list.append( RunDeck( [ r[0], r[2] ], r[1], ["ptolemy"], cache_dir, clean, keep_raw, None, timeout ) )
+		return result_list
+
+	# Write each part of the output to its own file
+	for i in range( 0, len(run_list) ):
+		clean_dct = None
+		if clean == 1:
+			try:
+				clean_dct = CleanLines( split_list[i], "ptolemy" )
+				WriteCleanFiles( run_list[i][1], clean_dct, "ptolemy" )
+			except SystemExit:
+				clean_dct = None
+
+		if clean == 0 or clean_dct is None or keep_raw == 1:
+			out_file = open(run_list[i][1], "w")
+			out_file.writelines( split_list[i] )
+			out_file.close()
+
+		# Each part is what a run of the deck on its own gives (see SplitPackedOutput), so it is
+		# stored under the deck's own key
+		if cache_dir is not None:
+			raw_file = tempfile.SpooledTemporaryFile( max_size = spool_size, mode = "w+" )
+			raw_file.writelines( split_list[i] )
+			CacheStoreFile( run_list[i][3], raw_file, cache_dir )
+			raw_file.close()
+		result_list.append( [ run_list[i][0], run_list[i][1], 0, 0, run_list[i][0], clean_dct ] )
+
+	return result_list
+
+
+# Run the codes over all the decks with at most n_workers solvers at once (see RunDeck for
+# policy_dct and timeout, and the top of this file for timing_path). Returns a list of
+# [input file, output file, exit status, restored from cache, input file that was actually run,
+# cleaned output (None unless clean is 1)] for each deck (in order of completion). Problems found
+# while cleaning are printed and asymptopia problems are recorded in logfile (if given).
+# on_result (if given) is called with each result as soon as it is available
+def RunDecks( deck_list, out_file_dir, code_list, n_workers = 0, verbose = 1, cache_dir = None, dedup = 1, pack_size = 1, clean = 0, keep_raw = 0, logfile = None, on_result = None, policy_dct = None, timeout = 0, timing_path = None, metrics_path = None ):
+	if n_workers <= 0:
+		n_workers = DefaultWorkers()
+
+	# Only run the first of each group of identical decks
+	if dedup == 1:
+		group_list = GroupDuplicateDecks(deck_list)
+	else:
+		group_list = [ [d] for d in deck_list ]
+	dup_dct = dict( [ [ g[0][0], [ d[0] for d in g[1:] ] ] for g in group_list ] )
+
+	# Work out which decks can be packed together - only Ptolemy decks with REACTION blocks can be
+	# split up again afterwards
+	jobs = []
+	pack = []
+	for g in group_list:
+		if pack_size > 1 and code_list == ["ptolemy"] and policy_dct is None and CountReactions( g[0][1] ) > 0:
+			pack.append( g[0] )
+			if len(pack) == pack_size:
+				jobs.append( [ pack, code_list, cache_dir, out_file_dir, clean, keep_raw, policy_dct, timeout ] )
+				pack = []
+		else:
+			jobs.append( [ [ g[0] ], code_list, cache_dir, out_file_dir, clean, keep_raw, policy_dct, timeout ] )
+	if len(pack) > 0:
+		jobs.append( [ pack, code_list, cache_dir, out_file_dir, clean, keep_raw, policy_dct, timeout ] )
+
+	# Start the longest jobs first so that a slow one is not left until the end
+	predict_dct = dict( [ [ g[0][0], 0.0 ] for g in group_list ] )
+	if timing_path is not None:
+		feature_dct = dict( [ [ g[0][0], DeckFeatures( g[0], code_list ) ] for g in group_list ] )
+		predict_dct = PredictDurations( ReadTimings(timing_path), [ g[0] for g in group_list ], code_list )
+		jobs = sorted( jobs, key = lambda job: -sum( [ predict_dct[ d[0] ] for d in job[0] ] ) )
+		if verbose == 1 and sum( predict_dct.values() ) > 0:
+			print( "Expected to take about " + FormatDuration( sum( predict_dct.values() )/min( n_workers, max( len(jobs), 1 ) ) ) )
+
+	# Threads are enough here - the work is done by the solver processes
+	pool = ThreadPool( min( n_workers, max( len(jobs), 1 ) ) )
+
+	result_list = []
+	start = datetime.now()
+	last_eta = start
+	n_done = 0
+	done_seconds = 0.0
+	done_predicted = 0.0
+	remaining_predicted = sum( predict_dct.values() )
+	deck_size_dct = dict( [ [ d[0], len( d[1] ) ] for d in deck_list ] )
+	try:
+		for res_list, seconds, cpu in pool.imap_unordered( _RunJob, jobs ):
+			# Record how long it took
+			n_done += 1
+			done_seconds += seconds
+			predicted = sum( [ predict_dct.get( res[0], 0.0 ) for res in res_list ] )
+			done_predicted += predicted
+			remaining_predicted -= predicted
+			run_list = [ res for res in res_list if res[2] == 0 and res[3] == 0 ]
+			if timing_path is not None and len(run_list) > 0:
+				AppendTimings( timing_path, [ TimingEntry( feature_dct[ res[0] ], seconds/len(run_list) ) for res in run_list ] )
+
+			metrics_res_list = list(res_list)
+			for res in res_list:
+				result_list.append(res)
+				if verbose == 1:
+					PrintResult( res, logfile )
+				if on_result is not None:
+					on_result(res)
+
+				# Fan the output out to the identical input files
+				for dup_file_path in dup_dct[ res[0] ]:
+					dup_out_file_path = OutputFileName( dup_file_path, out_file_dir )
+					if os.path.isfile( res[1] ):
+						shutil.copyfile( res[1], dup_out_file_path )
+					if res[2] == 0 and res[5] is not None:
+						WriteCleanFiles( dup_out_file_path, res[5], code_list[-1] )
+					dup_res = [ dup_file_path, dup_out_file_path, res[2], res[3], res[0], res[5] ]
+					result_list.append(dup_res)
+					metrics_res_list.append(dup_res)
+					if verbose == 1:
+						PrintResult( dup_res, logfile )
+					if on_result is not None:
+						on_result(dup_res)
+
+			if metrics_path is not None:
+				AppendMetrics( metrics_path, DeckMetrics( metrics_res_list, seconds, deck_size_dct, code_list[-1] if len(code_list) > 0 else "", cpu ) )
+
+			# Estimate the time left every so often
+			now = datetime.now()
+			if verbose == 1 and timing_path is not None and n_done < len(jobs) and ( now - last_eta ).total_seconds() >= eta_interval:
+				last_eta = now
+				eta = EstimateRemaining( done_seconds, done_predicted, remaining_predicted, n_done, len(jobs) - n_done, min( n_workers, len(jobs) ) )
+				print( "ETA " + FormatDuration(eta) + " (" + str(n_done) + " of " + str( len(jobs) ) + " jobs done, " + FormatDuration( ( now - start ).total_seconds() ) + " so far)" )
+	finally:
+		pool.close()
+		pool.join()
+
+	return result_list
+
+
+# Job is [ list of decks, code list, cache directory, output directory, clean, keep_raw, policy,
+# timeout ]. Returns [ results, seconds taken, CPU seconds [ user, system ] used by the solvers ]
+def _RunJob(job):
+	return ProfileCall( _TimeJob, job )
+
+
+def _TimeJob(job):
+	_cpu_local.cpu = [ 0.0, 0.0 ]
+	start = datetime.now()
+	out_file_list = [ OutputFileName( d[0], job[3] ) for d in job[0] ]
+	if len(job[0]) > 1:
+		res_list = RunPack( job[0], out_file_list, job[2], job[4], job[5], job[7] )
+	else:
+		res_list = [ RunDeck( job[0][0], out_file_list[0], job[1], job[2], job[4], job[5], job[6], job[7] ) ]
+	return [ res_list, ( datetime.now() - start ).total_seconds(), _cpu_local.cpu ]
+
+
+# Print a message for a finished deck, along with any problems found while cleaning it
+def PrintResult( res, logfile = None ):
+	if res[2] == 0 and res[4] != res[0]:
+		print("Created " + os.path.basename(res[1]) + " (same as " + os.path.basename(res[4]) + ")")
+	elif res[2] == 0 and res[3] == 1:
+		print("Restored " + os.path.basename(res[1]) + " from cache")
+	elif res[2] == 0:
+		print("Created " + os.path.basename(res[1]))
+	elif res[2] == timeout_status:
+		print("\033[1;31m" + os.path.basename(res[0]) + " ran out of time\033[0m")
+	elif res[2] == abort_status:
+		print("\033[1;31m" + os.path.basename(res[0]) + " stopped by the output monitor\033[0m")
+	elif res[2] == fail_status:
+		print("\033[1;31m" + os.path.basename(res[0]) + " failed (DWUCK FAILS)\033[0m")
+	else:
+		print("\033[1;31m" + os.path.basename(res[0]) + " failed (exit status " + str(res[2]) + ")\033[0m")
+
+	if res[2] == 0 and res[5] is not None:
+		ReportCleanFlags( res[1], res[5], logfile )
+
+
+# Print the number of duplicates, cache hits and failures, and return the number of failures
+def ReportResults(result_list):
+	n_dup = len( [ res for res in result_list if res[4] != res[0] ] )
+	if n_dup > 0:
+		print( str(n_dup) + " of " + str( len(result_list) ) + " input files were identical to another and not run" )
+
+	n_cached = len( [ res for res in result_list if res[2] == 0 and res[3] == 1 and res[4] == res[0] ] )
+	if n_cached > 0:
+		print( str(n_cached) + " of " + str( len(result_list) ) + " output files restored from cache" )
+
+	n_fail = len( [ res for res in result_list if res[2] != 0 ] )
+	if n_fail > 0:
+		print("\033[1;31m" + str(n_fail) + " of " + str( len(result_list) ) + " input files failed\033[0m")
+
+	n_timeout = len( TimedOutDecks(result_list) )
+	if n_timeout > 0:
+		print("\033[1;31m" + str(n_timeout) + " of them ran out of time\033[0m")
+
+	return n_fail
+
+
+# Input files (as in the results from RunDecks) that ran out of time
+def TimedOutDecks( result_list ):
+	return [ res[0] for res in result_list if res[2] == timeout_status ]
+
+
+# Write the input files that ran out of time to OUTPUT_FILE_DIR/timed_out.txt (one per line), or
+# remove the list if nothing did. Returns the number of input files in the list
+def WriteTimedOut( out_file_dir, result_list ):
+	path = os.path.join( out_file_dir, timeout_list_name )
+	in_file_list = sorted( TimedOutDecks(result_list) )
+	if len(in_file_list) > 0:
+		list_file = open(path, "w")
+		list_file.writelines( [ f + "\n" for f in in_file_list ] )
+		list_file.close()
+	elif os.path.isfile(path):
+		os.remove(path)
+	return len(in_file_list)
@@ -0,0 +1,274 @@
+# WorkQueue [FUNCTION]
+# A queue of input files kept in a directory on a shared filesystem, so that solvers on several
+# machines (or several processes on one machine) can work through the same set of input files
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# QueueDir - Returns the location of the queue
+# QueuePaths - Returns the directories that make up a queue
+# SubmitDecks - Puts a list of decks in the queue along with how they should be run
+# LoadQueueSettings - Loads how the decks in a queue should be run
+# ClaimDeck - Takes the next input file from the queue
+# StartHeartbeat/StopHeartbeat - Keep a claim alive while its input file is being run
+# ReclaimStale - Puts input files claimed by workers that have stopped back in the queue
+# FinishDeck - Records the result of a claimed input file
+# RetryFailed - Puts the input files that failed back in the queue
+# QueueStatus - Counts the input files in each part of the queue
+# QueueEntries - Reads the results recorded in the queue (as journal entries)
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# A queue is a directory (QUEUE_DIR, default OUTPUT_FILE_DIR/queue) containing
+#	settings.json -> { "codes", "out_dir", "clean", "keep_raw", "timeout", "policy" }
+#	pending/      -> input files waiting to be run
+#	claimed/      -> input files being run, named [input file]@[host]@[process id]
+#	done/         -> input files that were run successfully, each with [input file].json
+#	failed/       -> input files that failed, each with [input file].json
+# where each .json is a journal entry (see function_Journal.py) plus the host and time taken.
+# Everything is moved between the directories with os.rename, which is atomic on a local disk and
+# on NFS, so an input file can only ever be claimed by one worker. A worker touches its claims
+# every quarter of the lease; a claim that has not been touched for lease seconds (or whose process
+# has gone, if it is on the same host) is taken to belong to a worker that crashed and is put back
+# in pending/. The hosts' clocks are assumed to agree to well within the lease
+# =============================================================================================== #
+import errno
+import json
+import os
+import socket
+import tempfile
+import threading
+
+from datetime import *
+from function_Journal import *
+
+queue_name = "queue"
+queue_dir_list = [ "pending", "claimed", "done", "failed" ]
+settings_name = "settings.json"
+
+# Seconds without a heartbeat before a claim is reclaimed (PTOLEMY_QUEUE_LEASE)
+default_lease = 120
+
+
+def QueueDir( out_file_dir ):
+	return os.path.expanduser( os.environ.get( "QUEUE_DIR", os.path.join( out_file_dir, queue_name ) ) )
+
+
+# { part of the queue: directory }, making the directories if needed
+def QueuePaths( queue_dir ):
+	path_dct = {}
+	for name in queue_dir_list:
+		path_dct[name] = os.path.join( queue_dir, name )
+		if not os.path.isdir( path_dct[name] ):
+			try:
+				os.makedirs( path_dct[name] )
+			except OSError:
+				# Made by another worker in the meantime
+				pass
+	return path_dct
+
+
+def LeaseTime():
+	return float( os.environ.get( "PTOLEMY_QUEUE_LEASE", default_lease ) )
+
+
+# Write text to path so that nobody sees a half-written file
+def _WriteAtomic( path, text ):
+	fd, temp_path = tempfile.mkstemp( suffix = ".tmp", dir = os.path.dirname(path) )
+	temp_file = os.fdopen(fd, "w")
+	temp_file.write(text)
+	temp_file.close()
+	os.rename( temp_path, path )
+
+
+# Add decks ([ input file path, input file text ]) to the queue. Decks that are already in the
+# queue are left alone. Returns the number of decks added
+def SubmitDecks( queue_dir, deck_list, settings_dct ):
+	path_dct = QueuePaths(queue_dir)
+	_WriteAtomic( os.path.join( queue_dir, settings_name ), json.dumps( settings_dct, indent = 1, sort_keys = True ) )
+
+	queued = set()
+	for name in queue_dir_list:
+		queued.update( [ f.split("@")[0] for f in os.listdir( path_dct[name] ) if not f.endswith(".json") ] )
+
+	n = 0
+	for in_file_path, deck_text in deck_list:
+		name = os.path.basename(in_file_path)
+		if name in queued:
+			continue
+		_WriteAtomic( os.path.join( path_dct["pending"], name ), deck_text )
+		n += 1
+	return n
+
+
+def LoadQueueSettings( queue_dir ):
+	settings_file = open( os.path.join( queue_dir, settings_name ), "r" )
+	settings_dct = json.load(settings_file)
+	settings_file.close()
+	return settings_dct
+
+
+# Claim the first pending input file. Returns [ claim path, [ input file name, input file text ] ]
+# or None if there is nothing left to claim
+def ClaimDeck( queue_dir ):
+	path_dct = QueuePaths(queue_dir)
+	owner = socket.gethostname() + "@" + str( os.getpid() )
+	for name in sorted( os.listdir( path_dct["pending"] ) ):
+		if name.endswith(".tmp"):
+			continue
+		pending_path = os.path.join( path_dct["pending"], name )
+		claim_path = os.path.join( path_dct["claimed"], name + "@" + owner )
+		try:
+			# Start the lease now rather than when the file was submitted
+			os.utime( pending_path, None )
+			os.rename( pending_path, claim_path )
+		except OSError:
+			# Somebody else got there first
+			continue
+
+		deck_file = open(claim_path, "r")
+		deck_text = deck_file.read()
+		deck_file.close()
+		return [ claim_path, [ name, deck_text ] ]
+	return None
+
+
+# Touch the claim every quarter of the lease until StopHeartbeat is called
+def StartHeartbeat( claim_path ):
+	stop = threading.Event()
+	beat = threading.Thread( target = _Heartbeat, args = ( claim_path, stop ) )
+	beat.daemon = True
+	beat.start()
+	return [ beat, stop ]
+
+
+def StopHeartbeat( beat ):
+	beat[1].set()
+	beat[0].join()
+
+
+def _Heartbeat( claim_path, stop ):
+	while not stop.wait( LeaseTime()/4 ):
+		try:
+			os.utime( claim_path, None )
+		except OSError:
+			# The claim was taken back
+			return
+
+
+def _ProcessGone( host, pid ):
+	if host != socket.gethostname():
+		return False
+	try:
+		os.kill( int(pid), 0 )
+	except OSError as e:
+		return e.errno == errno.ESRCH
+	except ValueError:
+		return False
+	return False
+
+
+# Put claims whose lease has run out (or whose process has gone) back in pending/. Returns the
+# number of input files put back
+def ReclaimStale( queue_dir, lease = -1 ):
+	if lease < 0:
+		lease = LeaseTime()
+	path_dct = QueuePaths(queue_dir)
+	n = 0
+	for claim in os.listdir( path_dct["claimed"] ):
+		t = claim.split("@")
+		if len(t) != 3:
+			continue
+		claim_path = os.path.join( path_dct["claimed"], claim )
+		try:
+			age = ( datetime.now() - datetime.fromtimestamp( os.path.getmtime(claim_path) ) ).total_seconds()
+		except OSError:
+			# Finished in the meantime
+			continue
+		if age < lease and not _ProcessGone( t[1], t[2] ):
+			continue
+		try:
+			os.rename( claim_path, os.path.join( path_dct["pending"], t[0] ) )
+			n += 1
+		except OSError:
+			pass
+	return n
+
+
+# Record the result (from RunDeck) of a claimed input file in done/ or failed/. Returns False if
+# the claim had already been taken back, in which case the input file is being run elsewhere and
+# nothing is recorded: the .json is not written, or is removed again if the claim was taken back
+# while it was being written (unless the other worker has already recorded the input file in the
+# same place). The .json is written before the input file is moved, so a worker that stops in
+# between leaves the input file claimed (to be reclaimed and run again) rather than done with no
+# result; a .json without its input file is ignored by QueueEntries
+def FinishDeck( queue_dir, claim_path, res, seconds ):
+	path_dct = QueuePaths(queue_dir)
+	name = os.path.basename(claim_path).split("@")[0]
+	part = "done" if res[2] == 0 else "failed"
+
+	entry = DeckEntry(res)
+	entry["host"] = socket.gethostname()
+	entry["seconds"] = round( seconds, 3 )
+	entry["time"] = datetime.now().strftime("%F %X")
+
+	if not os.path.isfile(claim_path):
+		return False
+	json_path = os.path.join( path_dct[part], name + ".json" )
+	_WriteAtomic( json_path, json.dumps( entry, sort_keys = True ) )
+	try:
+		os.rename( claim_path, os.path.join( path_dct[part], name ) )
+	except OSError:
+		if not os.path.isfile( os.path.join( path_dct[part], name ) ):
+			try:
+				os.remove(json_path)
+			except OSError:
+				pass
+		return False
+	return True
+
+
+# Move everything in failed/ back to pending/. Returns the number of input files put back
+def RetryFailed( queue_dir ):
+	path_dct = QueuePaths(queue_dir)
+	n = 0
+	for name in os.listdir( path_dct["failed"] ):
+		if name.endswith(".json") or name.endswith(".tmp"):
+			continue
+		os.rename( os.path.join( path_dct["failed"], name ), os.path.join( path_dct["pending"], name ) )
+		json_path = os.path.join( path_dct["failed"], name + ".json" )
+		if os.path.isfile(json_path):
+			os.remove(json_path)
+		n += 1
+	return n
+
+
+# { part of the queue: number of input files }
+def QueueStatus( queue_dir ):
+	path_dct = QueuePaths(queue_dir)
+	status_dct = {}
+	for name in queue_dir_list:
+		status_dct[name] = len( [ f for f in os.listdir( path_dct[name] ) if not f.endswith(".json") and not f.endswith(".tmp") ] )
+	return status_dct
+
+
+# Returns [ journal entries, decks, input files with no result ] for everything in done/, so that
+# the results can be rebuilt with JournalResults
+def QueueEntries( queue_dir ):
+	path_dct = QueuePaths(queue_dir)
+	entry_list = []
+	deck_list = []
+	missing_list = []
+	for name in sorted( os.listdir( path_dct["done"] ) ):
+		if name.endswith(".json") or name.endswith(".tmp"):
+			continue
+		json_path = os.path.join( path_dct["done"], name + ".json" )
+		if not os.path.isfile(json_path):
+			missing_list.append(name)
+			continue
+		json_file = open( json_path, "r" )
+		entry_list.append( json.load(json_file) )
+		json_file.close()
+		deck_list.append( [ name, "" ] )
+	return [ entry_list, deck_list, missing_list ]
@@ -0,0 +1,141 @@
+# WriteInputFiles [FUNCTION]
+# Writes all of the Ptolemy input files for a reaction, for one or more pairs of incoming and
+# outgoing optical model potentials
+# =============================================================================================== #
+# OTHER FUNCTIONS
+# GetStates - Generates the L, J, JP and node lists for the residual nucleus
+# SplitPotentialList - Splits a string of potentials (e.g. "AC B DNR" or "AC,B,DNR") into a list
+# PotentialPairs - Generates every (incoming, outgoing) pair from two lists of potentials
+# GenerateDecks - Generates the text of the input files for one pair of potentials
+# GenerateSweepDecks - Generates the text of the input files for every pair of potentials
+# WriteDecks - Writes generated input files to disk
+# WriteInputFiles - Writes the input files for one pair of potentials
+# WriteSweepInputFiles - Writes the input files for every pair of potentials
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+# in_file_dir -> The directory in which to write the input files
+# energy -> The list of excitation energies
+# potential_in/potential_out -> Abbreviations of the optical models (see opticalmodel_X.py)
+# opt_dct -> The options dictionary (see function_GetOptions.py)
+# info_dct -> If given, filled with { file name: { "energy", "potential_in", "potential_out",
+#             "model" } } describing where each input file came from
+# =============================================================================================== #
+try:
+	from StringIO import StringIO
+except ImportError:
+	from io import StringIO
+
+from function_WritePtolemyBlock import *
+from function_GenerateLValues import *
+from function_PtolemyParameters import *
+from opticalmodel_globals import CalcQ, CalcSepEn
+
+
+# Generate L Values for RESIDUAL NUCLEUS
+def GetStates(opt_dct):
+	if opt_dct["L"] == -2:
+		L, J, JP, node = GenerateSpinParity( opt_dct )
+	else:
+		L, J, JP, node = GetNodes( opt_dct["A"] - opt_dct["Z"], opt_dct["Z"], opt_dct["D"], opt_dct["L"] )
+	return L, J, JP, node
+
+
+def SplitPotentialList(s):
+	return s.replace(",", " ").split()
+
+
+# Every combination of incoming and outgoing potential (ALL-D/ALL-P are expanded later by
+# ObtainPTLists and GetModelNumberList)
+def PotentialPairs( potential_in_list, potential_out_list ):
+	pair_list = []
+	for p_in in potential_in_list:
+		for p_out in potential_out_list:
+			if [ p_in, p_out ] not in pair_list:
+				pair_list.append( [ p_in, p_out ] )
+	return pair_list
+
+
+# Generate the text of every input file for a single pair of potentials without touching the disk.
+# Returns a list of [file name, input file text]
+def GenerateDecks( energy, potential_in, potential_out, opt_dct, states = None, info_dct = None ):
+	# Generate the states once if they were not given
+	if states is None:
+		states = GetStates(opt_dct)
+	L, J, JP, node = states
+
+	# Calculate Q value and separation energy for reaction
+	Q = CalcQ( opt_dct["M_Target"], opt_dct["M_Projectile"], opt_dct["M_Ejectile"], opt_dct["M_Product"] )
+	sep_en = CalcSepEn( opt_dct["M_Target"], opt_dct["M_Product"], opt_dct["reaction_type"] )
+
+	# Generate the correct Ptolemy input parameter strings for every energy at once
+	pt_list = ObtainPTLists(energy, potential_in, potential_out, opt_dct, sep_en )
+
+	# Need to do the same inputs for a given excitation energy
+	deck_list = []
+	for i in range(0,len(energy)):
+		s, name_list, omn_list = pt_list[i]
+
+		# Now need to loop over possible models
+		for a in range(0, len(s) ):
+			inFile = StringIO()
+
+			# Loop over all states if J
+			for j in range(0,len(J)):
+				if j == len(J) - 1:
+					# Last block, so need to write end of the file as well
+					WritePtolemyBlock( inFile, JP[j], L[j], node[j], energy[i], s[a], opt_dct, Q, sep_en, 1 )
+				else:
+					# Write a normal block if not the last block
+					WritePtolemyBlock( inFile, JP[j], L[j], node[j], energy[i], s[a], opt_dct, Q, sep_en, 0 )
+
+			deck_list.append( [ FileNameIN( opt_dct["reaction_name"], energy[i], name_list[omn_list[a]] ), inFile.getvalue() ] )
+			inFile.close()
+
+			if info_dct is not None:
+				info_dct[ deck_list[-1][0] ] = { "energy": energy[i], "potential_in": potential_in, "potential_out": potential_out, "model": name_list[omn_list[a]] }
+
+	return deck_list
+
+
+# Generate the text of the input files for every pair of potentials in one go
+def GenerateSweepDecks( energy, potential_in_list, potential_out_list, opt_dct, info_dct = None ):
+	states = GetStates(opt_dct)
+
+	deck_list = []
+	seen = set()
+	for p_in, p_out in PotentialPairs( potential_in_list, potential_out_list ):
+		pair_info_dct = {}
+		for deck in GenerateDecks( energy, p_in, p_out, opt_dct, states, pair_info_dct ):
+			if deck[0] not in seen:
+				seen.add( deck[0] )
+				deck_list.append( deck )
+				if info_dct is not None:
+					info_dct[ deck[0] ] = pair_info_dct[ deck[0] ]
+
+	return deck_list
+
+
+# Write a list of [file name, input file text] to disk and return the paths
+def WriteDecks( in_file_dir, deck_list ):
+	file_list = []
+	for name, deck_text in deck_list:
+		file_path = in_file_dir + "/" + name
+		inFile = open( file_path, "w" )
+		inFile.write( deck_text )
+		inFile.close()
+		file_list.append( file_path )
+	return file_list
+
+
+# Write the input files for a single pair of potentials and return their paths
+def WriteInputFiles( in_file_dir, energy, potential_in, potential_out, opt_dct, states = None ):
+	return WriteDecks( in_file_dir, GenerateDecks( energy, potential_in, potential_out, opt_dct, states ) )
+
+
+# Write the input files for every pair of potentials in one go and return their paths
+def WriteSweepInputFiles( in_file_dir, energy, potential_in_list, potential_out_list, opt_dct ):
+	return WriteDecks( in_file_dir, GenerateSweepDecks( energy, potential_in_list, potential_out_list, opt_dct ) )
@@ -9,53 +9,29 @@
 from opticalmodel_globals import *
 import numpy as np
 
-alpha_dct = {
-	"BP":    [0,1],
-	"len":       1,
-	"ALL_A": [0,1]
-}
-
 
 # Return the names of the helion potentials alphabetically
 def AlphaModelNumber():
-	return [ "BassaniPicard" ]
+	return ModelNameList("a")
 
 # bassaniPicard is the potential used for a
 def BassaniPicard(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H):
-	# CHECK VALUE OF H
-	CheckP(H)
+	return OpticalModelStrings( BassaniPicardArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, 0, "Bassani and Picard alpha" )
+
+# =============================================================================================== #
+# ARRAY VERSIONS (see opticalmodel_globals.py) - the only copy of each formula
+# Return the array versions of the alpha potentials in the same order as AlphaModelNumber
+def AlphaModelArrays():
+	return [ model["array"] for model in ParticleEntry("a")["models"] ]
+
+# Bassani and Picard
+def BassaniPicardArray(A, Z, N, Ebeam, E):
+	return [ [207.0, 28.0, 0.0, 0.0, 0.0], [1.30, 1.30, 0.0, 0.0, 0.0], [0.65, 0.52, 0.0, 0.0, 0.0], 1.40 ]
+
+# =============================================================================================== #
+# REGISTER THE POTENTIALS (see opticalmodel_globals.py)
+RegisterParticle("a", "alpha", "ALL_A")
+RegisterOpticalModel("a", "BP", "BassaniPicard", BassaniPicardArray)
 
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-	
-	# Calculate final parameters
-	v = 207.0
-	vi = 28.0
-	vsi = 0.0
-	vso = 0.0
-	vsoi = 0.0
-	
-	r0 = 1.30
-	ri0 = 1.30
-	rsi0 = 0.0
-	rso0 = 0.0
-	rsoi0 = 0.0
-	
-	a = 0.65
-	ai = 0.52
-	asi = 0.0
-	aso = 0.0
-	asoi = 0.0
-	
-	rc0 = 1.40
-	
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
-	string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Bassani and Picard alpha")
-		PrintCalculatedQuantities(A,Z,E,Q)
-	return string_list
+# Kept for anything that still uses the old dictionary of model numbers
+alpha_dct = ModelDict("a")
@@ -9,383 +9,152 @@
 from opticalmodel_globals import *
 import numpy as np
 
-# Define optical model dictionary
-deuteron_dct = {
-	"AC":  [0,1],
-	"B":   [1,2],
-	"DNR": [2,3],
-	"DR":  [3,4],
-	"HSS": [4,5],
-	"LH":  [5,6],
-	"PP":  [6,7],
-	"len":     7,
-	"ALL-D":[0,7]
-}
-
 # Return the names of the deuteron potentials alphabetically
 def DeuteronModelNumber():
-	return [ "AnCai", "Bojowald", "DaehnickNR", "DaehnickR", "HanShiShen", "LohrHaeberli", "PereyPerey" ] 
+	return ModelNameList("d")
 
 # An and Cai
 def AnCai(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
+	return OpticalModelStrings( AnCaiArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "An and Cai deuteron" )
+
+# =============================================================================================== #
+# PereyPerey is another potential used for deuterons
+def PereyPerey(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
+	return OpticalModelStrings( PereyPereyArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "Perey and Perey deuteron" )
+
+# =============================================================================================== #
+# LohrHaeberli is another potential used for deuterons
+def LohrHaeberli(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
+	return OpticalModelStrings( LohrHaeberliArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "Lohr and Haeberli deuteron" )
+
+# =============================================================================================== #
+# HanShiShen is another potential used for deuterons
+def HanShiShen(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
+	return OpticalModelStrings( HanShiShenArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "Han, Shi, and Shen deuteron" )
+
+# =============================================================================================== #
+# Bojowald is another potential used for deuterons
+def Bojowald(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
+	return OpticalModelStrings( BojowaldArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "Bojowald deuteron" )
+
+# =============================================================================================== #
+# DaehnickNR is another potential used for deuterons
+def DaehnickNR(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
+	return OpticalModelStrings( DaehnickNRArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "Daehnick (non-rel) deuteron" )
 
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-		
-	# CALCULATE FINAL PARAMETERS
+# =============================================================================================== #
+# DaehnickR is another potential used for deuterons
+def DaehnickR(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
+	return OpticalModelStrings( DaehnickRArray, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code, "Daehnick (rel) deuteron" )
+
+# =============================================================================================== #
+# ARRAY VERSIONS (see opticalmodel_globals.py) - the only copy of each formula
+# Return the array versions of the deuteron potentials in the same order as DeuteronModelNumber
+def DeuteronModelArrays():
+	return [ model["array"] for model in ParticleEntry("d")["models"] ]
+
+# Sum over the magic numbers mu used by both Daehnick potentials
+def DaehnickShellSum(N):
+	mu = [ 8, 20, 28, 50, 82, 126 ]
+	step3 = 0
+	for ii in mu:
+		step3 = step3 + np.exp( -( ( 0.5*(ii - N) )**2 ) )
+	return step3
+
+# An and Cai
+def AnCaiArray(A, Z, N, Ebeam, E):
 	v = 91.85 - 0.249*E + (1.16e-4)*(E**2) + 0.642*Z*(A**(-1.0/3.0))
 	vi = 1.104 + 0.0622*E
 	vsi = 10.83 - 0.0306*E
-	vso = 3.557
-	vsoi = 0
 	
 	r0 = 1.152 - 0.00776*(A**(-1.0/3.0))
 	ri0 = 1.305 + 0.0997*(A**(-1.0/3.0))
 	rsi0 = 1.334 + 0.152*(A**(-1.0/3.0))
-	rso0 = 0.972
-	rsoi0 = 0
 	
 	a = 0.719 + 0.0126*(A**(1.0/3.0))
 	ai = 0.855 - 0.1*(A**(1.0/3.0))
 	asi = 0.531 + 0.062*(A**(1.0/3.0))
-	aso = 1.011
-	asoi = 0
-	
-	rc0 = 1.303
-
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
-	
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "An and Cai deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
-	return string_list
+	return [ [v, vi, vsi, 3.557, 0], [r0, ri0, rsi0, 0.972, 0], [a, ai, asi, 1.011, 0], 1.303 ]
 
-# =============================================================================================== #
-# PereyPerey is another potential used for deuterons
-def PereyPerey(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
-
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-	
-	# CALCULATE FINAL PARAMETERS
+# PereyPerey
+def PereyPereyArray(A, Z, N, Ebeam, E):
 	v = 81 - 0.22*E + 2*Z*(A**(-1.0/3.0))
-	vi = 0.0
 	vsi = 14.4 + 0.24*E
-	vso = 0.0
-	vsoi = 0.0
-	
-	r0 = 1.15
-	ri0 = 0.0
-	rsi0 = 1.34
-	rso0 = 0.0
-	rsoi0 = 0.0
-	
-	a = 0.81
-	ai = 0.0
-	asi = 0.68
-	aso = 0.0
-	asoi = 0.0
-	
-	rc0 = 1.15
-
-	# Format final paramaters into a list of strings
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
-	
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Perey and Perey deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
-	return string_list
-
-# =============================================================================================== #
-# LohrHaeberli is another potential used for deuterons
-def LohrHaeberli(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
+	return [ [v, 0.0, vsi, 0.0, 0.0], [1.15, 0.0, 1.34, 0.0, 0.0], [0.81, 0.0, 0.68, 0.0, 0.0], 1.15 ]
 
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-		
-	# CALCULATE FINAL PARAMETERS
+# LohrHaeberli
+def LohrHaeberliArray(A, Z, N, Ebeam, E):
 	v = 91.13 + 2.2*Z*(A**(-1.0/3.0))
-	vi = 0.0
 	vsi = 218*(A**(-2.0/3.0))
-	vso = 7.0
-	vsoi = 0.0
-	
-	r0 = 1.05
-	ri0 = 0.0
-	rsi0 = 1.43
-	rso0 = 0.75
-	rsoi0 = 0.0
-	
-	a = 0.86
-	ai = 0.0
 	asi = 0.5 + 0.013*(A**(2.0/3.0))
-	aso = 0.5
-	asoi = 0.0
-	
-	rc0 = 1.30
-
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
-
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Lohr and Haeberli deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
-
-	return string_list
-
-# =============================================================================================== #
-# HanShiShen is another potential used for deuterons
-def HanShiShen(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
+	return [ [v, 0.0, vsi, 7.0, 0.0], [1.05, 0.0, 1.43, 0.75, 0.0], [0.86, 0.0, asi, 0.5, 0.0], 1.30 ]
 
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-		
-	# CALCULATE FINAL PARAMETERS
+# HanShiShen
+def HanShiShenArray(A, Z, N, Ebeam, E):
 	v = 82.18 - 0.148*E - 0.000886*E*E - 34.811*( N - Z )/A + 1.058*Z*( A**(-1.0/3.0) )
-	vi = -4.916 + 0.0555*E + 0.0000442*E*E + 35.0*( N - Z )/A if -4.916 + 0.0555*E + 0.0000442*E*E + 35.0*( N - Z )/A > 0.0 else 0.0
+	vi = np.where( -4.916 + 0.0555*E + 0.0000442*E*E + 35.0*( N - Z )/A > 0.0, -4.916 + 0.0555*E + 0.0000442*E*E + 35.0*( N - Z )/A, 0.0 )
 	vsi = 20.968 - 0.0794*E - 43.398*( N - Z )/A
-	vso = 3.703
-	vsoi = -0.206
-	
-	r0 = 1.174
-	ri0 = 1.563
-	rsi0 = 1.328
-	rso0 = 1.234
-	rsoi0 = 1.234
 	
-	a = 0.809
 	ai = 0.7 + 0.045*( A**(1.0/3.0) )
 	asi = 0.465 + 0.045*( A**(1.0/3.0) )
-	aso = 0.813
-	asoi = 0.813
-	
-	rc0 = 1.698
-
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
-
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Han, Shi, and Shen deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
+	return [ [v, vi, vsi, 3.703, -0.206], [1.174, 1.563, 1.328, 1.234, 1.234], [0.809, ai, asi, 0.813, 0.813], 1.698 ]
 
-	return string_list
-
-# =============================================================================================== #
-# Bojowald is another potential used for deuterons
-def Bojowald(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
-
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-		
-	# CALCULATE FINAL PARAMETERS
+# Bojowald
+def BojowaldArray(A, Z, N, Ebeam, E):
 	v = 81.33 + 1.43*Z*( A**(-1.0/3.0) ) - 0.24*E
-	vi = 0.132*( E - 45.0 ) if 0.132*( E - 45.0 ) > 0.0 else 0.0
+	vi = np.where( 0.132*( E - 45.0 ) > 0.0, 0.132*( E - 45.0 ), 0.0 )
 	vsi = 7.8 + 1.04*( A**(1.0/3.0) ) - 0.712*vi
-	vso = 6.0
-	vsoi = 0.0
 	
-	r0 = 1.18
-	ri0 = 1.27
-	rsi0 = 1.27
 	rso0 = 0.78 + 0.038*( A**(1.0/3.0) )
-	rsoi0 = 0.0
 	
 	a = 0.636 + 0.035*( A**(1.0/3.0) )
 	ai = 0.768 + 0.021*( A**(1.0/3.0) )
-	asi = 0.768 + 0.021*( A**(1.0/3.0) )
 	aso = 0.78 + 0.038*( A**(1.0/3.0) )
-	asoi = 0.0
-	
-	rc0 = 1.3
+	return [ [v, vi, vsi, 6.0, 0.0], [1.18, 1.27, 1.27, rso0, 0.0], [a, ai, ai, aso, 0.0], 1.3 ]
 
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
-
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Bojowald deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
-
-	return string_list
-
-# =============================================================================================== #
-# DaehnickNR is another potential used for deuterons
-def DaehnickNR(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
-
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-		
-	# CALCULATE FINAL PARAMETERS
-	mu = [ 8, 20, 28, 50, 82, 126 ]
-	step1 = [ ( 0.5*(ii - N) )**2 for ii in mu ]
-	step2 = [ np.exp(-jj) for jj in step1 ]
-	step3 = sum(step2)
+# DaehnickNR
+def DaehnickNRArray(A, Z, N, Ebeam, E):
+	step3 = DaehnickShellSum(N)
 	beta = -1.0*( ( 0.01*E )**2 )
 
 	v = 88.5 - 0.26*E + 0.88*Z*( A**(-1.0/3.0) )
 	vi = ( 12.2 + 0.026*E )*( 1.0 - np.exp(beta) )
 	vsi = ( 12.2 + 0.026*E )*np.exp(beta)
 	vso = 7.33 - 0.029*E
-	vsoi = 0.0
-	
-	r0 = 1.17
-	ri0 = 1.325
-	rsi0 = 1.325
-	rso0 = 1.07
-	rsoi0 = 0.0
 	
 	a = 0.709 + 0.0017*E
 	ai = 0.53 + 0.07*( A**(1.0/3.0) ) - 0.04*step3
-	asi = 0.53 + 0.07*( A**(1.0/3.0) ) - 0.04*step3
-	aso = 0.66
-	asoi = 0.0
-	
-	rc0 = 1.3
-
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
+	return [ [v, vi, vsi, vso, 0.0], [1.17, 1.325, 1.325, 1.07, 0.0], [a, ai, ai, 0.66, 0.0], 1.3 ]
 
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Daehnick (non-rel) deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
-		print( "beta\t" + str(beta) )
-		print( "mu\t" + str(mu) )
-		print( "step1\t" + str(step1) )
-		print( "step2\t" + str(step2) )
-		print( "step3\t" + str(step3) )
-	return string_list
-
-# =============================================================================================== #
-# DaehnickR is another potential used for deuterons
-def DaehnickR(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0):
-	# CHECK VALUE OF H2 - Energy changes if ejectile is deuteron
-	CheckP(H)
-
-	# CALCULATE TRIVIAL PARAMETERS
-	[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
-		
-	# CALCULATE FINAL PARAMETERS
-	mu = [ 8, 20, 28, 50, 82, 126 ]
-	step1 = [ ( 0.5*(ii - N) )**2 for ii in mu ]
-	step2 = [ np.exp(-jj) for jj in step1 ]
-	step3 = sum(step2)
+# DaehnickR
+def DaehnickRArray(A, Z, N, Ebeam, E):
+	step3 = DaehnickShellSum(N)
 	beta = -1.0*( ( 0.01*E )**2 )
 
 	v =  88.0 - 0.283*E + 0.88*Z*( A**(-1.0/3.0) )
 	vi = ( 12 + 0.031*E )*( 1 - np.exp(beta) )
 	vsi = ( 12 + 0.031*E )*np.exp(beta)
 	vso = 7.2 - 0.032*E
-	vsoi = 0.0
 	
-	r0 = 1.17
 	ri0 = 1.376 - 0.01*np.sqrt(E)
-	rsi0 = 1.376 - 0.01*np.sqrt(E)
-	rso0 = 1.07
-	rsoi0 = 0.0
 	
 	a = 0.717 + 0.0012*E
 	ai = 0.52 + 0.07*( A**(1.0/3.0) ) - 0.04*step3
-	asi = 0.52 + 0.07*( A**(1.0/3.0) ) - 0.04*step3
-	aso = 0.66
-	asoi = 0.0
-	
-	rc0 = 1.3
-
-	# Format final paramaters into a list of strings
-	v_list = [v, vi, vsi, vso, vsoi]
-	r_list = [r0, ri0, rsi0, rso0, rsoi0]
-	a_list = [a, ai, asi, aso, asoi]
+	return [ [v, vi, vsi, vso, 0.0], [1.17, ri0, ri0, 1.07, 0.0], [a, ai, ai, 0.66, 0.0], 1.3 ]
 
-	# Make output based on reaction code
-	# Ptolemy = 0
-	if reaction_code ==0:
-		string_list = MakeStringList(v_list,r_list,a_list,rc0)
-	# DWUCK = 1
-	elif reaction_code == 1:
-		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
-	
-	if PRINT == 1:
-		PrintOpticalModel(string_list, "Daehnick (non-rel) deuteron")
-		PrintCalculatedQuantities(A,Z,E,Q)
-		print( "beta\t" + str(beta) )
-		print( "mu\t" + str(mu) )
-		print( "step1\t" + str(step1) )
-		print( "step2\t" + str(step2) )
-		print( "step3\t" + str(step3) )
-	return string_list
+# =============================================================================================== #
+# REGISTER THE POTENTIALS (see opticalmodel_globals.py)
+RegisterParticle("d", "deuteron", "ALL-D")
+RegisterOpticalModel("d", "AC",  "AnCai", AnCaiArray)
+RegisterOpticalModel("d", "B",   "Bojowald", BojowaldArray)
+RegisterOpticalModel("d", "DNR", "DaehnickNR", DaehnickNRArray)
+RegisterOpticalModel("d", "DR",  "DaehnickR", DaehnickRArray)
+RegisterOpticalModel("d", "HSS", "HanShiShen", HanShiShenArray)
+RegisterOpticalModel("d", "LH",  "LohrHaeberli", LohrHaeberliArray)
+RegisterOpticalModel("d", "PP",  "PereyPerey", PereyPereyArray)
+
+# Kept for anything that still uses the old dictionary of model numbers
+deuteron_dct = ModelDict("d")
 
 # 124Te(p,d), Ebeam=22MeV, Ex=0MeV
 #PRINT = 1
@@ -7,6 +7,7 @@
 # The University of Manchester
 # =============================================================================================== #
 # GLOBAL CONSTANTS
+import sys
 import numpy as np
 amu = 931.494	# amu in MeV/c^2
 PRINT = 0
@@ -73,6 +74,140 @@ def CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product,
 
 	return triv_list
 
+# ----------------------------------------------------------------------------------------------- #
+# OPTICAL MODEL REGISTRY
+# Each opticalmodel_X.py registers its particle and every one of its potentials here, and
+# everything else (the selection of potentials, the names and the model numbers) is worked out
+# from this. The potentials of a particle are numbered alphabetically by name, so adding one is
+# a single call to RegisterOpticalModel. Each particle is stored as
+#	{ "name", "group" (abbreviation for all of them, e.g. ALL-D), "models" (in order),
+#	  "lookup" ({ abbreviation: models it stands for }), "index" ({ abbreviation: model numbers }) }
+# and each potential as
+#	{ "particle", "abbreviation", "name", "array" (XArray) }
+# where XArray is the only copy of the formula (see ARRAY VERSIONS below)
+optical_model_registry = {}
+
+def RegisterParticle(particle, particle_name, group):
+	optical_model_registry[particle] = { "name": particle_name, "group": group, "models": [], "lookup": {}, "index": {} }
+
+def RegisterOpticalModel(particle, abbreviation, name, model_array):
+	entry = optical_model_registry[particle]
+	if abbreviation in entry["lookup"] or abbreviation == "len":
+		raise ValueError("The " + entry["name"] + " potential " + abbreviation + " is already registered.")
+	entry["models"].append( { "particle": particle, "abbreviation": abbreviation, "name": name, "array": model_array } )
+	entry["models"].sort( key = lambda model: model["name"] )
+
+	# Renumber the potentials
+	entry["lookup"] = { entry["group"]: list( entry["models"] ) }
+	entry["index"] = { entry["group"]: list( range( 0, len( entry["models"] ) ) ) }
+	for i in range( 0, len( entry["models"] ) ):
+		entry["lookup"][ entry["models"][i]["abbreviation"] ] = [ entry["models"][i] ]
+		entry["index"][ entry["models"][i]["abbreviation"] ] = [i]
+
+def ParticleEntry(particle):
+	if particle not in optical_model_registry:
+		raise ValueError("Not an allowed particle.")
+	return optical_model_registry[particle]
+
+# The registered potentials that optical_model stands for (e.g. all of them for "ALL-D")
+def ModelEntries(particle, optical_model):
+	entry = ParticleEntry(particle)
+	if optical_model not in entry["lookup"]:
+		raise ValueError("Not an allowed " + entry["name"] + " potential.")
+	return entry["lookup"][optical_model]
+
+# The model numbers of the potentials that optical_model stands for
+def ModelIndices(particle, optical_model):
+	ModelEntries(particle, optical_model)
+	return ParticleEntry(particle)["index"][optical_model]
+
+# The names of the potentials of a particle, in order
+def ModelNameList(particle):
+	return [ model["name"] for model in ParticleEntry(particle)["models"] ]
+
+# { abbreviation: [first model number, last model number + 1], "len": number of potentials }, as
+# kept by hand in the opticalmodel_X.py files before the registry
+def ModelDict(particle):
+	entry = ParticleEntry(particle)
+	dct = { "len": len( entry["models"] ) }
+	for abbreviation in entry["index"]:
+		dct[abbreviation] = [ min( entry["index"][abbreviation] ), max( entry["index"][abbreviation] ) + 1 ]
+	return dct
+
+# ----------------------------------------------------------------------------------------------- #
+# ARRAY VERSIONS
+# The formula of each optical model X is written once, as XArray(A, Z, N, Ebeam, E), which works on
+# numpy arrays (or numbers) of each quantity at once and returns [v_list, r_list, a_list, rc0].
+# OpticalModelArray runs one of these for every set of A, Z, Ebeam and Ex given, and returns the
+# parameters as a numpy array of om_dtype, where "v", "r" and "a" are [v, vi, vsi, vso, vsoi],
+# [r0, ri0, rsi0, rso0, rsoi0] and [a, ai, asi, aso, asoi]. The scalar function X(A, Z, Ebeam, Ex,
+# ...) that returns the input strings for one set of inputs is OpticalModelStrings on XArray
+om_dtype = np.dtype( [ ( "v", np.float64, (5,) ), ( "r", np.float64, (5,) ), ( "a", np.float64, (5,) ), ( "rc0", np.float64 ) ] )
+
+# Converts numbers (or arrays) to an array of floats, as float() does in the scalar functions
+def AsFloat(x):
+	return np.asarray( x, dtype = np.float64 )
+
+# Divides as "/" does in the scalar functions, where whole numbers give a whole number in python2
+def ClassicDivide(x, y):
+	x = np.asarray(x)
+	y = np.asarray(y)
+	if sys.version_info[0] < 3 and np.issubdtype( x.dtype, np.integer ) and np.issubdtype( y.dtype, np.integer ):
+		return np.floor_divide(x, y)
+	return np.true_divide(x, y)
+
+# Array version of CalcTrivials
+def CalcTrivialsArray(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H):
+	N = np.asarray(A) - np.asarray(Z)
+	Q = CalcQ( M_Target, M_Projectile, M_Ejectile, M_Product )
+	if H == 0:
+		E = np.asarray(Ebeam)
+	elif H == 1:
+		E = np.asarray(Ebeam) + Q - np.asarray(Ex)
+	return [N, Q, E]
+
+# Calculate the parameters of an optical model (given by its XArray function) for every set of A,
+# Z, Ebeam and Ex, which are broadcast against each other
+def OpticalModelArray(model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H):
+	CheckP(H)
+	A, Z, Ebeam, Ex = [ np.asarray(x) for x in [ A, Z, Ebeam, Ex ] ]
+	[N, Q, E] = CalcTrivialsArray(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
+	v_list, r_list, a_list, rc0 = model_array(A, Z, N, Ebeam, E)
+
+	par = np.zeros( np.broadcast( A, Z, Ebeam, Ex ).shape, dtype = om_dtype )
+	for i in range(0,5):
+		par["v"][...,i] = v_list[i]
+		par["r"][...,i] = r_list[i]
+		par["a"][...,i] = a_list[i]
+	par["rc0"] = rc0
+	return par
+
+# The parameters for one set of inputs (an element of an om_dtype array) as [v_list, r_list,
+# a_list, rc0], ready for MakeStringList or WriteDWUCKOMBlock
+def ParameterLists(par):
+	return [ [ float(x) for x in par["v"] ], [ float(x) for x in par["r"] ], [ float(x) for x in par["a"] ], float( par["rc0"] ) ]
+
+# The input strings for one set of inputs from the XArray function of an optical model - for
+# Ptolemy if reaction_code is 0, or for DWUCK if it is 1. name is printed if PRINT is 1
+def OpticalModelStrings(model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H, reaction_code = 0, name = ""):
+	v_list, r_list, a_list, rc0 = ParameterLists( OpticalModelArray(model_array, A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H) )
+
+	# Make output based on reaction code
+	# Ptolemy = 0
+	if reaction_code == 0:
+		string_list = MakeStringList(v_list,r_list,a_list,rc0)
+	# DWUCK = 1
+	elif reaction_code == 1:
+		string_list = WriteDWUCKOMBlock( v_list, r_list, a_list,rc0 )
+	else:
+		raise ValueError("reaction_code must have a value of 0 or 1")
+
+	if PRINT == 1:
+		[N, Q, E] = CalcTrivials(A, Z, Ebeam, Ex, M_Target, M_Projectile, M_Ejectile, M_Product, H)
+		PrintOpticalModel(string_list, name)
+		PrintCalculatedQuantities(A,Z,E,Q)
+	return string_list
+
 # ----------------------------------------------------------------------------------------------- #
 # Make the string list from the calculated quantities
 def MakeStringList(v,r,a,rc0):
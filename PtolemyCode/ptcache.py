@@ -0,0 +1,56 @@
+# ptcache
+# Inspects and prunes the cache of Ptolemy/DWUCK output files used by RunPtolemy.py
+# =============================================================================================== #
+# Run the script as
+#	python2 ptcache.py info              -> Prints the number of entries and size of the cache
+#	python2 ptcache.py list              -> Lists every entry, least recently used first
+#	python2 ptcache.py prune [size_MB]   -> Removes least recently used entries until the cache
+#	                                        is at most size_MB (default PTOLEMY_CACHE_SIZE)
+#	python2 ptcache.py clear             -> Removes everything from the cache
+# The cache lives in PTOLEMY_CACHE_DIR (default ~/.ptolemy-cache)
+# =============================================================================================== #
+# Patrick MacGregor
+# Nuclear Physics Research Group
+# School of Physics and Astronomy
+# The University of Manchester
+# =============================================================================================== #
+import os
+import sys
+
+from function_ResultCache import *
+
+def usage():
+	print("Usage: python2 ptcache.py info | list | prune [size_MB] | clear")
+
+if len(sys.argv) < 2:
+	usage()
+	sys.exit(1)
+
+cache_dir = CacheDir()
+option = sys.argv[1]
+
+if option == "info":
+	n, size, oldest, newest = CacheInfo(cache_dir)
+	print("Cache directory" + "\t" + cache_dir)
+	print("Entries" + "\t\t" + str(n))
+	print("Size" + "\t\t" + format( size/1048576.0, ".2f" ) + " MB (limit " + format( CacheSizeLimit()/1048576.0, ".0f" ) + " MB)")
+	print("Oldest use" + "\t" + FormatTime(oldest))
+	print("Newest use" + "\t" + FormatTime(newest))
+
+elif option == "list":
+	for path, size, used in CacheEntries(cache_dir):
+		print( FormatTime(used) + "\t" + str(size) + "\t" + os.path.basename(path) )
+
+elif option == "prune":
+	if len(sys.argv) > 2:
+		max_bytes = int( float(sys.argv[2])*1024*1024 )
+	else:
+		max_bytes = CacheSizeLimit()
+	print("Removed " + str( PruneCache( cache_dir, max_bytes ) ) + " entries")
+
+elif option == "clear":
+	print("Removed " + str( ClearCache(cache_dir) ) + " entries")
+
+else:
+	usage()
+	sys.exit(1)
@@ -13,8 +13,10 @@ proton_array=( "BG" "KD" "M" "P" "V" )
 
 usage(){
 	cat << EOF
-ptolemy-mega-bash.sh template.sh reaction-type[dp,pd,ha,...]
+ptolemy-mega-bash.sh template.sh reaction-type[dp,pd,ha,...] [--resume]
 template.sh must include ROOT_FILE_DIR, PARAMETER_DIR, INPUT_FILE_DIR, OUTPUT_FILE_DIR, and PTOLEMY_OPTION_FILE, but not the input or output potentials.
+All pairs of potentials are written to the same INPUT_FILE_DIR/OUTPUT_FILE_DIR and end up in the same CSV file.
+If the sweep stops part way through, run it again with --resume to carry on from where it stopped.
 EOF
 }
 
@@ -60,32 +62,26 @@ then
 		;;
 	esac
 
-	# Now loop over the two arrays and run some ptolemy!
-	for i in "${ARR1[@]}"
-	do
-		POTENTIAL_IN="${i}"
-		export POTENTIAL_IN
-		
-		for j in "${ARR2[@]}"
-		do
-			POTENTIAL_OUT="${j}"
-			export POTENTIAL_OUT
+	# Now run some ptolemy! Every pair of potentials is written and run in one go by passing the
+	# whole arrays to ptolemyBash.sh
+	POTENTIAL_IN="${ARR1[*]}"
+	POTENTIAL_OUT="${ARR2[*]}"
+	export POTENTIAL_IN
+	export POTENTIAL_OUT
 
-			# Now run the ptolemyBash script
-			if [ -e "${1}" ]
-			then
-				"${PTOLEMY_SCRIPT_DIR}/"ptolemyBash.sh "${1}"
-				# Test to see if it worked OK
-				if [ $? != 0 ]
-				then
-					exit 1
-				fi
-			else
-				usage
-				exit 1
-			fi
-		done
-	done
+	if [ -e "${1}" ]
+	then
+		"${PTOLEMY_SCRIPT_DIR}/"ptolemyBash.sh "${1}" ${3}
+		# Test to see if it worked OK
+		if [ $? != 0 ]
+		then
+			echo "Sweep did not finish - run again with --resume to carry on"
+			exit 1
+		fi
+	else
+		usage
+		exit 1
+	fi
 else
 	echo "Reaction ${2} not allowed - it must be two characters long. p = proton, d = deuteron, h = 3He, a = 4He --> combine two!"
 	exit 1
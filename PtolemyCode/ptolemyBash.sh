@@ -17,30 +17,57 @@
 C_DEFAULT="\e[m"
 C_RED="\e[1;31m"
 
-# SWITCHES
-SWITCH_DELETE_FILE=1
-SWITCH_WRITE_INPUT=1
-SWITCH_RUN_CODE=1
-SWITCH_PTOLEMY=0
-SWITCH_DWUCK=1
-SWITCH_CLEAN=1
-SWITCH_CSV_ARRAY=1
-
-# FIXED DIRECTORIES
+# SWITCHES (can be overridden from the environment, e.g. by ptolemy-mega-bash.sh)
+SWITCH_DELETE_FILE=${SWITCH_DELETE_FILE:-1}
+SWITCH_WRITE_INPUT=${SWITCH_WRITE_INPUT:-1}
+SWITCH_RUN_CODE=${SWITCH_RUN_CODE:-1}
+SWITCH_PTOLEMY=${SWITCH_PTOLEMY:-0}
+SWITCH_DWUCK=${SWITCH_DWUCK:-1}
+SWITCH_CACHE=${SWITCH_CACHE:-1}
+SWITCH_KEEP_INPUT=${SWITCH_KEEP_INPUT:-0}
+SWITCH_CLEAN=${SWITCH_CLEAN:-1}
+SWITCH_STREAM_CLEAN=${SWITCH_STREAM_CLEAN:-1}
+SWITCH_KEEP_RAW=${SWITCH_KEEP_RAW:-0}
+SWITCH_INCREMENTAL=${SWITCH_INCREMENTAL:-0}
+SWITCH_CSV_ARRAY=${SWITCH_CSV_ARRAY:-1}
+SWITCH_PROFILE=${SWITCH_PROFILE:-0}
+
+# FIXED DIRECTORIES (point the solvers at ${PTOLEMY_ANALYSIS_DIR}/fake_solvers to test without them)
 PTOLEMY_DIR=~/Software/Ptolemy
 DWUCK_DIR=~/Software/dwuck/bin
 PTOLEMY_ANALYSIS_DIR="/home/ptmac/Documents/SPECTRUM_ANALYSIS_CODE/PtolemyCode"
 
+# NUMBER OF SOLVERS TO RUN AT ONCE (0 = number of cores)
+N_WORKERS=0
+
+# NUMBER OF INPUT FILES TO RUN WITH EACH PTOLEMY PROCESS
+PACK_SIZE=1
+
+# NUMBER OF TIMES TO RAISE THE ASYMPTOPIA WHEN PTOLEMY ASKS FOR IT (0 = never)
+ASYMPTOPIA_ROUNDS=3
+
+# WHAT TO DO ABOUT WARNINGS/FAILURES WHILE THE CODES RUN: abort, flag or continue, either for
+# everything or per problem (e.g. "warning=flag,fail=abort") - see function_MonitorOutput.py
+MONITOR_POLICY="continue"
+
+# LONGEST TIME (SECONDS) A CODE MAY RUN FOR ON ONE INPUT FILE (0 = no limit)
+TIMEOUT=0
+
 # Check for help option
 usage() {
 	echo "Usage: "
 	echo "  ptolemyBash.sh -h | --help"
-	echo "  ptolemyBash.sh <input_shell.sh>"
+	echo "  ptolemyBash.sh <input_shell.sh> [--resume]"
 	echo ""
 }
 
+RESUME_FLAG=""
 for i in $@
 do
+	if [[ "$i" == "--resume" ]]
+	then
+		RESUME_FLAG="--resume"
+	fi
 	if [[ "$i" == "-h" ]] || [[ "$i" == "--help" ]]
 	then
 		usage
@@ -49,27 +76,57 @@ Options:
   h | --help                 Opens the help dialogue
   <input_shell.sh>           Runs the ptolemyBash script with the given input 
                                parameters (defined later).
+  --resume                   Carries on from where an interrupted run stopped:
+                               nothing is deleted, input files that finished
+                               are not run again and failed ones are retried.
+                               (4) and (5) are skipped if they finished after
+                               the last input file did (see journal.log in
+                               OUTPUT_FILE_DIR).
 
 ptolemyBash controls the creation of Ptolemy input and output files. This is
 done through the <input_shell.sh> script, and some other pre-defined scripts.
 The stages of the script can be controlled with switches at the top, and are
 detailed below:
-  (1) DELETE all previous input and output files.
+  (1) DELETE all previous input and output files. If SWITCH_INCREMENTAL is on,
+      nothing is deleted, and (2)+(3) only run the input files that have
+      changed since the last run (see function_Manifest.py), e.g. after
+      editing the energy list or changing one potential.
   (2) WRITE new input files for the given input.
-  (3) RUN Ptolemy on all of the input files, generating output files.
+  (3) RUN Ptolemy on all of the input files, generating output files. Up to
+      N_WORKERS files are run at once (0 = number of cores). If SWITCH_CACHE
+      is on, input files that have been run before are restored from the
+      result cache (see ptcache.py) instead of being run again. PACK_SIZE
+      Ptolemy input files are run with each Ptolemy process. Input files for
+      which Ptolemy asks for a larger asymptopia are written again with it
+      raised and run again, up to ASYMPTOPIA_ROUNDS times (see
+      function_Asymptopia.py). Warnings and DWUCK failures are watched for
+      while the codes run, and MONITOR_POLICY says whether to stop the code
+      (abort), report them straight away (flag) or leave them until (4)
+      (continue). A code that runs for more than TIMEOUT seconds on one input
+      file is stopped, and the input file is listed in timed_out.txt in
+      OUTPUT_FILE_DIR (run with --resume to try them again).
   (4) CLEAN all the new output files so that all of the desired numbers are
-      extracted.
+      extracted (see BatchClean.py). If SWITCH_STREAM_CLEAN is on, this is done in (3) while the
+      codes are running, and the raw output files are only kept for input
+      files that failed (or for all of them if SWITCH_KEEP_RAW is on).
   (5) COMBINE all of the output files into a .csv file to be pasted into a 
-      spreadsheet.
+      spreadsheet. Stages (3) and (4) also store the cross sections in
+      PT_Raw.npy/PT_Raw.json, which can be read without parsing any text.
+The time taken by each stage (and by each input file in (3)) is recorded in
+metrics.log in OUTPUT_FILE_DIR (see function_Metrics.py). If SWITCH_PROFILE
+is on, the python stages are also profiled, and the profiles are saved in
+OUTPUT_FILE_DIR as [script]-[run].prof.
 
 The <input_shell.sh> defines a number of global variables, which are then used
 in the main script. It also defines the location of a list of excitation 
 energies, as well as directories and the reaction parameters used in python2. The
 global variables are:
   POTENTIAL_IN               The abbreviation for the input potential. These are
-                               detailed in the opticalmodel_X.py files.
+                               detailed in the opticalmodel_X.py files. This can
+                               be a list (e.g. "AC B DNR") to sweep over several.
   POTENTIAL_OUT              The abbreviation for the output potential. These 
-                               are detailed in the opticalmodel_X.py files.
+                               are detailed in the opticalmodel_X.py files. This
+                               can also be a list.
   PARAMETER_DIR              This is the directory where the energy list and the python2 option
                                file are stored.
   INPUT_FILE_DIR             This is the directory where the Ptolemy input files
@@ -95,8 +152,6 @@ else
 	exit 1
 fi
 
-FOLDER_LENGTH="${#INPUT_FILE_DIR}"
-
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ FUNCTIONS ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # Deletes all the files in a given folder (if they exist) and outputs a
 # message to the console
@@ -136,68 +191,55 @@ check_folder_exists ${INPUT_FILE_DIR}
 check_folder_exists ${OUTPUT_FILE_DIR}
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ DELETE FILES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-if [ $SWITCH_DELETE_FILE == 1 ]
+if [ $SWITCH_DELETE_FILE == 1 ] && [ $SWITCH_INCREMENTAL != 1 ] && [[ "$RESUME_FLAG" == "" ]]
 then
 	delete_file_type .in "${INPUT_FILE_DIR}"
 	delete_file_type .out "${OUTPUT_FILE_DIR}"
 	delete_file_type .out-clean "${OUTPUT_FILE_DIR}"
 	delete_file_type .txt "${OUTPUT_FILE_DIR}"
 	delete_file_type .csv "${OUTPUT_FILE_DIR}"
+	delete_file_type .npy "${OUTPUT_FILE_DIR}"
+	delete_file_type .json "${OUTPUT_FILE_DIR}"
 fi
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CREATE FILES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# Profile the python stages?
+export PTOLEMY_PROFILE="${SWITCH_PROFILE}"
+
 # Run WritePtolemyInputFile.py -> writes input file
-if [ $SWITCH_WRITE_INPUT == 1 ]
+if [ $SWITCH_WRITE_INPUT == 1 ] && [ $SWITCH_RUN_CODE != 1 ]
 then
 	python2 "${PTOLEMY_ANALYSIS_DIR}/WritePtolemyInputFile.py" "${PTOLEMY_OPTION_FILE}" "${SWITCH_PTOLEMY}" "${SWITCH_DWUCK}"
 fi
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ RUN PTOLEMY ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # Run ptolemy for each of the input files and store in the right folder
-if [ $SWITCH_RUN_CODE == 1 ]
+if [ $SWITCH_WRITE_INPUT == 1 ] && [ $SWITCH_RUN_CODE == 1 ]
 then
-	for FILE in "${INPUT_FILE_DIR}/"*.in ; do
-		# Get length of input file name
-		FULL_LENGTH="${#FILE}"
-	
-		# Calculate the length of the part we want
-		OUTPUT_LENGTH=$FULL_LENGTH-$FOLDER_LENGTH-3
-	
-		# Grab the substring we want using lengths and add ".out"
-		OUTPUT_NAME="${FILE:FOLDER_LENGTH:OUTPUT_LENGTH}.out"
-		
-		# Run Ptolemy (if desired)
-		if [ $SWITCH_PTOLEMY == 1 ]
-		then
-			# TODO test if file is suitable for ptolemy or dwuck...
-			"${PTOLEMY_DIR}/"ptolemy <"${FILE}">"${OUTPUT_FILE_DIR}/${OUTPUT_NAME}"
-		fi
-		if [ $SWITCH_DWUCK == 1 ]
-		then
-			# TODO test if file is suitable for ptolemy or dwuck...
-			"${DWUCK_DIR}/"dwuck <"${FILE}">"${OUTPUT_FILE_DIR}/${OUTPUT_NAME}"
-		fi
-	
-		# Echo message
-		FULLFILE="${OUTPUT_FILE_DIR}/${OUTPUT_NAME}"
-		echo "Created ${FULLFILE##/home*/}"
-	done
+	# Write and run everything from one python process. The input files are piped straight into
+	# the solvers, and only saved in INPUT_FILE_DIR if SWITCH_KEEP_INPUT is on
+	PTOLEMY_DIR="${PTOLEMY_DIR}" DWUCK_DIR="${DWUCK_DIR}" python2 "${PTOLEMY_ANALYSIS_DIR}/PtolemySweep.py" "${PTOLEMY_OPTION_FILE}" "${SWITCH_PTOLEMY}" "${SWITCH_DWUCK}" "${N_WORKERS}" "${SWITCH_CACHE}" "${PACK_SIZE}" "${SWITCH_KEEP_INPUT}" "${SWITCH_STREAM_CLEAN}" "${SWITCH_KEEP_RAW}" "${SWITCH_INCREMENTAL}" "${ASYMPTOPIA_ROUNDS}" "${MONITOR_POLICY}" "${TIMEOUT}" ${RESUME_FLAG}
+elif [ $SWITCH_RUN_CODE == 1 ]
+then
+	PTOLEMY_DIR="${PTOLEMY_DIR}" DWUCK_DIR="${DWUCK_DIR}" python2 "${PTOLEMY_ANALYSIS_DIR}/RunPtolemy.py" "${SWITCH_PTOLEMY}" "${SWITCH_DWUCK}" "${N_WORKERS}" "${SWITCH_CACHE}" "${PACK_SIZE}" "${SWITCH_STREAM_CLEAN}" "${SWITCH_KEEP_RAW}" "${MONITOR_POLICY}" "${TIMEOUT}" ${RESUME_FLAG}
 fi
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ RUN PTCLEAN ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 if [ $SWITCH_CLEAN == 1 ]
 then
-	for OUTFILE in "${OUTPUT_FILE_DIR}/"*.out
-	do
-		# Run ptclean script
-		if  [ $SWITCH_PTOLEMY == 1 ]
-		then
-			python2 "${PTOLEMY_ANALYSIS_DIR}/"ptclean.py "${OUTFILE}"
-		fi
-		if  [ $SWITCH_DWUCK == 1 ]
+	# Nothing left to clean if it was done while the codes were running
+	if [ $SWITCH_RUN_CODE != 1 ] || [ $SWITCH_STREAM_CLEAN != 1 ]
+	then
+		# The output files come from the last code that was run
+		if [ $SWITCH_DWUCK == 1 ]
 		then
-			# TODO - clean up dwuck input
+			CLEAN_CODE="dwuck"
+		else
+			CLEAN_CODE="ptolemy"
 		fi
-	done
-		
+
+		# Clean all of the output files from one python process
+		python2 "${PTOLEMY_ANALYSIS_DIR}/"BatchClean.py "${CLEAN_CODE}" "${N_WORKERS}" "${OUTPUT_FILE_DIR}" ${RESUME_FLAG}
+	fi
+
 	for CLEAN_FILE in "${OUTPUT_FILE_DIR}/"*.out-clean
 	do		
 		# Check the file size to see if there were errors
@@ -228,13 +270,23 @@ then
 	
 	# Fill the clean file list
 	for OUTCLEAN in "${OUTPUT_FILE_DIR}/"*.out-clean; do
-		echo $OUTCLEAN >> "${OUTPUT_FILE_DIR}/${CLEAN_NAME}"
+		if [ -e "${OUTCLEAN}" ]
+		then
+			echo $OUTCLEAN >> "${OUTPUT_FILE_DIR}/${CLEAN_NAME}"
+		fi
 	done
 	
-	# Now run the python2 script to create the mahoosive CSV file
+	# Now run the python2 script to create the mahoosive CSV file. Use the binary store written
+	# while cleaning if there is one and it holds every clean file (it only holds what the last
+	# run cleaned)
 	# TODO have separate Ptolemy and DWUCK versions
 	CSV_NAME="${OUTPUT_FILE_DIR}/PT_Raw.csv"
-	python2 "${PTOLEMY_ANALYSIS_DIR}/"CSVFileCreator.py "${OUTPUT_FILE_DIR}/${CLEAN_NAME}" "${CSV_NAME}"
+	if [ -e "${OUTPUT_FILE_DIR}/PT_Raw.npy" ]
+	then
+		python2 "${PTOLEMY_ANALYSIS_DIR}/"CSVFileCreator.py "${OUTPUT_FILE_DIR}/PT_Raw.npy" "${CSV_NAME}" "${OUTPUT_FILE_DIR}/${CLEAN_NAME}" ${RESUME_FLAG}
+	else
+		python2 "${PTOLEMY_ANALYSIS_DIR}/"CSVFileCreator.py "${OUTPUT_FILE_DIR}/${CLEAN_NAME}" "${CSV_NAME}" ${RESUME_FLAG}
+	fi
 fi
 
 